@@ -6,12 +6,13 @@ from flask_login import LoginManager
 from flask_migrate import Migrate
 from flask_mail import Mail
 from dotenv import load_dotenv
+from app.utils.replica import RoutingSession, REPLICA_BIND
 
 # Load environment variables
 load_dotenv()
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
 migrate = Migrate()
 mail = Mail()
@@ -24,6 +25,55 @@ def create_app(config_class=None):
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///attendance.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # SQLite production profile (WAL, busy timeout, pool sizing)
+    app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'True').lower() in ['true', 'yes', '1']
+    
+    # Optional read replica for report queries
+    if os.environ.get('REPLICA_DATABASE_URL'):
+        app.config['SQLALCHEMY_BINDS'] = {REPLICA_BIND: os.environ.get('REPLICA_DATABASE_URL')}
+    app.config['REPLICA_MAX_STALENESS'] = int(os.environ.get('REPLICA_MAX_STALENESS', 300))  # seconds, 0 disables the check
+    app.config['REPLICA_CHECK_INTERVAL'] = int(os.environ.get('REPLICA_CHECK_INTERVAL', 5))
+    
+    # Per-request query counting and N+1 detection
+    app.config['SQL_QUERY_STATS'] = os.environ.get('SQL_QUERY_STATS', 'True').lower() in ['true', 'yes', '1']
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 10))
+    
+    # Metrics; set METRICS_DIR to a directory shared by all gunicorn workers
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', 'True').lower() in ['true', 'yes', '1']
+    app.config['METRICS_DIR'] = os.environ.get('METRICS_DIR')
+    app.config['METRICS_FLUSH_INTERVAL'] = int(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+    # Per-worker cache of logged-in users and their profiles, 0 disables it
+    app.config['IDENTITY_CACHE_TTL'] = int(os.environ.get('IDENTITY_CACHE_TTL', 30))  # seconds
+    
+    # In-process scheduler for periodic jobs such as closing ended sessions
+    app.config['SCHEDULER_ENABLED'] = os.environ.get('SCHEDULER_ENABLED', 'True').lower() in ['true', 'yes', '1']
+    app.config['SESSION_CLOSE_INTERVAL'] = int(os.environ.get('SESSION_CLOSE_INTERVAL', 60))  # seconds
+    app.config['SESSION_CLOSE_GRACE_MINUTES'] = int(os.environ.get('SESSION_CLOSE_GRACE_MINUTES', 15))
+    app.config['SESSION_CLOSE_LOOKBACK_DAYS'] = int(os.environ.get('SESSION_CLOSE_LOOKBACK_DAYS', 7))  # older sessions are closed without recording absences
+    app.config['TIMETABLE_SESSION_INTERVAL'] = int(os.environ.get('TIMETABLE_SESSION_INTERVAL', 900))  # seconds
+    
+    # Seconds a worker trusts its in-memory course roster for check-in
+    app.config['ROSTER_CACHE_TTL'] = int(os.environ.get('ROSTER_CACHE_TTL', 300))
+    
+    # Cache for rosters, statistics and dashboards: 'lru' (values per worker), 'sqlite' (values
+    # shared by the workers on a host) or 'null'; lru and sqlite keep version counters in CACHE_PATH
+    app.config['CACHE_TYPE'] = os.environ.get('CACHE_TYPE', 'lru')
+    app.config['CACHE_PATH'] = os.environ.get('CACHE_PATH', os.path.join(app.instance_path, 'cache.sqlite'))
+    app.config['CACHE_DEFAULT_TTL'] = int(os.environ.get('CACHE_DEFAULT_TTL', 300))  # seconds
+    app.config['CACHE_MAX_ENTRIES'] = int(os.environ.get('CACHE_MAX_ENTRIES', 10000))  # lru only
+    app.config['CACHE_KEY_PREFIX'] = os.environ.get('CACHE_KEY_PREFIX', 'attendance')
+    app.config['DASHBOARD_CACHE_TTL'] = int(os.environ.get('DASHBOARD_CACHE_TTL', 60))  # seconds
+    
+    # Uploads waiting for their resized variants; kept outside static/ so they are never served
+    app.config['PROFILE_PICTURE_PENDING_PATH'] = os.environ.get(
+        'PROFILE_PICTURE_PENDING_PATH', os.path.join(app.instance_path, 'profile_pics_pending')
+    )
+    
+    # Largest batch accepted by the offline attendance sync API
+    app.config['ATTENDANCE_SYNC_MAX_BATCH'] = int(os.environ.get('ATTENDANCE_SYNC_MAX_BATCH', 1000))
+    
     # Email configuration
     app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
     app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', 587))
@@ -31,9 +81,23 @@ def create_app(config_class=None):
     app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
     app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
     app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER')
+    app.config['MAIL_WORKERS'] = int(os.environ.get('MAIL_WORKERS', 4))  # 0 leaves the outbox to send-outbox
+    app.config['MAIL_BATCH_SIZE'] = int(os.environ.get('MAIL_BATCH_SIZE', 50))  # messages per SMTP connection
+    app.config['MAIL_OUTBOX_POLL_INTERVAL'] = float(os.environ.get('MAIL_OUTBOX_POLL_INTERVAL', 10))  # seconds
+    app.config['MAIL_MAX_ATTEMPTS'] = int(os.environ.get('MAIL_MAX_ATTEMPTS', 5))
+    app.config['MAIL_RETRY_BASE_DELAY'] = int(os.environ.get('MAIL_RETRY_BASE_DELAY', 30))  # seconds, doubled per attempt
+    app.config['MAIL_RETRY_MAX_DELAY'] = int(os.environ.get('MAIL_RETRY_MAX_DELAY', 3600))
+    app.config['MAIL_SEND_LEASE'] = int(os.environ.get('MAIL_SEND_LEASE', 300))  # seconds before a stuck send is retried
+    app.config['ATTENDANCE_NOTIFICATIONS'] = os.environ.get('ATTENDANCE_NOTIFICATIONS', 'immediate')  # 'immediate', 'digest' (opt in, needs send-attendance-digests daily) or 'off'
+    
+    from app.utils.sqlite_profile import configure_sqlite_engine, register_sqlite_pragmas
+    configure_sqlite_engine(app)
     
     # Initialize extensions with app
     db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():
+            register_sqlite_pragmas(app, engine)
     login_manager.init_app(app)
     migrate.init_app(app, db)
     mail.init_app(app)
@@ -58,14 +122,42 @@ def create_app(config_class=None):
     from app.controllers.student import student as student_blueprint
     app.register_blueprint(student_blueprint, url_prefix='/student')
     
+    from app.utils.query_stats import init_query_stats
+    init_query_stats(app)
+    
+    from app.utils.metrics import init_metrics
+    init_metrics(app)
+    
+    from app.utils.cache import init_cache
+    init_cache(app)
+    
+    from app.utils.email import init_mail_workers
+    init_mail_workers(app)
+    
+    from app.utils.scheduler import init_scheduler
+    init_scheduler(app)
+    
+    # Register CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+    
     # Add context processor for template variables
     @app.context_processor
     def inject_now():
         from datetime import datetime
         return {'now': datetime.utcnow()}
     
-    # Create database tables if they don't exist
+    from app.utils.save_picture import profile_picture_url
+    app.jinja_env.globals['profile_picture_url'] = profile_picture_url
+    
+    # {% cache key, ttl %} fragment caching for dashboard widgets
+    from app.utils.cache import cache
+    from app.utils.fragment_cache import FragmentCacheExtension
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.globals['cache_key'] = cache.key
+    
+    # Create database tables if they don't exist; the replica only gets them from sync-replica
     with app.app_context():
-        db.create_all()
+        db.create_all(bind_key=None)
         
     return app
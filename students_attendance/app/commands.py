@@ -0,0 +1,168 @@
+import click
+import pandas as pd
+from app import db
+
+def register_commands(app):
+    """Register the flask CLI commands"""
+
+    @app.cli.command('enroll')
+    @click.argument('course_code')
+    @click.option('--department', required=True, help='Department of the students to enroll.')
+    @click.option('--semester', type=int, required=True, help='Semester of the students to enroll.')
+    @click.option('--section', default=None, help='Only enroll students of this section.')
+    def enroll(course_code, department, semester, section):
+        """Enroll a department/semester/section into a course."""
+        from app.models.course import Course
+        from app.utils.enrollment import enroll_students
+
+        course = Course.query.filter_by(course_code=course_code).first()
+        if not course:
+            raise click.ClickException(f'Course {course_code} does not exist')
+
+        enrolled_count = enroll_students(
+            course.id,
+            department=department,
+            semester=semester,
+            section=section
+        )
+        db.session.commit()
+
+        click.echo(f'Enrolled {enrolled_count} students in {course.course_code}.')
+
+    @app.cli.command('import-enrollments')
+    @click.argument('csv_file', type=click.Path(exists=True, dir_okay=False))
+    def import_enrollments(csv_file):
+        """Enroll students from a CSV of roll_number,course_code rows."""
+        from app.utils.enrollment import import_enrollments_csv
+
+        df = pd.read_csv(csv_file, dtype=str)
+        enrolled_count, errors = import_enrollments_csv(df)
+        db.session.commit()
+
+        for error in errors:
+            click.echo(error, err=True)
+        click.echo(f'Enrolled {enrolled_count} students. {len(errors)} errors.')
+
+    @app.cli.command('export-attendance')
+    @click.argument('output_dir', type=click.Path(file_okay=False))
+    @click.option('--full', is_flag=True, help='Export every row instead of rewriting the courses changed since the last export.')
+    @click.option('--chunk-size', type=int, default=50000, show_default=True, help='Rows read per chunk.')
+    @click.option('--start-date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Only export sessions from this date; older dates include the archive.')
+    @click.option('--end-date', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Only export sessions up to this date.')
+    def export_attendance(output_dir, full, chunk_size, start_date, end_date):
+        """Export attendance facts as Parquet partitioned by term and course."""
+        import os
+        from app.utils.export import export_attendance_facts, STATE_FILE
+
+        if full and os.path.exists(os.path.join(output_dir, STATE_FILE)):
+            raise click.ClickException(f'{output_dir} already contains an export; use an empty directory for --full')
+
+        try:
+            rows_written = export_attendance_facts(
+                output_dir,
+                chunk_size=chunk_size,
+                incremental=not full,
+                start_date=start_date.date() if start_date else None,
+                end_date=end_date.date() if end_date else None
+            )
+        except ValueError as e:
+            raise click.ClickException(str(e))
+        click.echo(f'Exported {rows_written} attendance rows to {output_dir}.')
+
+    @app.cli.command('sync-replica')
+    def sync_replica():
+        """Copy the SQLite primary into the replica file."""
+        from app.utils.replica import REPLICA_BIND, sync_sqlite_replica
+
+        replica_engine = db.engines.get(REPLICA_BIND)
+        if replica_engine is None:
+            raise click.ClickException('REPLICA_DATABASE_URL is not configured')
+
+        try:
+            sync_sqlite_replica(db.engine, replica_engine)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+
+        click.echo(f'Replica {replica_engine.url.database} synced.')
+
+    @app.cli.command('archive-attendance')
+    @click.option('--before', type=click.DateTime(formats=['%Y-%m-%d']), required=True,
+                  help='Archive sessions dated before this day, e.g. the first day of the current term.')
+    @click.option('--batch-size', type=int, default=500, show_default=True, help='Sessions moved per transaction.')
+    def archive_attendance(before, batch_size):
+        """Move past-term sessions and attendance into the archive tables."""
+        from app.utils.archive import archive_sessions_before
+
+        sessions_moved, attendances_moved = archive_sessions_before(before.date(), batch_size=batch_size)
+        click.echo(f'Archived {sessions_moved} sessions and {attendances_moved} attendance records.')
+
+    @app.cli.command('send-outbox')
+    @click.option('--batch-size', type=int, default=None, help='Messages per SMTP connection (default MAIL_BATCH_SIZE).')
+    def send_outbox(batch_size):
+        """Send every due email in the outbox, e.g. from cron or a worker container."""
+        from sqlalchemy import func
+        from app.models.outbox import OutboxEmail
+        from app.utils.email import drain_outbox
+
+        processed = drain_outbox(app, batch_size=batch_size)
+        counts = dict(db.session.query(OutboxEmail.status, func.count(OutboxEmail.id)).group_by(OutboxEmail.status))
+        summary = ', '.join(f'{status}: {count}' for status, count in sorted(counts.items()))
+        click.echo(f'Processed {processed} emails. Outbox {summary or "empty"}.')
+
+    @app.cli.command('send-attendance-digests')
+    @click.option('--date', 'day', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Day to summarise (default today).')
+    @click.option('--batch-size', type=int, default=500, show_default=True, help='Digests committed per transaction.')
+    @click.option('--send/--no-send', default=True, show_default=True,
+                  help='Drain the outbox now instead of leaving it to the mail workers.')
+    def send_attendance_digests_command(day, batch_size, send):
+        """Queue one attendance summary email per student for the day."""
+        from datetime import date
+        from app.utils.digest import send_attendance_digests
+        from app.utils.email import drain_outbox
+
+        if app.config['ATTENDANCE_NOTIFICATIONS'] != 'digest':
+            raise click.ClickException('ATTENDANCE_NOTIFICATIONS is not set to digest.')
+
+        day = day.date() if day else date.today()
+        queued = send_attendance_digests(day, batch_size=batch_size)
+        click.echo(f'Queued {queued} digests for {day}.')
+
+        if send and queued:
+            click.echo(f'Processed {drain_outbox(app)} emails from the outbox.')
+
+    @app.cli.command('close-sessions')
+    @click.option('--grace', type=int, default=None,
+                  help='Minutes after end_time before a session closes (default SESSION_CLOSE_GRACE_MINUTES).')
+    @click.option('--lookback', type=int, default=None,
+                  help='Only record absences for sessions from this many days back (default SESSION_CLOSE_LOOKBACK_DAYS).')
+    def close_sessions(grace, lookback):
+        """Deactivate ended sessions and record absences, e.g. from cron."""
+        from app.utils.scheduler import close_expired_sessions
+
+        if grace is None:
+            grace = app.config['SESSION_CLOSE_GRACE_MINUTES']
+        if lookback is None:
+            lookback = app.config['SESSION_CLOSE_LOOKBACK_DAYS']
+        closed, absences = close_expired_sessions(grace_minutes=grace, lookback_days=lookback)
+        click.echo(f'Closed {closed} sessions and recorded {absences} absences.')
+
+    @app.cli.command('create-timetable-sessions')
+    @click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), default=None, help='First day (default today).')
+    @click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+                  help='Last day, e.g. the end of term (default the start day).')
+    def create_timetable_sessions(start, end):
+        """Create the sessions the timetable schedules, e.g. daily from cron."""
+        from datetime import date
+        from app.utils.timetable import create_sessions_from_timetable, activate_todays_sessions
+
+        start = start.date() if start else date.today()
+        end = end.date() if end else start
+        if end < start:
+            raise click.ClickException('--end must not be before --start.')
+
+        created = create_sessions_from_timetable(start, end)
+        activated = activate_todays_sessions(grace_minutes=app.config['SESSION_CLOSE_GRACE_MINUTES'])
+        click.echo(f'Created {created} sessions from {start} to {end}; opened {activated} for today.')
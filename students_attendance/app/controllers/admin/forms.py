@@ -99,3 +99,10 @@ class EditUserForm(FlaskForm):
     email = StringField('Email', validators=[DataRequired(), Email()])
     is_active = BooleanField('Active User')
     submit = SubmitField('Update User')
+
+class BulkEnrollForm(FlaskForm):
+    course_id = SelectField('Course', validators=[DataRequired()], coerce=int)
+    department = StringField('Department', validators=[DataRequired()])
+    semester = IntegerField('Semester', validators=[DataRequired(), NumberRange(min=1, max=8)])
+    section = StringField('Section')
+    submit = SubmitField('Enroll Students')
@@ -1,18 +1,25 @@
 # app/controllers/admin/routes.py
-from flask import render_template, url_for, flash, redirect, request, jsonify
+from flask import render_template, url_for, flash, redirect, request, jsonify, abort, current_app, Response
 from flask_login import login_required, current_user
 from app import db
 from app.controllers.admin import admin
 from app.models.user import User
 from app.models.student import Student
 from app.models.faculty import Faculty
-from app.models.course import Course, Enrollment
+from app.models.course import Course
 from app.models.attendance import Attendance, AttendanceSession
 from app.controllers.admin.forms import (
     AddFacultyForm, AddStudentForm, AddCourseForm, 
-    EditUserForm, EditCourseForm
+    EditUserForm, EditCourseForm, BulkEnrollForm
 )
 from app.utils.decorators import admin_required
+from app.utils.enrollment import enroll_students, import_enrollments_csv
+from app.utils.replica import read_replica
+from app.utils.cache import cache
+from app.utils.conditional import conditional_get
+from app.utils.pagination import paginate_request
+from app.utils.roster import roster_entries
+from app.utils.metrics import metrics as app_metrics
 import pandas as pd
 import plotly.express as px
 import plotly.utils
@@ -22,15 +29,32 @@ import json
 @login_required
 @admin_required
 def dashboard():
-    # Get some statistics for the dashboard
-    total_students = Student.query.count()
-    total_faculty = Faculty.query.count()
-    total_courses = Course.query.count()
-    total_sessions = AttendanceSession.query.count()
-    
-    # Get recent attendance sessions
-    recent_sessions = AttendanceSession.query.order_by(AttendanceSession.date.desc()).limit(5).all()
+    # The department chart is shared by every admin for DASHBOARD_CACHE_TTL seconds
+    chart = cache.get_or_set(
+        cache.key('admin_dashboard_chart'),
+        _department_chart,
+        ttl=current_app.config['DASHBOARD_CACHE_TTL']
+    )
     
+    # Totals and recent sessions are loaded inside their cached fragments,
+    # so their queries only run when a fragment is rebuilt
+    return render_template(
+        'admin/dashboard.html',
+        title='Admin Dashboard',
+        get_totals=_dashboard_totals,
+        get_recent_sessions=lambda: AttendanceSession.recent(limit=5),
+        **chart
+    )
+
+def _dashboard_totals():
+    return {
+        'students': Student.query.count(),
+        'faculty': Faculty.query.count(),
+        'courses': Course.query.count(),
+        'sessions': AttendanceSession.query.count()
+    }
+
+def _department_chart():
     # Get attendance by department
     attendance_by_dept = db.session.query(
         Student.department,
@@ -59,23 +83,15 @@ def dashboard():
     else:
         dept_chart_json = None
     
-    return render_template(
-        'admin/dashboard.html',
-        title='Admin Dashboard',
-        total_students=total_students,
-        total_faculty=total_faculty,
-        total_courses=total_courses,
-        total_sessions=total_sessions,
-        recent_sessions=recent_sessions,
-        dept_chart_json=dept_chart_json
-    )
+    return {'dept_chart_json': dept_chart_json}
 
 @admin.route('/users')
 @login_required
 @admin_required
 def users():
-    page = request.args.get('page', 1, type=int)
-    users = User.query.paginate(page=page, per_page=15)
+    users = paginate_request(
+        User.query, [(User.id, False)], per_page=15, total_key='admin.users', total_versions=[('catalog', 0)]
+    )
     return render_template('admin/users.html', title='Manage Users', users=users)
 
 @admin.route('/users/<int:user_id>')
@@ -115,8 +131,10 @@ def edit_user(user_id):
 @login_required
 @admin_required
 def students():
-    page = request.args.get('page', 1, type=int)
-    students = Student.query.join(User).paginate(page=page, per_page=15)
+    students = paginate_request(
+        Student.query.join(User), [(Student.id, False)], per_page=15, total_key='admin.students',
+        total_versions=[('catalog', 0)]
+    )
     return render_template('admin/students.html', title='Manage Students', students=students)
 
 @admin.route('/faculty')
@@ -279,14 +297,75 @@ def edit_course(course_id):
     
     return render_template('admin/edit_course.html', title='Edit Course', form=form, course=course)
 
+@admin.route('/courses/enroll', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def enroll():
+    form = BulkEnrollForm()
+    
+    # Get all courses for the dropdown
+    courses = Course.query.order_by(Course.course_code).all()
+    form.course_id.choices = [(c.id, f"{c.course_code} - {c.title}") for c in courses]
+    
+    if form.validate_on_submit():
+        enrolled_count = enroll_students(
+            form.course_id.data,
+            department=form.department.data,
+            semester=form.semester.data,
+            section=form.section.data or None
+        )
+        db.session.commit()
+        
+        flash(f'Enrolled {enrolled_count} students.', 'success')
+        return redirect(url_for('admin.courses'))
+    
+    return render_template('admin/enroll.html', title='Enroll Students', form=form)
+
+@admin.route('/courses/enroll/upload', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def bulk_upload_enrollments():
+    if request.method == 'POST':
+        if 'file' not in request.files:
+            flash('No file part', 'danger')
+            return redirect(request.url)
+            
+        file = request.files['file']
+        
+        if file.filename == '':
+            flash('No file selected', 'danger')
+            return redirect(request.url)
+            
+        if file and file.filename.endswith('.csv'):
+            try:
+                df = pd.read_csv(file, dtype=str)
+                enrolled_count, errors = import_enrollments_csv(df)
+                db.session.commit()
+                
+                flash(f'Enrolled {enrolled_count} students. {len(errors)} errors.', 'info')
+                for error in errors[:10]:  # Show only first 10 errors
+                    flash(error, 'warning')
+                if len(errors) > 10:
+                    flash(f'... and {len(errors) - 10} more errors', 'warning')
+                
+                return redirect(url_for('admin.courses'))
+                
+            except Exception as e:
+                db.session.rollback()
+                flash(f'Error processing CSV file: {str(e)}', 'danger')
+                return redirect(request.url)
+        else:
+            flash('Only CSV files are allowed', 'danger')
+            return redirect(request.url)
+    
+    return render_template('admin/bulk_upload_enrollments.html', title='Bulk Upload Enrollments')
+
 @admin.route('/attendance')
 @login_required
 @admin_required
 def attendance():
-    page = request.args.get('page', 1, type=int)
-    
     # Get attendance sessions with course and faculty info
-    sessions = AttendanceSession.query.join(
+    sessions_query = AttendanceSession.query.join(
         Course, AttendanceSession.course_id == Course.id
     ).join(
         Faculty, AttendanceSession.faculty_id == Faculty.id
@@ -301,7 +380,15 @@ def attendance():
         Course.title.label('course_title'),
         User.first_name.label('faculty_first_name'),
         User.last_name.label('faculty_last_name')
-    ).order_by(AttendanceSession.date.desc()).paginate(page=page, per_page=15)
+    )
+    
+    sessions = paginate_request(
+        sessions_query,
+        [(AttendanceSession.date, True), (AttendanceSession.id, True)],
+        per_page=15,
+        total_key='admin.attendance',
+        total_versions=[('attendance', 0)]
+    )
     
     return render_template('admin/attendance.html', title='Attendance Records', sessions=sessions)
 
@@ -312,12 +399,7 @@ def attendance_session(session_id):
     session = AttendanceSession.query.get_or_404(session_id)
     
     # Get all enrolled students for this course
-    enrolled_students = Student.query.join(
-        Enrollment, Student.id == Enrollment.student_id
-    ).filter(
-        Enrollment.course_id == session.course_id,
-        Enrollment.is_active == True
-    ).all()
+    enrolled_students = roster_entries(session.course_id)
     
     # Get attendance records for this session
     attendance_records = Attendance.query.filter_by(session_id=session_id).all()
@@ -335,7 +417,7 @@ def attendance_session(session_id):
         students_attendance.append({
             'student_id': student.id,
             'roll_number': student.roll_number,
-            'name': f"{student.user.first_name} {student.user.last_name}",
+            'name': f"{student.first_name} {student.last_name}",
             'status': status,
             'timestamp': timestamp
         })
@@ -350,6 +432,8 @@ def attendance_session(session_id):
 @admin.route('/reports')
 @login_required
 @admin_required
+@read_replica()
+@conditional_get(lambda: [('catalog', 0)])
 def reports():
     # Get all departments for filtering
     departments = Student.query.with_entities(Student.department).distinct().all()
@@ -368,6 +452,8 @@ def reports():
 @admin.route('/api/reports/attendance_by_department', methods=['GET'])
 @login_required
 @admin_required
+@read_replica()
+@conditional_get(lambda: [('attendance', 0), ('catalog', 0), ('archive', 0)])
 def api_attendance_by_department():
     # Get attendance data by department
     attendance_by_dept = db.session.query(
@@ -395,6 +481,8 @@ def api_attendance_by_department():
 @admin.route('/api/reports/attendance_by_course', methods=['GET'])
 @login_required
 @admin_required
+@read_replica()
+@conditional_get(lambda: [('attendance', 0), ('catalog', 0), ('archive', 0)])
 def api_attendance_by_course():
     # Get attendance data by course
     attendance_by_course = db.session.query(
@@ -528,3 +616,17 @@ def bulk_upload_students():
             return redirect(request.url)
     
     return render_template('admin/bulk_upload_students.html', title='Bulk Upload Students')
+
+@admin.route('/metrics')
+def metrics():
+    # Scrapers authenticate with METRICS_TOKEN; people need an admin login
+    token = current_app.config.get('METRICS_TOKEN')
+    authorized_scraper = token and request.headers.get('Authorization') == f'Bearer {token}'
+    
+    if not authorized_scraper:
+        if not current_user.is_authenticated:
+            return current_app.login_manager.unauthorized()
+        if not current_user.is_admin():
+            abort(403)
+    
+    return Response(app_metrics.render(), mimetype='text/plain; version=0.0.4')
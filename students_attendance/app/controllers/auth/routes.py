@@ -94,6 +94,7 @@ def reset_password_request():
         user = User.query.filter_by(email=form.email.data).first()
         if user:
             send_password_reset_email(user)
+            db.session.commit()
         flash('Check your email for instructions to reset your password.', 'info')
         return redirect(url_for('auth.login'))
     
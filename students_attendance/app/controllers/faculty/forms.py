@@ -3,6 +3,7 @@ from flask_wtf import FlaskForm
 from wtforms import StringField, SubmitField, SelectField, DateField, TimeField, TextAreaField
 from wtforms.validators import DataRequired, Length, ValidationError
 from datetime import date, time
+from app.models.timetable import WEEKDAYS
 
 class CreateAttendanceSessionForm(FlaskForm):
     course_id = SelectField('Course', validators=[DataRequired()], coerce=int)
@@ -23,3 +24,21 @@ class CreateAttendanceSessionForm(FlaskForm):
 
 class MarkAttendanceForm(FlaskForm):
     submit = SubmitField('Save Attendance')
+
+class TimetableSlotForm(FlaskForm):
+    course_id = SelectField('Course', validators=[DataRequired()], coerce=int)
+    weekday = SelectField('Day', coerce=int, choices=list(enumerate(WEEKDAYS)))
+    start_time = TimeField('Start Time', validators=[DataRequired()], format='%H:%M')
+    end_time = TimeField('End Time', validators=[DataRequired()], format='%H:%M')
+    location = StringField('Location', validators=[Length(max=100)])
+    valid_from = DateField('Term Starts', validators=[DataRequired()], format='%Y-%m-%d')
+    valid_until = DateField('Term Ends', validators=[DataRequired()], format='%Y-%m-%d')
+    submit = SubmitField('Add to Timetable')
+    
+    def validate_end_time(self, end_time):
+        if self.start_time.data and end_time.data and end_time.data <= self.start_time.data:
+            raise ValidationError('End time must be after start time.')
+    
+    def validate_valid_until(self, valid_until):
+        if self.valid_from.data and valid_until.data and valid_until.data < self.valid_from.data:
+            raise ValidationError('Term must end after it starts.')
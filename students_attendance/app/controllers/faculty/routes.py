@@ -1,16 +1,23 @@
 # app/controllers/faculty/routes.py
-from flask import render_template, url_for, flash, redirect, request, jsonify, session
+from flask import render_template, url_for, flash, redirect, request, jsonify, session, g, current_app
 from flask_login import login_required, current_user
 from app import db
 from app.controllers.faculty import faculty
 from app.models.user import User
-from app.models.faculty import Faculty
 from app.models.student import Student
 from app.models.course import Course, Enrollment
 from app.models.attendance import Attendance, AttendanceSession
-from app.controllers.faculty.forms import CreateAttendanceSessionForm, MarkAttendanceForm
+from app.models.timetable import TimetableSlot, WEEKDAYS
+from app.controllers.faculty.forms import CreateAttendanceSessionForm, MarkAttendanceForm, TimetableSlotForm
 from app.utils.decorators import faculty_required
 from app.utils.qrcode_generator import generate_session_code, generate_qr_code
+from app.utils.replica import read_replica
+from app.utils.conditional import conditional_get
+from app.utils.pagination import paginate_request
+from app.utils.timetable import create_sessions_from_timetable
+from app.utils.roster import course_roster, roster_entries
+from app.utils.marking import ATTENDANCE_STATUSES, changed_statuses, upsert_attendance, sync_marks
+from sqlalchemy.orm import joinedload
 from datetime import datetime, date, time
 import json
 
@@ -19,15 +26,13 @@ import json
 @faculty_required
 def dashboard():
     # Get faculty member details
-    faculty_user = Faculty.query.filter_by(user_id=current_user.id).first_or_404()
+    faculty_user = g.faculty
     
     # Get active courses taught by this faculty
     active_courses = Course.query.filter_by(faculty_id=faculty_user.id, is_active=True).all()
     
     # Get recent attendance sessions
-    recent_sessions = AttendanceSession.query.filter_by(
-        faculty_id=faculty_user.id
-    ).order_by(AttendanceSession.date.desc()).limit(5).all()
+    recent_sessions = AttendanceSession.recent(limit=5, faculty_id=faculty_user.id)
     
     # Get course attendance stats
     course_stats = []
@@ -70,7 +75,7 @@ def dashboard():
 @faculty_required
 def courses():
     # Get faculty member details
-    faculty_user = Faculty.query.filter_by(user_id=current_user.id).first_or_404()
+    faculty_user = g.faculty
     
     # Get all courses taught by this faculty
     courses = Course.query.filter_by(faculty_id=faculty_user.id).all()
@@ -86,25 +91,13 @@ def courses():
 @faculty_required
 def course_details(course_id):
     # Get faculty member details
-    faculty_user = Faculty.query.filter_by(user_id=current_user.id).first_or_404()
+    faculty_user = g.faculty
     
     # Get course details
     course = Course.query.filter_by(id=course_id, faculty_id=faculty_user.id).first_or_404()
     
     # Get enrolled students
-    enrolled_students = Student.query.join(
-        Enrollment, Student.id == Enrollment.student_id
-    ).filter(
-        Enrollment.course_id == course_id,
-        Enrollment.is_active == True
-    ).join(
-        User, Student.user_id == User.id
-    ).add_columns(
-        Student.id,
-        Student.roll_number,
-        User.first_name,
-        User.last_name
-    ).all()
+    enrolled_students = roster_entries(course_id)
     
     # Get attendance sessions for this course
     attendance_sessions = AttendanceSession.query.filter_by(
@@ -129,7 +122,7 @@ def course_details(course_id):
 @faculty_required
 def create_attendance():
     # Get faculty member details
-    faculty_user = Faculty.query.filter_by(user_id=current_user.id).first_or_404()
+    faculty_user = g.faculty
     
     form = CreateAttendanceSessionForm()
     
@@ -138,6 +131,16 @@ def create_attendance():
     form.course_id.choices = [(c.id, f"{c.course_code} - {c.title}") for c in courses]
     
     if form.validate_on_submit():
+        # One session per course and start time, e.g. already generated from the timetable
+        existing = AttendanceSession.query.filter_by(
+            course_id=form.course_id.data,
+            date=form.date.data,
+            start_time=form.start_time.data
+        ).first()
+        if existing is not None:
+            flash('A session for this course already starts at that time.', 'warning')
+            return redirect(url_for('faculty.attendance_session', session_id=existing.id))
+        
         # Generate a unique session code
         session_code = generate_session_code()
         
@@ -156,6 +159,9 @@ def create_attendance():
         db.session.add(attendance_session)
         db.session.commit()
         
+        # Snapshot the roster now so check-ins don't need to query it
+        course_roster(attendance_session.course_id)
+        
         flash('Attendance session created successfully!', 'success')
         return redirect(url_for('faculty.attendance_session', session_id=attendance_session.id))
     
@@ -169,12 +175,76 @@ def create_attendance():
         form=form
     )
 
+@faculty.route('/timetable', methods=['GET', 'POST'])
+@login_required
+@faculty_required
+def timetable():
+    # Get faculty member details
+    faculty_user = g.faculty
+    
+    form = TimetableSlotForm()
+    
+    # Get all courses taught by this faculty for the dropdown
+    courses = Course.query.filter_by(faculty_id=faculty_user.id, is_active=True).all()
+    form.course_id.choices = [(c.id, f"{c.course_code} - {c.title}") for c in courses]
+    
+    if form.validate_on_submit():
+        slot = TimetableSlot(
+            course_id=form.course_id.data,
+            faculty_id=faculty_user.id,
+            weekday=form.weekday.data,
+            start_time=form.start_time.data,
+            end_time=form.end_time.data,
+            location=form.location.data,
+            valid_from=form.valid_from.data,
+            valid_until=form.valid_until.data
+        )
+        db.session.add(slot)
+        db.session.commit()
+        
+        # Today's session is created right away; later ones as each day comes
+        create_sessions_from_timetable(date.today(), faculty_id=faculty_user.id)
+        
+        flash('Timetable slot added. Sessions will be created on each scheduled day.', 'success')
+        return redirect(url_for('faculty.timetable'))
+    
+    slots = TimetableSlot.query.filter_by(
+        faculty_id=faculty_user.id,
+        is_active=True
+    ).options(joinedload(TimetableSlot.course)).order_by(
+        TimetableSlot.weekday, TimetableSlot.start_time
+    ).all()
+    
+    return render_template(
+        'faculty/timetable.html',
+        title='Timetable',
+        form=form,
+        slots=slots,
+        weekdays=WEEKDAYS
+    )
+
+@faculty.route('/timetable/<int:slot_id>/remove', methods=['POST'])
+@login_required
+@faculty_required
+def remove_timetable_slot(slot_id):
+    slot = TimetableSlot.query.filter_by(
+        id=slot_id,
+        faculty_id=g.faculty.id
+    ).first_or_404()
+    
+    # Keep the row so sessions already created still make sense
+    slot.is_active = False
+    db.session.commit()
+    
+    flash('Timetable slot removed. Sessions already created are kept.', 'info')
+    return redirect(url_for('faculty.timetable'))
+
 @faculty.route('/attendance/session/<int:session_id>')
 @login_required
 @faculty_required
 def attendance_session(session_id):
     # Get faculty member details
-    faculty_user = Faculty.query.filter_by(user_id=current_user.id).first_or_404()
+    faculty_user = g.faculty
     
     # Get attendance session details
     session = AttendanceSession.query.filter_by(
@@ -186,19 +256,7 @@ def attendance_session(session_id):
     qr_code = session.generate_qr_code()
     
     # Get all enrolled students for this course
-    enrolled_students = Student.query.join(
-        Enrollment, Student.id == Enrollment.student_id
-    ).filter(
-        Enrollment.course_id == session.course_id,
-        Enrollment.is_active == True
-    ).join(
-        User, Student.user_id == User.id
-    ).add_columns(
-        Student.id,
-        Student.roll_number,
-        User.first_name,
-        User.last_name
-    ).all()
+    enrolled_students = roster_entries(session.course_id)
     
     # Get attendance records for this session
     attendance_records = Attendance.query.filter_by(session_id=session_id).all()
@@ -234,7 +292,7 @@ def attendance_session(session_id):
 @faculty_required
 def mark_attendance(session_id):
     # Get faculty member details
-    faculty_user = Faculty.query.filter_by(user_id=current_user.id).first_or_404()
+    faculty_user = g.faculty
     
     # Get attendance session details
     session = AttendanceSession.query.filter_by(
@@ -243,50 +301,20 @@ def mark_attendance(session_id):
     ).first_or_404()
     
     # Get all enrolled students for this course
-    enrolled_students = Student.query.join(
-        Enrollment, Student.id == Enrollment.student_id
-    ).filter(
-        Enrollment.course_id == session.course_id,
-        Enrollment.is_active == True
-    ).join(
-        User, Student.user_id == User.id
-    ).add_columns(
-        Student.id,
-        Student.roll_number,
-        User.first_name,
-        User.last_name
-    ).all()
+    enrolled_students = roster_entries(session.course_id)
     
     form = MarkAttendanceForm()
     
     # Handle form submission
     if form.validate_on_submit():
         # Get the attendance data from the form
+        statuses = {}
         for student in enrolled_students:
-            status_field = f'status_{student.id}'
-            status = request.form.get(status_field, 'absent')
-            
-            # Check if attendance record already exists
-            attendance = Attendance.query.filter_by(
-                session_id=session_id,
-                student_id=student.id
-            ).first()
-            
-            if attendance:
-                # Update existing record
-                attendance.status = status
-                attendance.marked_by = current_user.id
-                attendance.timestamp = datetime.utcnow()
-            else:
-                # Create new attendance record
-                attendance = Attendance(
-                    session_id=session_id,
-                    student_id=student.id,
-                    status=status,
-                    marked_by=current_user.id
-                )
-                db.session.add(attendance)
+            status = request.form.get(f'status_{student.id}', 'absent')
+            statuses[student.id] = status if status in ATTENDANCE_STATUSES else 'absent'
         
+        # Only write the students whose status actually changed
+        upsert_attendance(session_id, changed_statuses(session_id, statuses), current_user.id)
         db.session.commit()
         flash('Attendance marked successfully!', 'success')
         return redirect(url_for('faculty.attendance_session', session_id=session_id))
@@ -304,18 +332,95 @@ def mark_attendance(session_id):
         form=form
     )
 
+@faculty.route('/api/attendance/<int:session_id>/marks', methods=['POST'])
+@login_required
+@faculty_required
+def api_mark_attendance(session_id):
+    # Expects only the changed marks: {"changes": {"<student_id>": "present", ...}}
+    faculty_user = g.faculty
+    
+    # Get attendance session details
+    session = AttendanceSession.query.filter_by(
+        id=session_id,
+        faculty_id=faculty_user.id
+    ).first_or_404()
+    
+    data = request.get_json(silent=True) or {}
+    changes = data.get('changes')
+    if not isinstance(changes, dict):
+        return jsonify({'success': False, 'message': 'changes must map student ids to statuses.'}), 400
+    
+    statuses = {}
+    rejected = []
+    for student_id, status in changes.items():
+        try:
+            student_id = int(student_id)
+        except (TypeError, ValueError):
+            rejected.append({'student_id': student_id, 'reason': 'invalid_student'})
+            continue
+        if status not in ATTENDANCE_STATUSES:
+            rejected.append({'student_id': student_id, 'reason': 'invalid_status'})
+            continue
+        statuses[student_id] = status
+    
+    # Check enrollment for all submitted students at once
+    enrolled_ids = {
+        student_id for (student_id,) in db.session.query(Enrollment.student_id).filter(
+            Enrollment.course_id == session.course_id,
+            Enrollment.is_active == True,
+            Enrollment.student_id.in_(list(statuses))
+        )
+    }
+    for student_id in list(statuses):
+        if student_id not in enrolled_ids:
+            del statuses[student_id]
+            rejected.append({'student_id': student_id, 'reason': 'not_enrolled'})
+    
+    changed = changed_statuses(session_id, statuses)
+    upsert_attendance(session_id, changed, current_user.id)
+    db.session.commit()
+    
+    return jsonify({
+        'success': True,
+        'updated': len(changed),
+        'unchanged': len(statuses) - len(changed),
+        'rejected': rejected
+    })
+
+@faculty.route('/api/attendance/sync', methods=['POST'])
+@login_required
+@faculty_required
+def api_sync_attendance():
+    # Marks queued offline: {"marks": [{"client_id", "session_id", "student_id", "status", "client_timestamp"}, ...]}
+    data = request.get_json(silent=True) or {}
+    marks = data.get('marks')
+    if not isinstance(marks, list) or not all(isinstance(m, dict) for m in marks):
+        return jsonify({'success': False, 'message': 'marks must be a list of objects.'}), 400
+    
+    max_batch = current_app.config['ATTENDANCE_SYNC_MAX_BATCH']
+    if len(marks) > max_batch:
+        return jsonify({'success': False, 'message': f'At most {max_batch} marks per request.'}), 413
+    
+    results = sync_marks(marks, g.faculty.id, current_user.id)
+    db.session.commit()
+    
+    return jsonify({'success': True, 'results': results})
+
 @faculty.route('/attendance/history')
 @login_required
 @faculty_required
 def attendance_history():
     # Get faculty member details
-    faculty_user = Faculty.query.filter_by(user_id=current_user.id).first_or_404()
+    faculty_user = g.faculty
     
     # Get all attendance sessions created by this faculty
-    page = request.args.get('page', 1, type=int)
-    sessions = AttendanceSession.query.filter_by(
-        faculty_id=faculty_user.id
-    ).order_by(AttendanceSession.date.desc()).paginate(page=page, per_page=10)
+    sessions = paginate_request(
+        AttendanceSession.query.filter_by(faculty_id=faculty_user.id),
+        [(AttendanceSession.date, True), (AttendanceSession.id, True)],
+        per_page=10,
+        total_key=f'faculty.attendance_history.{faculty_user.id}',
+        total_versions=[('attendance', 0)]
+    )
     
     return render_template(
         'faculty/attendance_history.html',
@@ -328,7 +433,7 @@ def attendance_history():
 @faculty_required
 def students():
     # Get faculty member details
-    faculty_user = Faculty.query.filter_by(user_id=current_user.id).first_or_404()
+    faculty_user = g.faculty
     
     # Get courses taught by this faculty
     courses = Course.query.filter_by(faculty_id=faculty_user.id).all()
@@ -364,7 +469,7 @@ def students():
 @faculty_required
 def student_details(student_id):
     # Get faculty member details
-    faculty_user = Faculty.query.filter_by(user_id=current_user.id).first_or_404()
+    faculty_user = g.faculty
     
     # Get student details
     student = Student.query.filter_by(id=student_id).join(User).first_or_404()
@@ -422,9 +527,10 @@ def student_details(student_id):
 @faculty.route('/reports')
 @login_required
 @faculty_required
+@conditional_get(lambda: [('catalog', 0)])
 def reports():
     # Get faculty member details
-    faculty_user = Faculty.query.filter_by(user_id=current_user.id).first_or_404()
+    faculty_user = g.faculty
     
     # Get active courses taught by this faculty
     active_courses = Course.query.filter_by(faculty_id=faculty_user.id, is_active=True).all()
@@ -438,9 +544,11 @@ def reports():
 @faculty.route('/api/course_attendance/<int:course_id>')
 @login_required
 @faculty_required
+@read_replica()
+@conditional_get(lambda course_id: [('course', course_id), ('people', 0), ('archive', 0)])
 def api_course_attendance(course_id):
     # Get faculty member details
-    faculty_user = Faculty.query.filter_by(user_id=current_user.id).first_or_404()
+    faculty_user = g.faculty
     
     # Get course details
     course = Course.query.filter_by(id=course_id, faculty_id=faculty_user.id).first_or_404()
@@ -450,12 +558,24 @@ def api_course_attendance(course_id):
     
     return jsonify(stats)
 
+def _student_attendance_versions(student_id):
+    # The student's courses taught by this faculty member; an id-only lookup
+    course_ids = db.session.query(Enrollment.course_id).join(
+        Course, Enrollment.course_id == Course.id
+    ).filter(
+        Enrollment.student_id == student_id,
+        Enrollment.is_active == True,
+        Course.faculty_id == g.faculty.id
+    )
+    return [('student', student_id)] + [('course', course_id) for (course_id,) in course_ids]
+
 @faculty.route('/api/student_attendance/<int:student_id>')
 @login_required
 @faculty_required
+@conditional_get(_student_attendance_versions)
 def api_student_attendance(student_id):
     # Get faculty member details
-    faculty_user = Faculty.query.filter_by(user_id=current_user.id).first_or_404()
+    faculty_user = g.faculty
     
     # Get student details
     student = Student.query.filter_by(id=student_id).first_or_404()
@@ -1,5 +1,6 @@
 # app/controllers/main/routes.py
-from flask import render_template, url_for, flash, redirect, request
+import os
+from flask import render_template, url_for, flash, redirect, request, send_from_directory, abort, current_app
 from flask_login import login_required, current_user
 from app.controllers.main import main
 from app import db
@@ -34,8 +35,13 @@ def edit_profile():
         
         # Save profile picture if provided
         if form.profile_picture.data:
-            from app.utils.save_picture import save_profile_picture
-            picture_filename = save_profile_picture(form.profile_picture.data)
+            from app.utils.save_picture import save_profile_picture, ProfilePictureError
+            try:
+                picture_filename = save_profile_picture(form.profile_picture.data)
+            except ProfilePictureError as e:
+                db.session.rollback()
+                flash(str(e), 'danger')
+                return render_template('main/edit_profile.html', title='Edit Profile', form=form)
             current_user.profile_image = picture_filename
         
         db.session.commit()
@@ -48,3 +54,29 @@ def edit_profile():
         form.last_name.data = current_user.last_name
     
     return render_template('main/edit_profile.html', title='Edit Profile', form=form)
+
+@main.route('/profile_pics/<path:filename>')
+def profile_picture(filename):
+    from app.utils.save_picture import (
+        get_pictures_path, get_pending_path, find_original, placeholder_picture, PICTURE_SIZES, PICTURE_FORMATS
+    )
+    
+    pictures_path = get_pictures_path()
+    if not os.path.exists(os.path.join(pictures_path, filename)):
+        # Variants are still being written: serve a placeholder, never the raw upload
+        name, _, variant = filename.rpartition('_')
+        size, _, fmt = variant.partition('.')
+        if not size.isdigit() or int(size) not in PICTURE_SIZES or fmt not in PICTURE_FORMATS:
+            abort(404)
+        if find_original(get_pending_path(), name) is None:
+            abort(404)
+        data, mimetype = placeholder_picture(int(size), fmt)
+        response = current_app.response_class(data, mimetype=mimetype)
+        response.cache_control.no_cache = True
+        return response
+    
+    # Variant names are content-hashed, so they never change once written
+    response = send_from_directory(pictures_path, filename, max_age=31536000)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
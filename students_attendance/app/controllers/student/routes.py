@@ -1,13 +1,14 @@
 # app/controllers/student/routes.py
-from flask import render_template, url_for, flash, redirect, request, jsonify
-from flask_login import login_required, current_user
+from flask import render_template, url_for, flash, redirect, request, jsonify, g
+from flask_login import login_required
 from app import db
 from app.controllers.student import student
 from app.models.user import User
-from app.models.student import Student
 from app.models.course import Course, Enrollment
 from app.models.attendance import Attendance, AttendanceSession
 from app.utils.decorators import student_required
+from app.utils.metrics import metrics
+from app.utils.roster import is_enrolled
 from datetime import datetime
 import json
 
@@ -16,8 +17,23 @@ import json
 @student_required
 def dashboard():
     # Get student details
-    student_user = Student.query.filter_by(user_id=current_user.id).first_or_404()
+    student_user = g.student
     
+    # Cached dashboard fragments are rebuilt when the student or their
+    # courses change; the queries behind them run inside the fragments
+    fragment_versions = [('student', student_user.id)] + [('course', c) for c in student_user.get_course_ids()]
+    
+    return render_template(
+        'student/dashboard.html',
+        title='Student Dashboard',
+        student=student_user,
+        get_course_attendance=lambda: _course_attendance(student_user),
+        get_overall_percentage=student_user.get_attendance_percentage,
+        get_recent_attendance=lambda: _recent_attendance(student_user),
+        fragment_versions=fragment_versions
+    )
+
+def _course_attendance(student_user):
     # Get active enrollments
     enrollments = Enrollment.query.filter_by(
         student_id=student_user.id,
@@ -36,32 +52,22 @@ def dashboard():
             'course': course,
             'attendance_percentage': attendance_percentage
         })
-    
-    # Get overall attendance percentage
-    overall_percentage = student_user.get_attendance_percentage()
-    
+    return course_attendance
+
+def _recent_attendance(student_user):
     # Get recent attendance records
-    recent_attendance = Attendance.query.filter_by(
+    return Attendance.query.filter_by(
         student_id=student_user.id
     ).join(
         AttendanceSession
     ).order_by(Attendance.timestamp.desc()).limit(5).all()
-    
-    return render_template(
-        'student/dashboard.html',
-        title='Student Dashboard',
-        student=student_user,
-        course_attendance=course_attendance,
-        overall_percentage=overall_percentage,
-        recent_attendance=recent_attendance
-    )
 
 @student.route('/courses')
 @login_required
 @student_required
 def courses():
     # Get student details
-    student_user = Student.query.filter_by(user_id=current_user.id).first_or_404()
+    student_user = g.student
     
     # Get all enrollments
     enrollments = Enrollment.query.filter_by(
@@ -79,7 +85,7 @@ def courses():
 @student_required
 def course_details(course_id):
     # Get student details
-    student_user = Student.query.filter_by(user_id=current_user.id).first_or_404()
+    student_user = g.student
     
     # Check if student is enrolled in this course
     enrollment = Enrollment.query.filter_by(
@@ -134,14 +140,10 @@ def course_details(course_id):
 @student_required
 def attendance():
     # Get student details
-    student_user = Student.query.filter_by(user_id=current_user.id).first_or_404()
+    student_user = g.student
     
     # Get all attendance records
-    attendance_records = Attendance.query.filter_by(
-        student_id=student_user.id
-    ).join(
-        AttendanceSession
-    ).order_by(AttendanceSession.date.desc()).all()
+    attendance_records = Attendance.history_for_student(student_user.id)
     
     # Group attendance records by course
     courses_attendance = {}
@@ -172,12 +174,13 @@ def attendance():
 @student_required
 def mark_attendance():
     # Get student details
-    student_user = Student.query.filter_by(user_id=current_user.id).first_or_404()
+    student_user = g.student
     
     if request.method == 'POST':
         session_code = request.form.get('session_code')
         
         if not session_code:
+            metrics.inc('attendance_checkins_total', result='failure', reason='missing_code')
             flash('Please enter a session code.', 'danger')
             return redirect(url_for('student.mark_attendance'))
         
@@ -188,17 +191,13 @@ def mark_attendance():
         ).first()
         
         if not session:
+            metrics.inc('attendance_checkins_total', result='failure', reason='invalid_code')
             flash('Invalid session code or session is not active.', 'danger')
             return redirect(url_for('student.mark_attendance'))
         
         # Check if student is enrolled in this course
-        enrollment = Enrollment.query.filter_by(
-            student_id=student_user.id,
-            course_id=session.course_id,
-            is_active=True
-        ).first()
-        
-        if not enrollment:
+        if not is_enrolled(session.course_id, student_user.id):
+            metrics.inc('attendance_checkins_total', result='failure', reason='not_enrolled')
             flash('You are not enrolled in this course.', 'danger')
             return redirect(url_for('student.mark_attendance'))
         
@@ -209,6 +208,7 @@ def mark_attendance():
         ).first()
         
         if existing_attendance:
+            metrics.inc('attendance_checkins_total', result='failure', reason='duplicate')
             flash('Your attendance has already been marked for this session.', 'info')
             return redirect(url_for('student.course_details', course_id=session.course_id))
         
@@ -223,6 +223,7 @@ def mark_attendance():
         
         db.session.add(attendance)
         db.session.commit()
+        metrics.inc('attendance_checkins_total', result='success')
         
         flash('Your attendance has been marked successfully!', 'success')
         return redirect(url_for('student.course_details', course_id=session.course_id))
@@ -246,13 +247,14 @@ def scan_qr():
 @student_required
 def api_mark_attendance():
     # Get student details
-    student_user = Student.query.filter_by(user_id=current_user.id).first_or_404()
+    student_user = g.student
     
     # Get session code from request
     data = request.json
     session_code = data.get('session_code')
     
     if not session_code:
+        metrics.inc('attendance_checkins_total', result='failure', reason='missing_code')
         return jsonify({'success': False, 'message': 'Session code is required.'}), 400
     
     # Find the attendance session with this code
@@ -262,16 +264,12 @@ def api_mark_attendance():
     ).first()
     
     if not session:
+        metrics.inc('attendance_checkins_total', result='failure', reason='invalid_code')
         return jsonify({'success': False, 'message': 'Invalid session code or session is not active.'}), 400
     
     # Check if student is enrolled in this course
-    enrollment = Enrollment.query.filter_by(
-        student_id=student_user.id,
-        course_id=session.course_id,
-        is_active=True
-    ).first()
-    
-    if not enrollment:
+    if not is_enrolled(session.course_id, student_user.id):
+        metrics.inc('attendance_checkins_total', result='failure', reason='not_enrolled')
         return jsonify({'success': False, 'message': 'You are not enrolled in this course.'}), 400
     
     # Check if attendance already marked
@@ -281,6 +279,7 @@ def api_mark_attendance():
     ).first()
     
     if existing_attendance:
+        metrics.inc('attendance_checkins_total', result='failure', reason='duplicate')
         return jsonify({'success': False, 'message': 'Your attendance has already been marked for this session.'}), 400
     
     # Mark attendance
@@ -294,6 +293,7 @@ def api_mark_attendance():
     
     db.session.add(attendance)
     db.session.commit()
+    metrics.inc('attendance_checkins_total', result='success')
     
     return jsonify({
         'success': True, 
@@ -4,3 +4,8 @@ from app.models.student import Student
 from app.models.faculty import Faculty
 from app.models.course import Course, Enrollment
 from app.models.attendance import Attendance, AttendanceSession
+from app.models.archive import ArchivedAttendance, ArchivedAttendanceSession
+from app.models.outbox import OutboxEmail
+from app.models.notification import AttendanceDigest
+from app.models.sync import AttendanceSyncMark
+from app.models.timetable import TimetableSlot
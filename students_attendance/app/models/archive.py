@@ -0,0 +1,52 @@
+from datetime import datetime
+from app import db
+
+class ArchivedAttendanceSession(db.Model):
+    """Attendance session from a closed term, moved out of the hot table"""
+    __tablename__ = 'attendance_sessions_archive'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Same id as the original session
+    course_id = db.Column(db.Integer, nullable=False)
+    faculty_id = db.Column(db.Integer, nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)
+    session_code = db.Column(db.String(50), nullable=False)
+    is_active = db.Column(db.Boolean, default=False)
+    created_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime)
+    location = db.Column(db.String(100))
+    notes = db.Column(db.Text)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_attendance_sessions_archive_course_date', 'course_id', 'date'),
+        db.Index('ix_attendance_sessions_archive_date', 'date'),
+    )
+    
+    def __repr__(self):
+        return f'<ArchivedAttendanceSession {self.id} {self.date}>'
+
+
+class ArchivedAttendance(db.Model):
+    """Attendance record belonging to an archived session"""
+    __tablename__ = 'attendances_archive'
+    
+    id = db.Column(db.Integer, primary_key=True)  # Same id as the original record
+    session_id = db.Column(db.Integer, nullable=False)
+    student_id = db.Column(db.Integer, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    timestamp = db.Column(db.DateTime)
+    marked_by = db.Column(db.Integer)
+    location = db.Column(db.String(100))
+    ip_address = db.Column(db.String(50))
+    device_info = db.Column(db.String(255))
+    comments = db.Column(db.Text)
+    
+    __table_args__ = (
+        db.Index('ix_attendances_archive_session', 'session_id'),
+        db.Index('ix_attendances_archive_student_status', 'student_id', 'status'),
+    )
+    
+    def __repr__(self):
+        return f'<ArchivedAttendance {self.student_id} {self.status}>'
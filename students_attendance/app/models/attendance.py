@@ -3,6 +3,7 @@ from datetime import datetime
 import qrcode
 import io
 import base64
+from sqlalchemy.orm import joinedload, contains_eager
 from app import db
 
 class AttendanceSession(db.Model):
@@ -20,15 +21,38 @@ class AttendanceSession(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     location = db.Column(db.String(100))
     notes = db.Column(db.Text)
+    is_scheduled = db.Column(db.Boolean, default=False)  # Generated from the timetable, not opened yet
     
     # Relationships
     course = db.relationship('Course', back_populates='attendance_sessions')
     faculty = db.relationship('Faculty')
     attendances = db.relationship('Attendance', back_populates='session', cascade='all, delete-orphan')
     
+    __table_args__ = (
+        db.Index('ix_attendance_sessions_course_date', 'course_id', 'date'),
+        db.Index('ix_attendance_sessions_faculty_date', 'faculty_id', 'date'),
+        db.Index('ux_attendance_sessions_course_date_start', 'course_id', 'date', 'start_time', unique=True),
+        # Archived rows keep their id, so SQLite must never hand it out again
+        {'sqlite_autoincrement': True},
+    )
+    
     def __repr__(self):
         return f'<AttendanceSession {self.course.course_code} {self.date}>'
     
+    @classmethod
+    def recent(cls, limit=5, faculty_id=None):
+        """Latest sessions with their course and faculty name eager loaded"""
+        from app.models.faculty import Faculty
+        
+        query = cls.query.options(
+            joinedload(cls.course),
+            joinedload(cls.faculty).joinedload(Faculty.user)
+        )
+        if faculty_id is not None:
+            query = query.filter_by(faculty_id=faculty_id)
+        
+        return query.order_by(cls.date.desc()).limit(limit).all()
+    
     def generate_qr_code(self):
         """Generate a QR code for this attendance session"""
         qr = qrcode.QRCode(
@@ -50,7 +74,16 @@ class AttendanceSession(db.Model):
         return f"data:image/png;base64,{img_str}"
     
     def get_attendance_count(self):
-        """Get the count of present and absent students"""
+        """Get the count of present and absent students, cached until the session or roster changes"""
+        from app.utils.cache import cache
+        
+        key = cache.key(
+            'attendance_count', self.id,
+            versions=[('session', self.id), ('roster', self.course_id)]
+        )
+        return cache.get_or_set(key, self._compute_attendance_count)
+    
+    def _compute_attendance_count(self):
         present_count = Attendance.query.filter_by(session_id=self.id, status='present').count()
         
         # Get total enrolled students for this course
@@ -79,6 +112,7 @@ class Attendance(db.Model):
     ip_address = db.Column(db.String(50))  # For tracking from where attendance was marked
     device_info = db.Column(db.String(255))  # Device used to mark attendance
     comments = db.Column(db.Text)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Server time of the last write
     
     # Relationships
     session = db.relationship('AttendanceSession', back_populates='attendances')
@@ -88,7 +122,24 @@ class Attendance(db.Model):
     # Ensure a student has only one attendance record per session
     __table_args__ = (
         db.UniqueConstraint('session_id', 'student_id', name='unique_attendance'),
+        db.Index('ix_attendances_student_status', 'student_id', 'status'),
+        db.Index('ix_attendances_updated_at', 'updated_at'),
+        {'sqlite_autoincrement': True},
     )
     
     def __repr__(self):
         return f'<Attendance {self.student_id} {self.status}>'
+    
+    @classmethod
+    def history_for_student(cls, student_id):
+        """A student's attendance, newest first, with session, course and faculty loaded"""
+        from app.models.faculty import Faculty
+        
+        return cls.query.filter_by(
+            student_id=student_id
+        ).join(
+            cls.session
+        ).options(
+            contains_eager(cls.session).joinedload(AttendanceSession.course),
+            contains_eager(cls.session).joinedload(AttendanceSession.faculty).joinedload(Faculty.user)
+        ).order_by(AttendanceSession.date.desc()).all()
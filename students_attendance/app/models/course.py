@@ -1,6 +1,7 @@
 # app/models/course.py
 from datetime import datetime
 from app import db
+from app.utils.replica import read_replica
 
 class Course(db.Model):
     __tablename__ = 'courses'
@@ -28,26 +29,40 @@ class Course(db.Model):
     
     def get_enrolled_students(self):
         """Get all students enrolled in this course"""
+        from sqlalchemy.orm import joinedload
         from app.models.student import Student
         
         enrolled_students = Student.query.join(Enrollment).filter(
             Enrollment.course_id == self.id
-        ).all()
+        ).options(joinedload(Student.user)).all()
         
         return enrolled_students
     
-    def get_attendance_stats(self):
-        """Get attendance statistics for this course"""
-        from app.models.attendance import AttendanceSession, Attendance
-        from sqlalchemy import func
+    @read_replica()
+    def get_attendance_stats(self, start_date=None, end_date=None):
+        """Get attendance statistics for this course
+        
+        Archived sessions are only included when start_date reaches back into
+        the archived range. Cached until the course's sessions, attendance or
+        enrollments change.
+        """
+        from app.utils.cache import cache
+        
+        key = cache.key(
+            'course_stats', self.id, start_date, end_date,
+            versions=[('course', self.id), ('people', 0), ('archive', 0)]
+        )
+        return cache.get_or_set(key, lambda: self._compute_attendance_stats(start_date, end_date))
+    
+    def _compute_attendance_stats(self, start_date, end_date):
+        from app.utils.archive import count_sessions, count_present_by_student
         
         # Get all enrolled students
         enrolled_students = self.get_enrolled_students()
         total_students = len(enrolled_students)
         
-        # Get all attendance sessions for this course
-        sessions = AttendanceSession.query.filter_by(course_id=self.id).all()
-        total_sessions = len(sessions)
+        # Count attendance sessions for this course
+        total_sessions = count_sessions([self.id], start_date, end_date)
         
         # Initialize statistics
         stats = {
@@ -60,13 +75,12 @@ class Course(db.Model):
         if total_sessions == 0 or total_students == 0:
             return stats
         
+        # Present counts for every student in one grouped query
+        present_counts = count_present_by_student([self.id], None, start_date, end_date)
+        
         # Calculate per-student attendance
         for student in enrolled_students:
-            present_count = Attendance.query.join(AttendanceSession).filter(
-                Attendance.student_id == student.id,
-                AttendanceSession.course_id == self.id,
-                Attendance.status == 'present'
-            ).count()
+            present_count = present_counts.get(student.id, 0)
             
             attendance_percentage = (present_count / total_sessions) * 100 if total_sessions > 0 else 0
             
@@ -102,6 +116,8 @@ class Enrollment(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('student_id', 'course_id', name='unique_enrollment'),
+        db.Index('ix_enrollments_course_active', 'course_id', 'is_active'),
+        db.Index('ix_enrollments_student_active', 'student_id', 'is_active'),
     )
     
     def __repr__(self):
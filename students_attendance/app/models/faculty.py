@@ -1,6 +1,7 @@
 # app/models/faculty.py
 from app import db
 from app.models.user import User
+from app.utils.replica import read_replica
 
 class Faculty(db.Model):
     __tablename__ = 'faculty'
@@ -24,9 +25,16 @@ class Faculty(db.Model):
         from app.models.course import Course
         return Course.query.filter_by(faculty_id=self.id, is_active=True).all()
     
+    @read_replica()
     def get_course_attendance_stats(self, course_id):
-        """Get attendance statistics for a specific course"""
-        from app.models.attendance import AttendanceSession
+        """Get attendance statistics for a specific course, cached until the course changes"""
+        from app.utils.cache import cache
+        
+        key = cache.key('faculty_course_stats', self.id, course_id, versions=[('course', course_id)])
+        return cache.get_or_set(key, lambda: self._compute_course_attendance_stats(course_id))
+    
+    def _compute_course_attendance_stats(self, course_id):
+        from app.models.attendance import Attendance, AttendanceSession
         from app.models.course import Enrollment
         from sqlalchemy import func
         
@@ -39,6 +47,14 @@ class Faculty(db.Model):
             faculty_id=self.id
         ).all()
         
+        # Present counts for every session in one grouped query
+        present_counts = dict(db.session.query(
+            Attendance.session_id, func.count(Attendance.id)
+        ).filter(
+            Attendance.session_id.in_([session.id for session in sessions]),
+            Attendance.status == 'present'
+        ).group_by(Attendance.session_id)) if sessions else {}
+        
         # Calculate statistics
         stats = {
             'total_sessions': len(sessions),
@@ -47,7 +63,7 @@ class Faculty(db.Model):
         }
         
         for session in sessions:
-            present_count = session.attendances.filter_by(status='present').count()
+            present_count = present_counts.get(session.id, 0)
             absent_count = total_students - present_count
             
             stats['session_details'].append({
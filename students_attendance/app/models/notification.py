@@ -0,0 +1,21 @@
+# app/models/notification.py
+from datetime import datetime
+from app import db
+
+class AttendanceDigest(db.Model):
+    """Record of the daily attendance summary queued for a user"""
+    __tablename__ = 'attendance_digests'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    digest_date = db.Column(db.Date, nullable=False)
+    event_count = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # A user gets at most one digest per day
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'digest_date', name='unique_attendance_digest'),
+    )
+    
+    def __repr__(self):
+        return f'<AttendanceDigest {self.user_id} {self.digest_date}>'
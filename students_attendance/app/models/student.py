@@ -1,6 +1,7 @@
 # app/models/student.py
 from app import db
 from app.models.user import User
+from app.utils.replica import read_replica
 
 class Student(db.Model):
     __tablename__ = 'students'
@@ -21,22 +22,31 @@ class Student(db.Model):
     def __repr__(self):
         return f'<Student {self.roll_number}>'
     
-    def get_attendance_percentage(self, course_id=None):
-        from app.models.attendance import Attendance, AttendanceSession
+    def get_course_ids(self):
+        """Ids of every course the student is enrolled in, active or not.
+        
+        Cached until the student's enrollments change.
+        """
+        from app.utils.cache import cache
+        from app.models.course import Enrollment
+        
+        key = cache.key('student_course_ids', self.id, versions=[('student', self.id)])
+        return cache.get_or_set(key, lambda: [
+            course_id for (course_id,) in db.session.query(Enrollment.course_id).filter_by(student_id=self.id)
+        ])
+    
+    @read_replica()
+    def get_attendance_percentage(self, course_id=None, start_date=None, end_date=None):
+        """Attendance percentage for one course or across all enrolled courses.
+        
+        Archived sessions are only included when start_date reaches back into
+        the archived range. Cached per student and set of courses.
+        """
+        from app.utils.cache import cache
         
         if course_id:
             # Get attendance for a specific course
-            total_sessions = AttendanceSession.query.filter_by(course_id=course_id).count()
-            if total_sessions == 0:
-                return 0
-                
-            attended_sessions = Attendance.query.join(AttendanceSession).filter(
-                Attendance.student_id == self.id,
-                AttendanceSession.course_id == course_id,
-                Attendance.status == 'present'
-            ).count()
-            
-            return (attended_sessions / total_sessions) * 100
+            course_ids = [course_id]
         else:
             # Get overall attendance across all courses
             # This requires determining which courses the student is enrolled in
@@ -47,18 +57,22 @@ class Student(db.Model):
                 return 0
                 
             course_ids = [enrollment.course_id for enrollment in enrollments]
-            
-            total_sessions = AttendanceSession.query.filter(
-                AttendanceSession.course_id.in_(course_ids)
-            ).count()
-            
-            if total_sessions == 0:
-                return 0
-                
-            attended_sessions = Attendance.query.join(AttendanceSession).filter(
-                Attendance.student_id == self.id,
-                AttendanceSession.course_id.in_(course_ids),
-                Attendance.status == 'present'
-            ).count()
-            
-            return (attended_sessions / total_sessions) * 100
+        
+        key = cache.key(
+            'attendance_percentage', self.id, ','.join(map(str, sorted(course_ids))), start_date, end_date,
+            versions=[('student', self.id), ('archive', 0)] + [('course', c) for c in course_ids]
+        )
+        return cache.get_or_set(key, lambda: self._compute_attendance_percentage(course_ids, start_date, end_date))
+    
+    def _compute_attendance_percentage(self, course_ids, start_date, end_date):
+        from app.utils.archive import count_sessions, count_present_by_student
+        
+        total_sessions = count_sessions(course_ids, start_date, end_date)
+        if total_sessions == 0:
+            return 0
+        
+        attended_sessions = count_present_by_student(
+            course_ids, [self.id], start_date, end_date
+        ).get(self.id, 0)
+        
+        return (attended_sessions / total_sessions) * 100
@@ -0,0 +1,27 @@
+# app/models/sync.py
+from datetime import datetime
+from app import db
+
+class AttendanceSyncMark(db.Model):
+    """Mark submitted through the offline sync API, keyed by the submitter and the device's id for it"""
+    __tablename__ = 'attendance_sync_marks'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    client_id = db.Column(db.String(64), nullable=False)
+    session_id = db.Column(db.Integer)
+    student_id = db.Column(db.Integer)
+    status = db.Column(db.String(20))
+    client_timestamp = db.Column(db.DateTime)
+    result = db.Column(db.String(20), nullable=False)  # 'applied', 'unchanged', 'stale', 'rejected'
+    reason = db.Column(db.String(50))
+    submitted_by = db.Column(db.Integer, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Devices generate client ids, so they are only unique per submitter
+    __table_args__ = (
+        db.UniqueConstraint('submitted_by', 'client_id', name='unique_sync_client_id'),
+        db.Index('ix_attendance_sync_marks_session', 'session_id'),
+    )
+    
+    def __repr__(self):
+        return f'<AttendanceSyncMark {self.client_id} {self.result}>'
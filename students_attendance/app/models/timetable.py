@@ -0,0 +1,31 @@
+# app/models/timetable.py
+from datetime import datetime
+from app import db
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+class TimetableSlot(db.Model):
+    """Weekly recurring class from which attendance sessions are generated"""
+    __tablename__ = 'timetable_slots'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id'), nullable=False)
+    faculty_id = db.Column(db.Integer, db.ForeignKey('faculty.id'), nullable=False)
+    weekday = db.Column(db.Integer, nullable=False)  # 0 = Monday, as date.weekday()
+    start_time = db.Column(db.Time, nullable=False)
+    end_time = db.Column(db.Time, nullable=False)
+    location = db.Column(db.String(100))
+    valid_from = db.Column(db.Date, nullable=False)  # First day of term
+    valid_until = db.Column(db.Date, nullable=False)  # Last day of term
+    is_active = db.Column(db.Boolean, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    course = db.relationship('Course')
+    
+    __table_args__ = (
+        db.Index('ix_timetable_slots_weekday_active', 'weekday', 'is_active'),
+    )
+    
+    def __repr__(self):
+        return f'<TimetableSlot {self.course_id} {WEEKDAYS[self.weekday]} {self.start_time}>'
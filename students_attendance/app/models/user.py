@@ -46,4 +46,6 @@ class User(db.Model, UserMixin):
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # User and role profile in one query, or none when cached
+    from app.utils.identity import load_identity
+    return load_identity(int(user_id))
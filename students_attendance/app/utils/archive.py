@@ -0,0 +1,116 @@
+from sqlalchemy import select, insert, delete, func
+from app import db
+from app.models.attendance import Attendance, AttendanceSession
+from app.models.archive import ArchivedAttendance, ArchivedAttendanceSession
+from app.models.sync import AttendanceSyncMark
+from app.utils.cache import cache
+
+SESSION_COLUMNS = [
+    'id', 'course_id', 'faculty_id', 'date', 'start_time', 'end_time', 'session_code',
+    'is_active', 'created_at', 'updated_at', 'location', 'notes'
+]
+ATTENDANCE_COLUMNS = [
+    'id', 'session_id', 'student_id', 'status', 'timestamp', 'marked_by',
+    'location', 'ip_address', 'device_info', 'comments'
+]
+
+def archive_sessions_before(cutoff, batch_size=500):
+    """Move sessions dated before cutoff, and their attendance, to the archive.
+
+    Each batch is copied and deleted in its own transaction so the hot tables
+    are never locked for long. Offline sync records for the moved sessions
+    are dropped: a device retrying one is rejected as an unknown session
+    rather than applied twice. Returns (sessions_moved, attendances_moved).
+    """
+    sessions_moved = 0
+    attendances_moved = 0
+
+    while True:
+        session_ids = db.session.execute(
+            select(AttendanceSession.id).where(
+                AttendanceSession.date < cutoff
+            ).order_by(AttendanceSession.id).limit(batch_size)
+        ).scalars().all()
+        if not session_ids:
+            break
+
+        db.session.execute(insert(ArchivedAttendanceSession).from_select(
+            SESSION_COLUMNS,
+            select(*[getattr(AttendanceSession, c) for c in SESSION_COLUMNS]).where(
+                AttendanceSession.id.in_(session_ids)
+            )
+        ))
+        result = db.session.execute(insert(ArchivedAttendance).from_select(
+            ATTENDANCE_COLUMNS,
+            select(*[getattr(Attendance, c) for c in ATTENDANCE_COLUMNS]).where(
+                Attendance.session_id.in_(session_ids)
+            )
+        ))
+        attendances_moved += result.rowcount
+
+        db.session.execute(delete(AttendanceSyncMark).where(AttendanceSyncMark.session_id.in_(session_ids)))
+        db.session.execute(delete(Attendance).where(Attendance.session_id.in_(session_ids)))
+        db.session.execute(delete(AttendanceSession).where(AttendanceSession.id.in_(session_ids)))
+        # Counts that exclude the archive change when sessions move into it
+        cache.invalidate('archive', 0)
+        db.session.commit()
+
+        sessions_moved += len(session_ids)
+
+    return sessions_moved, attendances_moved
+
+def archive_boundary():
+    """Latest archived session date, or None if nothing is archived"""
+    return db.session.query(func.max(ArchivedAttendanceSession.date)).scalar()
+
+def attendance_sources(start_date=None):
+    """(session model, attendance model) pairs that hold rows from start_date on.
+
+    Only the hot tables are returned unless start_date reaches back into the
+    archived range, so current-term queries never touch the archive.
+    """
+    sources = [(AttendanceSession, Attendance)]
+    if start_date is not None:
+        boundary = archive_boundary()
+        if boundary is not None and start_date <= boundary:
+            sources.append((ArchivedAttendanceSession, ArchivedAttendance))
+    return sources
+
+def _date_filters(session_model, start_date, end_date):
+    filters = []
+    if start_date is not None:
+        filters.append(session_model.date >= start_date)
+    if end_date is not None:
+        filters.append(session_model.date <= end_date)
+    return filters
+
+def count_sessions(course_ids, start_date=None, end_date=None):
+    """Number of sessions for the courses within the date range"""
+    total = 0
+    for session_model, _ in attendance_sources(start_date):
+        total += db.session.query(func.count(session_model.id)).filter(
+            session_model.course_id.in_(course_ids),
+            *_date_filters(session_model, start_date, end_date)
+        ).scalar()
+    return total
+
+def count_present_by_student(course_ids, student_ids=None, start_date=None, end_date=None):
+    """{student_id: present count} for the courses within the date range"""
+    counts = {}
+    for session_model, attendance_model in attendance_sources(start_date):
+        query = db.session.query(
+            attendance_model.student_id,
+            func.count(attendance_model.id)
+        ).join(
+            session_model, attendance_model.session_id == session_model.id
+        ).filter(
+            session_model.course_id.in_(course_ids),
+            attendance_model.status == 'present',
+            *_date_filters(session_model, start_date, end_date)
+        )
+        if student_ids is not None:
+            query = query.filter(attendance_model.student_id.in_(student_ids))
+
+        for student_id, present in query.group_by(attendance_model.student_id):
+            counts[student_id] = counts.get(student_id, 0) + present
+    return counts
@@ -0,0 +1,349 @@
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from collections import OrderedDict
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app import db
+from app.models.attendance import Attendance, AttendanceSession
+from app.models.course import Course, Enrollment
+from app.models.faculty import Faculty
+from app.models.student import Student
+from app.models.user import User
+from app.utils.replica import replica_position
+
+class NullCache:
+    """Stores no values; every lookup misses. Useful in tests.
+
+    Version counters are still kept so that per-worker memos keyed on them,
+    such as the check-in roster, see writes.
+    """
+
+    def __init__(self):
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.counters.get(key)
+
+    def get_many(self, keys):
+        return {key: self.counters[key] for key in keys if key in self.counters}
+
+    def set(self, key, value, ttl):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def incr_many(self, keys):
+        with self.lock:
+            for key in keys:
+                self.counters[key] = self.counters.get(key, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.counters.clear()
+
+class LRUCache:
+    """In-process cache with a size bound and per-entry expiry.
+
+    Counters used for version keys live outside the LRU so they are never
+    evicted; losing one would resurrect entries built under it.
+    """
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.counters:
+                return self.counters[key]
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return entry[1]
+
+    def get_many(self, keys):
+        return {key: value for key in keys if (value := self.get(key)) is not None}
+
+    def set(self, key, value, ttl):
+        with self.lock:
+            self.entries[key] = (time.time() + ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def incr_many(self, keys):
+        with self.lock:
+            for key in keys:
+                self.counters[key] = self.counters.get(key, 0) + 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.counters.clear()
+
+class SQLiteCache:
+    """Cache in a local SQLite file shared by every worker on the host"""
+
+    shared = True
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().execute(
+            'CREATE TABLE IF NOT EXISTS cache ('
+            'key TEXT PRIMARY KEY, value BLOB, expires_at REAL)'
+        )
+
+    def _connection(self):
+        conn = getattr(self.local, 'conn', None)
+        if conn is None or self.local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+            self.local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        rows = self._connection().execute(
+            f'SELECT key, value FROM cache WHERE key IN ({placeholders}) '
+            'AND (expires_at IS NULL OR expires_at > ?)',
+            keys + [time.time()]
+        ).fetchall()
+        return {key: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, ttl):
+        self._connection().execute(
+            'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), time.time() + ttl)
+        )
+
+    def delete(self, key):
+        self._connection().execute('DELETE FROM cache WHERE key = ?', (key,))
+
+    def incr_many(self, keys):
+        # Counters never expire, so they survive purge()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for key in keys:
+                row = conn.execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+                value = pickle.loads(row[0]) + 1 if row else 1
+                conn.execute(
+                    'INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, NULL)',
+                    (key, pickle.dumps(value))
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def purge(self):
+        """Remove expired entries"""
+        self._connection().execute('DELETE FROM cache WHERE expires_at < ?', (time.time(),))
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+class Cache:
+    """Namespaced, versioned keys on top of a pluggable backend.
+
+    Writes do not delete cached values; they bump the version of the
+    course, student or session they touch, and every key built from that
+    entity changes:
+
+        stats = cache.get_or_set(
+            cache.key('course_stats', course.id, versions=[('course', course.id)]),
+            lambda: compute_stats(course),
+            ttl=300
+        )
+        cache.bump('course', course.id)
+
+    Version counters may live in a separate store from the values, so
+    workers that each keep values in memory still see every bump.
+    """
+
+    def __init__(self):
+        self.backend = NullCache()
+        self.versions = self.backend
+        self.prefix = 'attendance'
+        self.default_ttl = 300
+
+    def configure(self, backend, prefix, default_ttl, versions=None):
+        self.backend = backend
+        self.versions = versions or backend
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+
+    def _version_key(self, entity, entity_id):
+        return f'{self.prefix}:v:{entity}:{entity_id}'
+
+    def key(self, namespace, *parts, versions=()):
+        """Cache key for namespace and parts, tagged with the current version of each (entity, id).
+
+        Inside read_replica() the key also carries the replica's sync time,
+        so results read from a lagging replica never sit under a key that
+        primary readers use.
+        """
+        versions = list(versions)
+        current = self.versions.get_many([self._version_key(e, i) for e, i in versions])
+        tags = [f'{e}{i}v{current.get(self._version_key(e, i), 0)}' for e, i in versions]
+        position = replica_position()
+        if position is not None:
+            tags.append(f'replica{position!r}')
+        return ':'.join([self.prefix, namespace] + [str(p) for p in parts] + tags)
+
+    def bump(self, entity, *entity_ids):
+        """Invalidate every key built with these entities, immediately"""
+        ids = {i for i in entity_ids if i is not None}
+        if ids:
+            self.versions.incr_many([self._version_key(entity, i) for i in ids])
+
+    def invalidate(self, entity, *entity_ids):
+        """Bump these entities when the current transaction commits.
+
+        Bumping before the commit would let another request rebuild the
+        entry from the old rows under the new version.
+        """
+        pending = db.session.info.setdefault('cache_invalidations', {})
+        pending.setdefault(entity, set()).update(i for i in entity_ids if i is not None)
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl if ttl is not None else self.default_ttl)
+
+    def get_or_set(self, key, compute, ttl=None):
+        value = self.backend.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.set(key, value, ttl)
+        return value
+
+    def clear(self):
+        self.backend.clear()
+        if self.versions is not self.backend:
+            self.versions.clear()
+
+cache = Cache()
+
+def init_cache(app):
+    """Choose the backend from CACHE_TYPE: 'lru' (default), 'sqlite' or 'null'.
+
+    The lru backend keeps values per worker but its version counters in the
+    CACHE_PATH file, so a write in one worker invalidates every worker's
+    entries and ETags.
+    """
+    cache_type = app.config['CACHE_TYPE']
+    versions = None
+    if cache_type == 'sqlite':
+        backend = SQLiteCache(app.config['CACHE_PATH'])
+    elif cache_type == 'lru':
+        backend = LRUCache(app.config['CACHE_MAX_ENTRIES'])
+        versions = SQLiteCache(app.config['CACHE_PATH'])
+    elif cache_type == 'null':
+        backend = NullCache()
+    else:
+        raise ValueError(f'Unknown CACHE_TYPE {cache_type!r}')
+
+    cache.configure(backend, app.config['CACHE_KEY_PREFIX'], app.config['CACHE_DEFAULT_TTL'], versions)
+
+@event.listens_for(Session, 'after_commit')
+def _apply_invalidations(session):
+    for entity, ids in session.info.pop('cache_invalidations', {}).items():
+        cache.bump(entity, *ids)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_invalidations(session):
+    session.info.pop('cache_invalidations', None)
+
+def session_course_ids(session_ids, connection=None):
+    """{session_id: course_id}; a session never changes course, so this is cached for a day"""
+    keys = {session_id: cache.key('session_course', session_id) for session_id in set(session_ids)}
+    cached = cache.backend.get_many(keys.values())
+    courses = {session_id: cached[key] for session_id, key in keys.items() if key in cached}
+
+    missing = [session_id for session_id in keys if session_id not in courses]
+    if missing:
+        stmt = select(AttendanceSession.id, AttendanceSession.course_id).where(AttendanceSession.id.in_(missing))
+        rows = (connection or db.session).execute(stmt)
+        for session_id, course_id in rows:
+            courses[session_id] = course_id
+            cache.set(keys[session_id], course_id, 86400)
+    return courses
+
+def invalidate_attendance(session_ids, student_ids=(), connection=None):
+    """Invalidate what depends on attendance written to these sessions"""
+    session_ids = set(session_ids)
+    if not session_ids:
+        return
+    cache.invalidate('session', *session_ids)
+    cache.invalidate('course', *session_course_ids(session_ids, connection).values())
+    cache.invalidate('student', *student_ids)
+    cache.invalidate('attendance', 0)
+
+@event.listens_for(Attendance, 'after_insert')
+@event.listens_for(Attendance, 'after_update')
+@event.listens_for(Attendance, 'after_delete')
+def _invalidate_attendance(mapper, connection, target):
+    invalidate_attendance([target.session_id], [target.student_id], connection)
+
+@event.listens_for(AttendanceSession, 'after_insert')
+@event.listens_for(AttendanceSession, 'after_update')
+@event.listens_for(AttendanceSession, 'after_delete')
+def _invalidate_session(mapper, connection, target):
+    cache.invalidate('session', target.id)
+    cache.invalidate('course', target.course_id)
+    cache.invalidate('sessions', 0)
+    cache.invalidate('attendance', 0)
+
+@event.listens_for(Enrollment, 'after_insert')
+@event.listens_for(Enrollment, 'after_update')
+@event.listens_for(Enrollment, 'after_delete')
+def _invalidate_enrollment(mapper, connection, target):
+    cache.invalidate('course', target.course_id)
+    cache.invalidate('student', target.student_id)
+
+@event.listens_for(Course, 'after_update')
+@event.listens_for(Course, 'after_delete')
+def _invalidate_course(mapper, connection, target):
+    cache.invalidate('course', target.id)
+
+# 'catalog' covers listings across all courses, students and users, such as reports
+@event.listens_for(User, 'after_insert')
+@event.listens_for(User, 'after_delete')
+@event.listens_for(Course, 'after_insert')
+@event.listens_for(Course, 'after_update')
+@event.listens_for(Course, 'after_delete')
+@event.listens_for(Student, 'after_insert')
+@event.listens_for(Student, 'after_update')
+@event.listens_for(Student, 'after_delete')
+@event.listens_for(Faculty, 'after_insert')
+@event.listens_for(Faculty, 'after_delete')
+def _invalidate_catalog(mapper, connection, target):
+    cache.invalidate('catalog', 0)
@@ -0,0 +1,52 @@
+import time
+import hashlib
+from functools import wraps
+from flask import request, session, current_app, make_response
+from flask_login import current_user
+from app.utils.cache import cache
+
+def data_etag(versions):
+    """ETag for the current user, URL and the versions of the data behind it.
+
+    Versions kept per worker (the null backend) differ between processes,
+    so those tags also roll over every CACHE_DEFAULT_TTL seconds, the same
+    staleness bound as the cached values themselves.
+    """
+    parts = [request.endpoint, current_user.get_id(), request.full_path]
+    if not getattr(cache.versions, 'shared', False):
+        parts.append(int(time.time() // cache.default_ttl))
+    key = cache.key('etag', *parts, versions=versions)
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def conditional_get(versions):
+    """Answer a GET with 304 Not Modified when the data behind it is unchanged.
+
+    versions is called with the view arguments and returns the
+    (entity, id) pairs the response depends on, see app.utils.cache. It runs
+    before the view, so a matching If-None-Match skips every aggregate
+    query. Pages with pending flash messages are always rendered.
+
+    Views that read from the replica need read_replica() above this
+    decorator, so the tag also carries the replica's sync time and changes
+    when the replica catches up with writes the versions already count.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if request.method != 'GET' or '_flashes' in session:
+                return f(*args, **kwargs)
+
+            etag = data_etag(versions(**kwargs))
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            # Per-user data: browsers may keep it but must revalidate
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
@@ -1,6 +1,6 @@
 # app/utils/decorators.py
 from functools import wraps
-from flask import abort
+from flask import abort, g
 from flask_login import current_user
 
 def admin_required(f):
@@ -12,17 +12,27 @@ def admin_required(f):
     return decorated_function
 
 def faculty_required(f):
+    """Allow faculty only and expose their Faculty profile as g.faculty"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if not current_user.is_faculty():
             abort(403)  # Forbidden
+        # Profile is eager loaded with the user, so this is not a query
+        g.faculty = current_user.faculty
+        if g.faculty is None:
+            abort(404)
         return f(*args, **kwargs)
     return decorated_function
 
 def student_required(f):
+    """Allow student only and expose their Student profile as g.student"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if not current_user.is_student():
             abort(403)  # Forbidden
+        # Profile is eager loaded with the user, so this is not a query
+        g.student = current_user.student
+        if g.student is None:
+            abort(404)
         return f(*args, **kwargs)
     return decorated_function
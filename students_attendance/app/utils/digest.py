@@ -0,0 +1,107 @@
+from datetime import datetime
+from itertools import groupby
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.attendance import Attendance, AttendanceSession
+from app.models.course import Course
+from app.models.student import Student
+from app.models.user import User
+from app.models.notification import AttendanceDigest
+from app.utils.email import queue_email
+from app.utils.marking import insert_for_dialect
+
+DIGEST_SUBJECT = '[Student Attendance System] Your Attendance for {:%d %b %Y}'
+
+def attendance_events(day):
+    """Every attendance record of the day with what the digest shows, ordered by user.
+
+    Users that already have a digest for the day are left out, so a rerun
+    only picks up whoever was missed.
+    """
+    already_sent = db.session.query(AttendanceDigest.user_id).filter(
+        AttendanceDigest.digest_date == day
+    )
+
+    return db.session.query(
+        User.id.label('user_id'),
+        User.email,
+        User.first_name,
+        Course.course_code,
+        Course.title.label('course_title'),
+        AttendanceSession.start_time,
+        Attendance.status
+    ).join(
+        Student, Student.id == Attendance.student_id
+    ).join(
+        User, User.id == Student.user_id
+    ).join(
+        AttendanceSession, AttendanceSession.id == Attendance.session_id
+    ).join(
+        Course, Course.id == AttendanceSession.course_id
+    ).filter(
+        AttendanceSession.date == day,
+        User.is_active == True,
+        User.id.not_in(already_sent)
+    ).order_by(User.id, AttendanceSession.start_time)
+
+def claim_digest(user_id, day, event_count):
+    """Record the user's digest for day before queuing it; False if another run already has.
+
+    Uses INSERT ... ON CONFLICT DO NOTHING on the (user_id, digest_date)
+    constraint where the database supports it, and a savepoint that
+    swallows the duplicate otherwise. Does not commit.
+    """
+    values = {'user_id': user_id, 'digest_date': day, 'event_count': event_count, 'created_at': datetime.utcnow()}
+
+    dialect_insert = insert_for_dialect()
+    if dialect_insert is None:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(AttendanceDigest).values(values))
+        except IntegrityError:
+            return False
+        return True
+
+    stmt = dialect_insert(AttendanceDigest).values(values).on_conflict_do_nothing(
+        index_elements=['user_id', 'digest_date']
+    )
+    return db.session.execute(stmt).rowcount == 1
+
+def send_attendance_digests(day, batch_size=500):
+    """Queue one summary email per user for the attendance recorded on day.
+
+    Events come from a single query and the templates are compiled once for
+    the whole run. Digests are committed to the outbox every batch_size
+    users. Each user is claimed in the ledger before their email is queued,
+    so runs overlapping on the same day skip each other's users instead of
+    failing. Returns the number of digests queued.
+    """
+    text_template = current_app.jinja_env.get_template('email/attendance_digest.txt')
+    html_template = current_app.jinja_env.get_template('email/attendance_digest.html')
+    sender = current_app.config['MAIL_DEFAULT_SENDER']
+    subject = DIGEST_SUBJECT.format(day)
+
+    queued = 0
+    for user_id, rows in groupby(attendance_events(day).all(), key=lambda row: row.user_id):
+        events = list(rows)
+        if not claim_digest(user_id, day, len(events)):
+            continue
+        user = events[0]
+        context = {'user': user, 'digest_date': day, 'events': events}
+
+        queue_email(
+            subject,
+            sender=sender,
+            recipients=[user.email],
+            text_body=text_template.render(context),
+            html_body=html_template.render(context)
+        )
+
+        queued += 1
+        if queued % batch_size == 0:
+            db.session.commit()
+
+    db.session.commit()
+    return queued
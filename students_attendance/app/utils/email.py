@@ -1,20 +1,221 @@
 # app/utils/email.py
+import time
+import uuid
+import atexit
+import logging
+import smtplib
+import threading
+from datetime import datetime, timedelta
 from flask import render_template, current_app
 from flask_mail import Message
-from app import mail
-from threading import Thread
+from sqlalchemy import select, update, func, event
+from sqlalchemy.orm import Session
+from app import db, mail
+from app.models.outbox import OutboxEmail
+from app.utils.metrics import metrics
 
-def send_async_email(app, msg):
-    with app.app_context():
-        mail.send(msg)
+logger = logging.getLogger(__name__)
+
+def _retry_delay(app, attempts):
+    """Exponential backoff: base, 2 * base, 4 * base, ... capped"""
+    delay = app.config['MAIL_RETRY_BASE_DELAY'] * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, app.config['MAIL_RETRY_MAX_DELAY']))
+
+def claim_outbox_batch(app, worker_id, batch_size):
+    """Mark up to batch_size due messages as being sent by this worker.
+
+    A claim is a lease: if the process dies while sending, the message is
+    picked up again once MAIL_SEND_LEASE seconds have passed.
+    """
+    now = datetime.utcnow()
+    due = select(OutboxEmail.id).where(
+        OutboxEmail.status.in_(['pending', 'sending']),
+        OutboxEmail.next_attempt_at <= now
+    ).order_by(OutboxEmail.next_attempt_at).limit(batch_size)
+
+    db.session.execute(
+        update(OutboxEmail).where(
+            OutboxEmail.id.in_(due.scalar_subquery()),
+            OutboxEmail.status.in_(['pending', 'sending']),
+            OutboxEmail.next_attempt_at <= now
+        ).values(
+            status='sending',
+            claimed_by=worker_id,
+            next_attempt_at=now + timedelta(seconds=app.config['MAIL_SEND_LEASE'])
+        ).execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    return OutboxEmail.query.filter_by(status='sending', claimed_by=worker_id).all()
+
+def send_outbox_batch(app, batch):
+    """Send claimed messages over one SMTP connection and record the outcome"""
+    started = time.perf_counter()
+    results = {}
+
+    try:
+        with mail.connect() as conn:
+            for email in batch:
+                msg = Message(
+                    email.subject,
+                    sender=email.sender,
+                    recipients=email.recipients.split(',')
+                )
+                msg.body = email.text_body
+                msg.html = email.html_body
+                try:
+                    conn.send(msg)
+                    results[email.id] = None
+                except smtplib.SMTPServerDisconnected:
+                    # The connection is gone; every unsent message is affected
+                    raise
+                except smtplib.SMTPRecipientsRefused as e:
+                    results[email.id] = f'recipients refused {e.recipients!r}'
+                except smtplib.SMTPResponseException as e:
+                    # Rejected by the server; the connection is still usable
+                    results[email.id] = f'{e.smtp_code} {e.smtp_error!r}'
+                except smtplib.SMTPException as e:
+                    results[email.id] = repr(e)
+    except Exception as e:
+        logger.exception('SMTP connection failed after %d of %d emails', len(results), len(batch))
+        error = repr(e)
+        for email in batch:
+            results.setdefault(email.id, error)
+
+    now = datetime.utcnow()
+    for email in batch:
+        error = results[email.id]
+        email.attempts += 1
+        email.claimed_by = None
+        if error is None:
+            email.status = 'sent'
+            email.sent_at = now
+            email.last_error = None
+            metrics.inc('mail_messages_total', result='sent')
+        elif email.attempts >= app.config['MAIL_MAX_ATTEMPTS']:
+            email.status = 'failed'
+            email.last_error = error
+            metrics.inc('mail_messages_total', result='failed')
+        else:
+            email.status = 'pending'
+            email.next_attempt_at = now + _retry_delay(app, email.attempts)
+            email.last_error = error
+            metrics.inc('mail_messages_total', result='retry')
+    db.session.commit()
+
+    metrics.observe('mail_batch_duration_seconds', time.perf_counter() - started)
+
+def drain_outbox(app, worker_id=None, batch_size=None):
+    """Send every message that is due now; returns the number processed"""
+    worker_id = worker_id or uuid.uuid4().hex
+    batch_size = batch_size or app.config['MAIL_BATCH_SIZE']
+    processed = 0
+
+    while True:
+        batch = claim_outbox_batch(app, worker_id, batch_size)
+        if not batch:
+            return processed
+        send_outbox_batch(app, batch)
+        processed += len(batch)
+
+class MailWorkerPool:
+    """Fixed set of threads draining the email outbox.
+
+    Committing a queued email wakes the workers; they also poll every
+    MAIL_OUTBOX_POLL_INTERVAL seconds so retries and messages left behind
+    by other processes are sent. Each worker sends a batch over one SMTP
+    connection.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.threads = []
+        self.app = None
+
+    def start(self, app):
+        with self.lock:
+            if self.threads:
+                return
+            self.app = app
+            self.stopping.clear()
+            for i in range(app.config['MAIL_WORKERS']):
+                thread = threading.Thread(target=self._work, name=f'mail-worker-{i}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+            atexit.register(self.shutdown)
+
+    def notify(self):
+        self.wakeup.set()
+
+    def _work(self):
+        worker_id = uuid.uuid4().hex
+        poll_interval = self.app.config['MAIL_OUTBOX_POLL_INTERVAL']
+
+        while not self.stopping.is_set():
+            self.wakeup.wait(poll_interval)
+            self.wakeup.clear()
+            try:
+                with self.app.app_context():
+                    drain_outbox(self.app, worker_id)
+                    metrics.set_gauge('mail_queue_depth', pending_email_count())
+            except Exception:
+                logger.exception('Mail worker failed to drain the outbox')
+
+    def shutdown(self, timeout=30):
+        """Finish the batches in flight, then stop the workers"""
+        with self.lock:
+            threads, self.threads = self.threads, []
+        self.stopping.set()
+        self.wakeup.set()
+
+        deadline = time.time() + timeout
+        for thread in threads:
+            thread.join(max(0, deadline - time.time()))
+
+mail_pool = MailWorkerPool()
+
+def init_mail_workers(app):
+    """Start the outbox workers with the first request, not in CLI commands"""
+    if not app.config['MAIL_WORKERS']:
+        return
+
+    @app.before_request
+    def start_mail_workers():
+        mail_pool.start(app)
+
+@event.listens_for(Session, 'after_commit')
+def _notify_mail_workers(session):
+    if session.info.pop('outbox_queued', False):
+        mail_pool.notify()
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_notification(session):
+    session.info.pop('outbox_queued', None)
+
+def pending_email_count():
+    return db.session.query(func.count(OutboxEmail.id)).filter(
+        OutboxEmail.status.in_(['pending', 'sending'])
+    ).scalar()
+
+def queue_email(subject, sender, recipients, text_body, html_body):
+    """Add a message to the outbox in the current transaction"""
+    email = OutboxEmail(
+        subject=subject,
+        sender=sender,
+        recipients=','.join(recipients),
+        text_body=text_body,
+        html_body=html_body
+    )
+    db.session.add(email)
+    # Wake the mail workers once the caller commits
+    db.session.info['outbox_queued'] = True
+    return email
 
 def send_email(subject, sender, recipients, text_body, html_body):
-    msg = Message(subject, sender=sender, recipients=recipients)
-    msg.body = text_body
-    msg.html = html_body
-    
-    # Send email asynchronously
-    Thread(target=send_async_email, args=(current_app._get_current_object(), msg)).start()
+    """Queue an email in the caller's transaction; it is sent after the caller commits"""
+    queue_email(subject, sender, recipients, text_body, html_body)
 
 def send_password_reset_email(user):
     token = user.get_reset_password_token()
@@ -27,6 +228,11 @@ def send_password_reset_email(user):
     )
 
 def send_attendance_notification(user, course, session_date):
+    # In digest mode the attendance record itself is the event; send-attendance-digests
+    # sends one summary per user per day instead
+    if current_app.config['ATTENDANCE_NOTIFICATIONS'] != 'immediate':
+        return
+    
     send_email(
         '[Student Attendance System] Attendance Recorded',
         sender=current_app.config['MAIL_DEFAULT_SENDER'],
@@ -0,0 +1,106 @@
+from datetime import datetime
+from sqlalchemy import insert, select, exists, literal
+from app import db
+from app.models.student import Student
+from app.models.course import Enrollment
+from app.utils.cache import cache
+from app.utils.roster import invalidate_roster
+
+# Keep IN (...) lists below SQLite's host parameter limit
+CHUNK_SIZE = 500
+
+def enroll_students(course_id, department=None, semester=None, section=None, roll_numbers=None):
+    """Enroll every student matching the filters into a course.
+
+    Runs as a single INSERT ... SELECT per chunk and skips students that are
+    already enrolled, so it is safe to re-run. Returns the number of new
+    enrollments. Does not commit.
+    """
+    if roll_numbers is not None:
+        roll_numbers = list(dict.fromkeys(str(r) for r in roll_numbers))
+        total = 0
+        for i in range(0, len(roll_numbers), CHUNK_SIZE):
+            total += _insert_enrollments(
+                course_id, department, semester, section, roll_numbers[i:i + CHUNK_SIZE]
+            )
+        return total
+
+    return _insert_enrollments(course_id, department, semester, section, None)
+
+def _insert_enrollments(course_id, department, semester, section, roll_numbers):
+    already_enrolled = exists().where(
+        Enrollment.student_id == Student.id,
+        Enrollment.course_id == course_id
+    )
+
+    query = select(
+        Student.id,
+        literal(course_id),
+        literal(datetime.utcnow()),
+        literal(True)
+    ).where(~already_enrolled)
+
+    if department:
+        query = query.where(Student.department == department)
+    if semester:
+        query = query.where(Student.semester == semester)
+    if section:
+        query = query.where(Student.section == section)
+    if roll_numbers is not None:
+        query = query.where(Student.roll_number.in_(roll_numbers))
+
+    stmt = insert(Enrollment).from_select(
+        ['student_id', 'course_id', 'enrollment_date', 'is_active'],
+        query
+    )
+
+    result = db.session.execute(stmt)
+    invalidate_roster(course_id)
+    cache.invalidate('course', course_id)
+    return result.rowcount
+
+def import_enrollments_csv(df):
+    """Enroll students from a DataFrame with roll_number and course_code columns.
+
+    Rows are grouped per course and go through the same bulk path as
+    enroll_students. Unknown courses and roll numbers are reported in errors;
+    students already enrolled are not. Returns (enrolled_count, errors).
+    """
+    from app.models.course import Course
+
+    errors = []
+    enrolled = 0
+
+    for col in ('roll_number', 'course_code'):
+        if col not in df.columns:
+            return 0, [f'Missing required column: {col}']
+
+    df = df.dropna(subset=['roll_number', 'course_code'])
+    course_codes = df['course_code'].astype(str).str.strip().unique().tolist()
+    courses = {
+        c.course_code: c.id
+        for c in Course.query.filter(Course.course_code.in_(course_codes)).all()
+    }
+    known_rolls = _existing_roll_numbers(df['roll_number'].astype(str).str.strip().unique().tolist())
+
+    for course_code, group in df.groupby(df['course_code'].astype(str).str.strip()):
+        course_id = courses.get(course_code)
+        if course_id is None:
+            errors.append(f'Course {course_code} does not exist')
+            continue
+
+        roll_numbers = group['roll_number'].astype(str).str.strip().tolist()
+        unknown = [r for r in dict.fromkeys(roll_numbers) if r not in known_rolls]
+        if unknown:
+            errors.append(f'Unknown roll numbers for {course_code}: {", ".join(unknown)}')
+        enrolled += enroll_students(course_id, roll_numbers=roll_numbers)
+
+    return enrolled, errors
+
+def _existing_roll_numbers(roll_numbers):
+    found = set()
+    for i in range(0, len(roll_numbers), CHUNK_SIZE):
+        found.update(db.session.execute(
+            select(Student.roll_number).where(Student.roll_number.in_(roll_numbers[i:i + CHUNK_SIZE]))
+        ).scalars())
+    return found
@@ -0,0 +1,163 @@
+import os
+import json
+import shutil
+from datetime import date, datetime, timedelta
+import pandas as pd
+from sqlalchemy import select
+from app import db
+from app.models.user import User
+from app.models.student import Student
+from app.models.course import Course
+from app.models.attendance import Attendance, AttendanceSession
+
+STATE_FILE = '_export_state.json'
+PARTITION_COLUMNS = ['term', 'course_code']
+
+# Writes still in flight when an export starts may carry an updated_at just
+# before its watermark; the next run looks back this far to pick them up
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+def attendance_facts_query(course_ids=None, session_model=AttendanceSession, attendance_model=Attendance,
+                           start_date=None, end_date=None):
+    """Denormalized attendance facts joined to sessions, courses and students"""
+    query = select(
+        attendance_model.id.label('attendance_id'),
+        attendance_model.status,
+        attendance_model.timestamp,
+        attendance_model.marked_by,
+        session_model.id.label('session_id'),
+        session_model.date.label('session_date'),
+        session_model.start_time,
+        session_model.end_time,
+        session_model.location,
+        session_model.faculty_id,
+        Course.id.label('course_id'),
+        Course.course_code,
+        Course.title.label('course_title'),
+        Course.department.label('course_department'),
+        Course.year,
+        Course.semester,
+        Student.id.label('student_id'),
+        Student.roll_number,
+        Student.department.label('student_department'),
+        Student.semester.label('student_semester'),
+        Student.section,
+        Student.enrollment_year,
+        User.first_name,
+        User.last_name
+    ).select_from(
+        attendance_model
+    ).join(
+        session_model, attendance_model.session_id == session_model.id
+    ).join(
+        Course, session_model.course_id == Course.id
+    ).join(
+        Student, attendance_model.student_id == Student.id
+    ).join(
+        User, Student.user_id == User.id
+    ).order_by(attendance_model.id)
+
+    if course_ids is not None:
+        query = query.where(Course.id.in_(course_ids))
+    if start_date is not None:
+        query = query.where(session_model.date >= start_date)
+    if end_date is not None:
+        query = query.where(session_model.date <= end_date)
+
+    return query
+
+def read_export_state(output_dir):
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def write_export_state(output_dir, state):
+    path = os.path.join(output_dir, STATE_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def changed_course_ids(since, start_date=None, end_date=None):
+    """Courses with attendance written after since, or every course with attendance"""
+    query = select(AttendanceSession.course_id).distinct().join(
+        Attendance, Attendance.session_id == AttendanceSession.id
+    )
+    if since is not None:
+        query = query.where(Attendance.updated_at > since)
+    if start_date is not None:
+        query = query.where(AttendanceSession.date >= start_date)
+    if end_date is not None:
+        query = query.where(AttendanceSession.date <= end_date)
+    return db.session.execute(query).scalars().all()
+
+def remove_partitions(output_dir, course_ids):
+    """Delete the exported files of these courses"""
+    courses = db.session.execute(
+        select(Course.year, Course.semester, Course.course_code).where(Course.id.in_(course_ids))
+    ).all()
+    for year, semester, course_code in courses:
+        path = os.path.join(output_dir, f'term={year}-S{semester}', f'course_code={course_code}')
+        shutil.rmtree(path, ignore_errors=True)
+
+def export_attendance_facts(output_dir, chunk_size=50000, incremental=True, start_date=None, end_date=None):
+    """Write attendance facts as Parquet partitioned by term and course.
+
+    Rows are streamed from the database in chunks. With incremental=True the
+    partitions of every course with attendance written since the last export
+    are rewritten, so status changes to rows exported before are picked up;
+    other partitions are left alone. Rewritten partitions must cover the same
+    dates as before, so the date range cannot change between incremental
+    runs. The archive tables are read whenever the range reaches back into
+    the archived dates, including when there is no start_date, so rows moved
+    by archive-attendance stay in the partitions that are rewritten. Returns
+    the number of rows written.
+    """
+    from app.utils.archive import attendance_sources
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    state = read_export_state(output_dir) if incremental else {}
+    started_at = datetime.utcnow()
+
+    date_range = [start_date.isoformat() if start_date else None, end_date.isoformat() if end_date else None]
+    if state.get('date_range', date_range) != date_range:
+        raise ValueError(f'{output_dir} was exported for dates {state["date_range"]}, not {date_range}')
+
+    # An export from before the watermark existed rewrites every partition
+    since = state.get('last_updated_at')
+    since = datetime.fromisoformat(since) - WATERMARK_OVERLAP if since else None
+    course_ids = changed_course_ids(since, start_date, end_date) if incremental else None
+    if course_ids is not None:
+        if not course_ids:
+            return 0
+        remove_partitions(output_dir, course_ids)
+
+    queries = [
+        attendance_facts_query(course_ids, session_model, attendance_model, start_date, end_date)
+        for session_model, attendance_model in attendance_sources(start_date or date.min)
+    ]
+
+    rows_written = 0
+    with db.engine.connect() as conn:
+        for chunk in (c for query in queries for c in pd.read_sql(query, conn, chunksize=chunk_size)):
+            if chunk.empty:
+                continue
+
+            chunk['term'] = chunk['year'].astype(str) + '-S' + chunk['semester'].astype(str)
+            chunk.to_parquet(
+                output_dir,
+                engine='pyarrow',
+                partition_cols=PARTITION_COLUMNS,
+                index=False
+            )
+            rows_written += len(chunk)
+
+    # Only recorded once every partition is complete; a failed run is redone in full
+    state.pop('last_attendance_id', None)
+    state['last_updated_at'] = started_at.isoformat()
+    state['date_range'] = date_range
+    write_export_state(output_dir, state)
+    return rows_written
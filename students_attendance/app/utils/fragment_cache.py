@@ -0,0 +1,36 @@
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from app.utils.cache import cache
+
+class FragmentCacheExtension(Extension):
+    """{% cache key, ttl %} ... {% endcache %} stores rendered HTML in the app cache.
+
+    key is any value; build it with cache_key() to tie the fragment to data
+    versions, and include the user whenever the fragment is personal:
+
+        {% cache cache_key('recent', student.id, versions=[('student', student.id)]), 300 %}
+
+    ttl is optional and defaults to CACHE_DEFAULT_TTL. Keys are scoped to
+    the template, so two templates can use the same key.
+    """
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [nodes.Const(parser.name), parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, template_name, key, ttl, caller):
+        fragment_key = cache.key('fragment', template_name, key)
+        html = cache.get(fragment_key)
+        if html is None:
+            html = str(caller())
+            cache.set(fragment_key, html, ttl)
+        return Markup(html)
@@ -0,0 +1,78 @@
+import time
+import threading
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import joinedload, make_transient_to_detached
+from app import db
+from app.models.user import User
+from app.models.student import Student
+from app.models.faculty import Faculty
+
+# Per-worker identity cache: {user_id: (expires_at, detached User)}
+_cache = {}
+_lock = threading.Lock()
+
+def _column_values(obj):
+    return {c.key: getattr(obj, c.key) for c in obj.__mapper__.column_attrs}
+
+def _detached_copy(user):
+    """Clean, detached copy of a user and its role profile for caching"""
+    copy = User(**_column_values(user))
+    profiles = []
+    for name, model in (('student', Student), ('faculty', Faculty)):
+        profile = getattr(user, name)
+        profile_copy = model(**_column_values(profile)) if profile is not None else None
+        setattr(copy, name, profile_copy)
+        if profile_copy is not None:
+            profiles.append(profile_copy)
+
+    # Reset attribute history so merge(load=False) accepts them without a query
+    for obj in [copy] + profiles:
+        make_transient_to_detached(obj)
+    return copy
+
+def load_identity(user_id):
+    """Load a user together with its Student/Faculty profile.
+
+    Cache misses issue one joined query; hits are merged into the session
+    without touching the database. Entries expire after IDENTITY_CACHE_TTL
+    seconds and are dropped when this worker writes to the user or profile.
+    """
+    ttl = current_app.config.get('IDENTITY_CACHE_TTL', 0)
+    now = time.time()
+
+    if ttl:
+        with _lock:
+            cached = _cache.get(user_id)
+        if cached and cached[0] > now:
+            return db.session.merge(cached[1], load=False)
+
+    user = User.query.options(
+        joinedload(User.student),
+        joinedload(User.faculty)
+    ).filter(User.id == user_id).first()
+
+    if user is not None and ttl:
+        entry = (now + ttl, _detached_copy(user))
+        with _lock:
+            _cache[user_id] = entry
+
+    return user
+
+def invalidate_identity(user_id):
+    with _lock:
+        _cache.pop(user_id, None)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_user(mapper, connection, target):
+    invalidate_identity(target.id)
+
+@event.listens_for(Student, 'after_insert')
+@event.listens_for(Student, 'after_update')
+@event.listens_for(Student, 'after_delete')
+@event.listens_for(Faculty, 'after_insert')
+@event.listens_for(Faculty, 'after_update')
+@event.listens_for(Faculty, 'after_delete')
+def _invalidate_profile(mapper, connection, target):
+    invalidate_identity(target.user_id)
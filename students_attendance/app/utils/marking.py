@@ -0,0 +1,284 @@
+from datetime import datetime, timezone
+from sqlalchemy import insert as plain_insert
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models.attendance import Attendance, AttendanceSession
+from app.models.course import Enrollment
+from app.models.sync import AttendanceSyncMark
+from app.utils.cache import invalidate_attendance
+
+ATTENDANCE_STATUSES = ('present', 'absent', 'late')
+
+# Bound parameters per statement, below SQLite's limit (999 before 3.32)
+MAX_PARAMETERS = 900
+
+def parameter_chunks(rows):
+    """Split rows of dicts into multi-row INSERT chunks that fit MAX_PARAMETERS"""
+    if not rows:
+        return
+    size = max(1, MAX_PARAMETERS // len(rows[0]))
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+def existing_statuses(session_id):
+    """{student_id: status} for every attendance record of a session"""
+    return dict(db.session.query(Attendance.student_id, Attendance.status).filter(
+        Attendance.session_id == session_id
+    ))
+
+def changed_statuses(session_id, statuses):
+    """The subset of {student_id: status} that differs from what is stored"""
+    existing = existing_statuses(session_id)
+    return {
+        student_id: status
+        for student_id, status in statuses.items()
+        if existing.get(student_id) != status
+    }
+
+def insert_for_dialect():
+    """insert() with ON CONFLICT support for this database, or None"""
+    name = db.session.get_bind(mapper=Attendance.__mapper__).dialect.name
+    if name == 'postgresql':
+        return postgresql.insert
+    if name == 'sqlite':
+        return sqlite.insert
+    return None
+
+def upsert_attendance(session_id, statuses, marked_by):
+    """Insert or update attendance for {student_id: status} in bulk.
+
+    Uses INSERT ... ON CONFLICT on the (session_id, student_id) constraint,
+    one statement per chunk, where the database supports it and falls back
+    to loading and updating the records otherwise. Returns the number of
+    rows written. Does not commit.
+    """
+    if not statuses:
+        return 0
+
+    now = datetime.utcnow()
+    return _upsert_rows([
+        {
+            'session_id': session_id,
+            'student_id': student_id,
+            'status': status,
+            'marked_by': marked_by,
+            'timestamp': now
+        }
+        for student_id, status in statuses.items()
+    ])
+
+def _upsert_rows(rows):
+    if not rows:
+        return 0
+
+    # timestamp may come from a device; updated_at is when the server wrote it
+    now = datetime.utcnow()
+    rows = [dict(row, updated_at=now) for row in rows]
+
+    insert = insert_for_dialect()
+    if insert is None:
+        return _merge_rows(rows)
+
+    written = 0
+    for chunk in parameter_chunks(rows):
+        stmt = insert(Attendance).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['session_id', 'student_id'],
+            set_={
+                'status': stmt.excluded.status,
+                'marked_by': stmt.excluded.marked_by,
+                'timestamp': stmt.excluded.timestamp,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        written += db.session.execute(stmt).rowcount
+
+    invalidate_attendance({row['session_id'] for row in rows}, {row['student_id'] for row in rows})
+    return written
+
+def _merge_rows(rows):
+    """Portable upsert: one query per session for the existing records, then ORM writes"""
+    by_session = {}
+    for row in rows:
+        by_session.setdefault(row['session_id'], []).append(row)
+
+    for session_id, session_rows in by_session.items():
+        existing = {
+            record.student_id: record
+            for record in Attendance.query.filter(
+                Attendance.session_id == session_id,
+                Attendance.student_id.in_([row['student_id'] for row in session_rows])
+            )
+        }
+        for row in session_rows:
+            record = existing.get(row['student_id'])
+            if record is None:
+                db.session.add(Attendance(**row))
+            else:
+                record.status = row['status']
+                record.marked_by = row['marked_by']
+                record.timestamp = row['timestamp']
+    return len(rows)
+
+def _parse_client_timestamp(value):
+    """ISO 8601 timestamp from a device as naive UTC, or None if invalid"""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def sync_marks(marks, faculty_id, marked_by):
+    """Apply marks queued offline on a device, idempotently by client_id.
+
+    Each mark is a dict with client_id, session_id, student_id, status and
+    client_timestamp. Client ids this user submitted before return their
+    stored result without writing anything. New marks are validated against the faculty
+    member's sessions and course enrollment in bulk; for the same student
+    and session the latest client_timestamp wins, including over what is
+    already stored. Returns one result dict per mark, in order. Does not
+    commit.
+    """
+    client_ids = [m.get('client_id') for m in marks if isinstance(m.get('client_id'), str)]
+    seen = {
+        row.client_id: row
+        for row in AttendanceSyncMark.query.filter(
+            AttendanceSyncMark.submitted_by == marked_by,
+            AttendanceSyncMark.client_id.in_(client_ids)
+        )
+    } if client_ids else {}
+
+    results = [None] * len(marks)
+    pending = []  # (index, mark) for marks not seen before
+    batch_ids = set()
+    for index, mark in enumerate(marks):
+        client_id = mark.get('client_id')
+        if not isinstance(client_id, str) or not client_id or len(client_id) > 64:
+            results[index] = {'client_id': client_id, 'result': 'rejected', 'reason': 'invalid_client_id'}
+        elif client_id in seen:
+            previous = seen[client_id]
+            results[index] = {'client_id': client_id, 'result': previous.result, 'reason': previous.reason, 'duplicate': True}
+        elif client_id in batch_ids:
+            results[index] = {'client_id': client_id, 'result': 'rejected', 'reason': 'duplicate_in_batch'}
+        else:
+            batch_ids.add(client_id)
+            pending.append((index, mark))
+
+    # Validate the new marks
+    valid = []  # (index, mark, session_id, student_id, status, client_timestamp)
+    rejections = {}
+    for index, mark in pending:
+        try:
+            session_id = int(mark.get('session_id'))
+            student_id = int(mark.get('student_id'))
+        except (TypeError, ValueError):
+            rejections[index] = 'invalid_ids'
+            continue
+        status = mark.get('status')
+        if status not in ATTENDANCE_STATUSES:
+            rejections[index] = 'invalid_status'
+            continue
+        client_timestamp = _parse_client_timestamp(mark.get('client_timestamp'))
+        if client_timestamp is None:
+            rejections[index] = 'invalid_timestamp'
+            continue
+        valid.append((index, mark, session_id, student_id, status, client_timestamp))
+
+    session_ids = {v[2] for v in valid}
+    student_ids = {v[3] for v in valid}
+
+    # Sessions owned by this faculty member, and enrollments, in one query each
+    session_courses = dict(db.session.query(AttendanceSession.id, AttendanceSession.course_id).filter(
+        AttendanceSession.id.in_(session_ids),
+        AttendanceSession.faculty_id == faculty_id
+    )) if session_ids else {}
+    enrolled = set(db.session.query(Enrollment.course_id, Enrollment.student_id).filter(
+        Enrollment.course_id.in_(set(session_courses.values())),
+        Enrollment.student_id.in_(student_ids),
+        Enrollment.is_active == True
+    )) if session_courses else set()
+    stored = {
+        (row.session_id, row.student_id): row
+        for row in db.session.query(
+            Attendance.session_id, Attendance.student_id, Attendance.status, Attendance.timestamp
+        ).filter(
+            Attendance.session_id.in_(list(session_courses)),
+            Attendance.student_id.in_(student_ids)
+        )
+    } if session_courses else {}
+
+    # Latest mark per (session, student) wins
+    latest = {}
+    for entry in valid:
+        index, _, session_id, student_id, _, client_timestamp = entry
+        if session_id not in session_courses:
+            rejections[index] = 'unknown_session'
+        elif (session_courses[session_id], student_id) not in enrolled:
+            rejections[index] = 'not_enrolled'
+        else:
+            key = (session_id, student_id)
+            if key not in latest or client_timestamp >= latest[key][5]:
+                latest[key] = entry
+
+    rows = []
+    outcomes = {}
+    for entry in valid:
+        index, _, session_id, student_id, status, client_timestamp = entry
+        if index in rejections:
+            continue
+        current = stored.get((session_id, student_id))
+        if latest[(session_id, student_id)] is not entry:
+            outcomes[index] = 'stale'
+        elif current is not None and current.timestamp is not None and current.timestamp > client_timestamp:
+            outcomes[index] = 'stale'
+        elif current is not None and current.status == status:
+            outcomes[index] = 'unchanged'
+        else:
+            outcomes[index] = 'applied'
+            rows.append({
+                'session_id': session_id,
+                'student_id': student_id,
+                'status': status,
+                'marked_by': marked_by,
+                'timestamp': client_timestamp
+            })
+
+    _upsert_rows(rows)
+
+    # Remember every new client id so resubmits are no-ops
+    parsed = {entry[0]: entry for entry in valid}
+    records = []
+    for index, mark in pending:
+        result = outcomes.get(index, 'rejected')
+        reason = rejections.get(index)
+        entry = parsed.get(index)
+        records.append({
+            'client_id': mark['client_id'],
+            'session_id': entry[2] if entry else None,
+            'student_id': entry[3] if entry else None,
+            'status': entry[4] if entry else None,
+            'client_timestamp': entry[5] if entry else None,
+            'result': result,
+            'reason': reason,
+            'submitted_by': marked_by,
+            'created_at': datetime.utcnow()
+        })
+        results[index] = {'client_id': mark['client_id'], 'result': result, 'reason': reason}
+
+    if records:
+        insert = insert_for_dialect()
+        for chunk in parameter_chunks(records):
+            if insert is None:
+                db.session.execute(plain_insert(AttendanceSyncMark).values(chunk))
+            else:
+                db.session.execute(
+                    insert(AttendanceSyncMark).values(chunk).on_conflict_do_nothing(
+                        index_elements=['submitted_by', 'client_id']
+                    )
+                )
+
+    return results
@@ -0,0 +1,306 @@
+import os
+import json
+import time
+import glob
+import atexit
+import threading
+from bisect import bisect_left
+from flask import g, request
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+# Request latency buckets in seconds; +Inf is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    'http_request_duration_seconds': ('histogram', 'Request latency by endpoint'),
+    'http_request_db_seconds_total': ('counter', 'Time spent in database queries by endpoint'),
+    'http_requests_total': ('counter', 'Requests by endpoint and status'),
+    'http_requests_in_flight': ('gauge', 'Requests currently being handled'),
+    'attendance_checkins_total': ('counter', 'Student check-ins by result'),
+    'mail_queue_depth': ('gauge', 'Emails waiting in the outbox'),
+    'mail_messages_total': ('counter', 'Outbox send attempts by result'),
+    'mail_batch_duration_seconds': ('histogram', 'Time to send one batch over a single SMTP connection'),
+}
+
+class Metrics:
+    """Process-local metrics, optionally shared with other workers on disk.
+
+    Each worker writes its own snapshot to METRICS_DIR and the metrics
+    endpoint sums every snapshot, so all gunicorn workers are reported.
+    When a worker exits, its counters and histograms are folded into
+    metrics_retired.json and its snapshot is removed, so totals never go
+    backwards and the directory holds one file per live worker.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.gauges = {}
+        self.gauge_callbacks = {}
+        self.directory = None
+        self.flush_interval = 5
+        self.last_flush = 0.0
+        self.pid = None
+
+    def configure(self, directory, flush_interval):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            atexit.register(self.retire)
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def inc(self, name, amount=1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name, value, **labels):
+        with self.lock:
+            self.gauges[self._key(name, labels)] = value
+
+    def add_gauge(self, name, amount, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.gauges[key] = self.gauges.get(key, 0) + amount
+
+    def register_gauge(self, name, callback):
+        """Read a gauge from callback() whenever metrics are collected"""
+        self.gauge_callbacks[name] = callback
+
+    def observe(self, name, value, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+            histogram[0][bisect_left(LATENCY_BUCKETS, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        for name, callback in self.gauge_callbacks.items():
+            try:
+                self.set_gauge(name, callback())
+            except Exception:
+                pass
+
+        with self.lock:
+            return {
+                'time': time.time(),
+                'counters': [[n, list(l), v] for (n, l), v in self.counters.items()],
+                'gauges': [[n, list(l), v] for (n, l), v in self.gauges.items()],
+                'histograms': [[n, list(l), list(h[0]), h[1], h[2]] for (n, l), h in self.histograms.items()],
+            }
+
+    def flush(self, force=False):
+        """Write this worker's snapshot to the shared directory"""
+        now = time.time()
+        if not self.directory or (not force and now - self.last_flush < self.flush_interval):
+            return
+        self.last_flush = now
+
+        path = self._path(os.getpid())
+        if self.pid != os.getpid():
+            # A file under this pid was left by an earlier process that reused it
+            self.pid = os.getpid()
+            with self._directory_lock():
+                self._retire_file(path)
+
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f'metrics_{pid}.json')
+
+    def _directory_lock(self):
+        return _FileLock(os.path.join(self.directory, 'metrics.lock'))
+
+    def _retire_file(self, path):
+        """Fold a snapshot's counters and histograms into the retired totals and remove it"""
+        snapshot = _read_snapshot(path)
+        if snapshot is None:
+            return
+
+        retired_path = os.path.join(self.directory, 'metrics_retired.json')
+        retired = _read_snapshot(retired_path) or {'time': 0, 'counters': [], 'gauges': [], 'histograms': []}
+        counters, histograms = {}, {}
+        _merge_snapshot(retired, counters, histograms)
+        _merge_snapshot(snapshot, counters, histograms)
+        retired['counters'] = [[n, list(l), v] for (n, l), v in counters.items()]
+        retired['histograms'] = [[n, list(l), h[0], h[1], h[2]] for (n, l), h in histograms.items()]
+
+        tmp_path = f'{retired_path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(retired, f)
+        os.replace(tmp_path, retired_path)
+        os.remove(path)
+
+    def retire(self):
+        """Hand this worker's totals over to metrics_retired.json, at exit"""
+        if not self.directory or self.pid != os.getpid():
+            return
+        self.flush(force=True)
+        with self._directory_lock():
+            self._retire_file(self._path(os.getpid()))
+
+    def collect(self):
+        """Snapshots from every worker (or just this one without a directory)"""
+        if not self.directory:
+            return [self.snapshot()]
+
+        self.flush(force=True)
+        with self._directory_lock():
+            # Workers killed before their exit hook ran leave a snapshot behind
+            for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+                pid = os.path.basename(path)[len('metrics_'):-len('.json')]
+                if pid.isdigit() and not _pid_alive(int(pid)):
+                    self._retire_file(path)
+
+            snapshots = []
+            for path in glob.glob(os.path.join(self.directory, 'metrics_*.json')):
+                snapshot = _read_snapshot(path)
+                if snapshot is not None:
+                    snapshots.append(snapshot)
+        return snapshots
+
+    def render(self):
+        """Aggregate all snapshots as Prometheus text exposition format"""
+        counters, gauges, histograms = {}, {}, {}
+        # Gauges from workers that stopped flushing are no longer current
+        gauge_cutoff = time.time() - 3 * self.flush_interval
+
+        for snap in self.collect():
+            _merge_snapshot(snap, counters, histograms)
+            if not self.directory or snap['time'] >= gauge_cutoff:
+                for name, labels, value in snap['gauges']:
+                    key = (name, tuple(map(tuple, labels)))
+                    gauges[key] = gauges.get(key, 0) + value
+
+        lines = []
+        described = set()
+
+        def describe(name):
+            if name not in described:
+                described.add(name)
+                kind, text = HELP.get(name, ('untyped', name))
+                lines.append(f'# HELP {name} {text}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        for (name, labels), value in sorted(counters.items()):
+            describe(name)
+            lines.append(f'{name}{_labels(labels)} {value}')
+        for (name, labels), value in sorted(gauges.items()):
+            describe(name)
+            lines.append(f'{name}{_labels(labels)} {value}')
+        for (name, labels), (buckets, total, count) in sorted(histograms.items()):
+            describe(name)
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS + (float('inf'),), buckets):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{_labels(labels + (("le", le),))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {total}')
+            lines.append(f'{name}_count{_labels(labels)} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+class _FileLock:
+    """Exclusive lock between the workers sharing METRICS_DIR"""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, 'a')
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        # Closing the file releases the lock
+        self.file.close()
+
+def _pid_alive(pid):
+    if os.name != 'posix':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _merge_snapshot(snap, counters, histograms):
+    """Add a snapshot's counters and histograms into the running totals"""
+    for name, labels, value in snap['counters']:
+        key = (name, tuple(map(tuple, labels)))
+        counters[key] = counters.get(key, 0) + value
+    for name, labels, buckets, total, count in snap['histograms']:
+        key = (name, tuple(map(tuple, labels)))
+        merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+        merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+        merged[1] += total
+        merged[2] += count
+
+def _labels(labels):
+    if not labels:
+        return ''
+    escaped = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels)
+    return '{' + escaped + '}'
+
+metrics = Metrics()
+
+def init_metrics(app):
+    """Record per-endpoint latency, DB time and in-flight requests"""
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    metrics.configure(app.config['METRICS_DIR'], app.config['METRICS_FLUSH_INTERVAL'])
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        metrics.add_gauge('http_requests_in_flight', 1)
+
+    @app.after_request
+    def record_response_status(response):
+        g.response_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def record_request_metrics(exc):
+        started = g.pop('request_started', None)
+        if started is None:
+            return
+        metrics.add_gauge('http_requests_in_flight', -1)
+
+        endpoint = request.endpoint or 'unknown'
+        status = 500 if exc is not None else g.get('response_status', 500)
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - started, endpoint=endpoint)
+        metrics.inc('http_requests_total', endpoint=endpoint, status=status)
+
+        stats = g.get('query_stats')
+        if stats is not None:
+            metrics.inc('http_request_db_seconds_total', stats.duration, endpoint=endpoint)
+
+        metrics.flush()
@@ -0,0 +1,140 @@
+import json
+import base64
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+from app.utils.cache import cache
+
+def encode_cursor(values):
+    """Encode key values as an opaque, URL-safe cursor"""
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor back into typed key values, or None if it is invalid or tampered with"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            return None
+
+        typed = []
+        for (column, _), value in zip(columns, values):
+            python_type = column.type.python_type
+            if python_type in (date, datetime):
+                value = python_type.fromisoformat(value)
+            elif not isinstance(value, python_type) or isinstance(value, bool) != (python_type is bool):
+                return None
+            typed.append(value)
+        return typed
+    except (ValueError, TypeError, NotImplementedError):
+        return None
+
+def _seek_condition(columns, values, forward):
+    """WHERE clause selecting rows strictly after (or before) the key values"""
+    clauses = []
+    for i, ((column, descending), value) in enumerate(zip(columns, values)):
+        after = column < value if descending == forward else column > value
+        equal_prefix = [col == val for (col, _), val in zip(columns[:i], values[:i])]
+        clauses.append(and_(*equal_prefix, after))
+    return or_(*clauses)
+
+def approximate_count(query, key, versions=(), ttl=300):
+    """COUNT(*) for a query, cached until one of versions changes or for ttl seconds"""
+    return cache.get_or_set(
+        cache.key('count', key, versions=versions),
+        lambda: query.order_by(None).count(),
+        ttl
+    )
+
+class KeysetPage:
+    """One page of a keyset (seek) paginated query.
+
+    Exposes items, has_next/has_prev and opaque next_cursor/prev_cursor
+    values; total is an approximate, cached count when requested.
+    """
+
+    def __init__(self, items, columns, has_next, has_prev, per_page, total=None):
+        self.items = items
+        self.columns = columns
+        self.has_next = has_next
+        self.has_prev = has_prev
+        self.per_page = per_page
+        self.total = total
+
+    def _key(self, item):
+        return [getattr(item, column.key) for column, _ in self.columns]
+
+    @property
+    def next_cursor(self):
+        if not self.has_next or not self.items:
+            return None
+        return encode_cursor(self._key(self.items[-1]))
+
+    @property
+    def prev_cursor(self):
+        if not self.has_prev or not self.items:
+            return None
+        return encode_cursor(self._key(self.items[0]))
+
+    def __iter__(self):
+        return iter(self.items)
+
+def keyset_paginate(query, columns, after=None, before=None, per_page=15, total_key=None, total_versions=()):
+    """Paginate a query by seeking past a cursor instead of using OFFSET.
+
+    columns is a list of (column, descending) pairs that must uniquely order
+    the rows, e.g. [(AttendanceSession.date, True), (AttendanceSession.id, True)].
+    Pass the cursor of the next link as after, or of the previous link as before.
+    An invalid cursor shows the first page. The total is cached under
+    total_key until one of the total_versions (entity, id) pairs is bumped.
+    """
+    base_query = query
+    forward = before is None or after is not None
+    cursor = after if forward else before
+    values = decode_cursor(cursor, columns) if cursor else None
+    if values is None:
+        forward = True
+
+    if values is not None:
+        query = query.filter(_seek_condition(columns, values, forward))
+
+    order_by = []
+    for column, descending in columns:
+        # Walk backwards by flipping the order, then restore it below
+        order_by.append(column.desc() if descending == forward else column.asc())
+
+    rows = query.order_by(None).order_by(*order_by).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    if forward:
+        has_next, has_prev = has_more, values is not None
+    else:
+        rows.reverse()
+        has_next, has_prev = values is not None, has_more
+
+    total = approximate_count(base_query, total_key, total_versions) if total_key else None
+
+    return KeysetPage(rows, columns, has_next, has_prev, per_page, total)
+
+def paginate_request(query, columns, per_page=15, total_key=None, total_versions=()):
+    """Paginate a listing from the request args.
+
+    An explicit ?page=N keeps the old OFFSET pagination; otherwise the
+    listing is keyset paginated with ?after=/?before= cursors.
+    """
+    from flask import request
+
+    page = request.args.get('page', type=int)
+    if page:
+        return query.order_by(*[c.desc() if d else c.asc() for c, d in columns]).paginate(page=page, per_page=per_page)
+
+    return keyset_paginate(
+        query,
+        columns,
+        after=request.args.get('after'),
+        before=request.args.get('before'),
+        per_page=per_page,
+        total_key=total_key,
+        total_versions=total_versions
+    )
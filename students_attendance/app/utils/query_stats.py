@@ -0,0 +1,113 @@
+import time
+import logging
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar('query_stats', default=None)
+
+class QueryStats:
+    """Queries issued while tracking is active: count, DB time, repeats"""
+
+    def __init__(self, parent=None):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+        # Enclosing tracker, e.g. a test wrapping a request
+        self.parent = parent
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+        if self.parent is not None:
+            self.parent.record(statement, duration)
+
+    def repeated(self, threshold):
+        """Statement templates executed more than threshold times"""
+        return {s: n for s, n in self.statements.items() if n > threshold}
+
+@contextmanager
+def track_queries():
+    """Count queries inside the block, e.g. to assert a query budget:
+
+        with track_queries() as stats:
+            client.get('/student/dashboard')
+        assert stats.count <= 5
+
+    Works whether or not SQL_QUERY_STATS is on.
+    """
+    _listen()
+    stats = QueryStats(parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+def current_query_stats():
+    return _current.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None:
+        return
+    starts = conn.info.get('query_start')
+    if not starts:
+        return
+    # Bound parameters are not part of the statement, so repeats share a key
+    stats.record(statement, time.perf_counter() - starts.pop())
+
+def _listen():
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+def init_query_stats(app):
+    """Track queries per request and flag N+1 patterns"""
+    if not app.config['SQL_QUERY_STATS']:
+        return
+
+    _listen()
+
+    @app.before_request
+    def start_query_stats():
+        stats = QueryStats(parent=_current.get())
+        g.query_stats = stats
+        g.query_stats_token = _current.set(stats)
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.get('query_stats')
+        if stats is None:
+            return response
+
+        threshold = app.config['SQL_N_PLUS_ONE_THRESHOLD']
+        repeated = stats.repeated(threshold)
+        for statement, times in repeated.items():
+            logger.warning(
+                'Possible N+1 in %s: statement executed %d times: %s',
+                request.endpoint, times, ' '.join(statement.split())[:300]
+            )
+
+        if app.debug:
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers['X-Query-Time-Ms'] = f'{stats.duration * 1000:.1f}'
+            if repeated:
+                response.headers['X-N-Plus-One'] = str(len(repeated))
+        return response
+
+    @app.teardown_request
+    def stop_query_stats(exc):
+        token = g.pop('query_stats_token', None)
+        if token is not None:
+            _current.reset(token)
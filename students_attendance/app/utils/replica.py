@@ -0,0 +1,116 @@
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+
+REPLICA_BIND = 'replica'
+SYNC_TABLE = 'replica_sync'
+
+# Per-process cache of the last staleness check: {engine url: (checked_at, synced_at)}
+_freshness = {}
+_freshness_lock = threading.Lock()
+
+class RoutingSession(Session):
+    """Session that sends SELECTs inside read_replica() to the replica bind.
+
+    Flushes and INSERT/UPDATE/DELETE statements always go to the primary,
+    and so does everything when no replica is configured or the replica is
+    older than REPLICA_MAX_STALENESS.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        is_select = getattr(clause, 'is_select', False)
+        if bind is None and is_select and not self._flushing and replica_requested():
+            engine = get_replica_engine()
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def replica_requested():
+    return has_app_context() and g.get('use_replica', False)
+
+@contextmanager
+def read_replica():
+    """Route read-only queries to the replica; usable as a decorator too"""
+    if not has_app_context():
+        yield
+        return
+
+    previous = g.get('use_replica', False)
+    g.use_replica = True
+    try:
+        yield
+    finally:
+        g.use_replica = previous
+
+def get_replica_engine():
+    """The replica engine if configured and fresh enough, else None"""
+    engines = current_app.extensions['sqlalchemy'].engines
+    engine = engines.get(REPLICA_BIND)
+    if engine is None or not replica_is_fresh(engine):
+        return None
+    return engine
+
+def replica_position():
+    """Sync time of the replica that reads are routed to right now, or None on the primary.
+
+    Anything cached from replica reads must carry this in its key: the data
+    versions are bumped by writes to the primary, so on their own they would
+    label rows the replica has not caught up with yet as current.
+    """
+    if not replica_requested():
+        return None
+    engine = get_replica_engine()
+    if engine is None:
+        return None
+    return replica_synced_at(engine)
+
+def replica_is_fresh(engine):
+    max_staleness = current_app.config['REPLICA_MAX_STALENESS']
+    if not max_staleness:
+        return True
+    synced_at = replica_synced_at(engine)
+    return synced_at is not None and time.time() - synced_at <= max_staleness
+
+def replica_synced_at(engine):
+    """When the replica was last synced, checked at most every REPLICA_CHECK_INTERVAL"""
+    key = str(engine.url)
+    now = time.time()
+    with _freshness_lock:
+        cached = _freshness.get(key)
+    if cached and now - cached[0] < current_app.config['REPLICA_CHECK_INTERVAL']:
+        return cached[1]
+
+    try:
+        with engine.connect() as conn:
+            synced_at = conn.exec_driver_sql(f'SELECT MAX(synced_at) FROM {SYNC_TABLE}').scalar()
+    except Exception:
+        synced_at = None
+
+    with _freshness_lock:
+        _freshness[key] = (now, synced_at)
+    return synced_at
+
+def sync_sqlite_replica(primary_engine, replica_engine):
+    """Copy a SQLite primary into the replica file and stamp the sync time"""
+    if primary_engine.dialect.name != 'sqlite' or replica_engine.dialect.name != 'sqlite':
+        raise ValueError('Replica sync only supports SQLite primary and replica files')
+
+    source = sqlite3.connect(primary_engine.url.database)
+    target = sqlite3.connect(replica_engine.url.database)
+    try:
+        synced_at = time.time()
+        source.backup(target)
+        target.execute(f'CREATE TABLE IF NOT EXISTS {SYNC_TABLE} (synced_at REAL NOT NULL)')
+        target.execute(f'DELETE FROM {SYNC_TABLE}')
+        target.execute(f'INSERT INTO {SYNC_TABLE} (synced_at) VALUES (?)', (synced_at,))
+        target.commit()
+    finally:
+        source.close()
+        target.close()
+
+    with _freshness_lock:
+        _freshness.pop(str(replica_engine.url), None)
+    return synced_at
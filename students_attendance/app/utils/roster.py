@@ -0,0 +1,113 @@
+import time
+import threading
+from collections import namedtuple
+from flask import current_app
+from sqlalchemy import event, select, exists
+from app import db
+from app.models.course import Enrollment
+from app.models.student import Student
+from app.models.user import User
+from app.utils.cache import cache
+
+RosterEntry = namedtuple('RosterEntry', ['id', 'roll_number', 'first_name', 'last_name'])
+ROSTER_FIELDS = RosterEntry._fields
+
+# Per-worker copy of the last roster read from the cache, so check-in
+# membership tests stay in memory: {course_id: (key, expires_at, entries, student_ids)}
+_rosters = {}
+_lock = threading.Lock()
+
+def _roster_key(course_id):
+    # 'roster' is bumped by enrollment changes, 'people' by renames
+    return cache.key('roster', course_id, versions=[('roster', course_id), ('people', 0)])
+
+def load_roster(course_id):
+    """Query the active roster of a course, ordered by roll number, and cache it"""
+    key = _roster_key(course_id)
+    entries = [
+        RosterEntry(*row) for row in db.session.query(
+            Student.id, Student.roll_number, User.first_name, User.last_name
+        ).join(
+            Enrollment, Student.id == Enrollment.student_id
+        ).join(
+            User, Student.user_id == User.id
+        ).filter(
+            Enrollment.course_id == course_id,
+            Enrollment.is_active == True
+        ).order_by(Student.roll_number)
+    ]
+    ttl = current_app.config['ROSTER_CACHE_TTL']
+    cache.set(key, [tuple(entry) for entry in entries], ttl)
+    return _remember(course_id, key, entries, ttl)
+
+def _remember(course_id, key, entries, ttl):
+    student_ids = frozenset(entry.id for entry in entries)
+    with _lock:
+        _rosters[course_id] = (key, time.time() + ttl, entries, student_ids)
+    return entries, student_ids
+
+def _cached_roster(course_id):
+    key = _roster_key(course_id)
+    with _lock:
+        cached = _rosters.get(course_id)
+    if cached and cached[0] == key and cached[1] > time.time():
+        return cached[2], cached[3]
+
+    rows = cache.get(key)
+    if rows is None:
+        return load_roster(course_id)
+    return _remember(course_id, key, [RosterEntry(*row) for row in rows], current_app.config['ROSTER_CACHE_TTL'])
+
+def roster_entries(course_id):
+    """(id, roll_number, first_name, last_name) tuples for the enrolled students"""
+    return _cached_roster(course_id)[0]
+
+def course_roster(course_id):
+    """Enrolled student ids for a course, from memory while the snapshot is fresh"""
+    return _cached_roster(course_id)[1]
+
+def is_enrolled(course_id, student_id):
+    """Membership check for check-in without a query in the common case.
+
+    A miss is confirmed with a single-row EXISTS before rejecting, so a
+    student enrolled by another worker since the snapshot is not turned
+    away. The roster is only reloaded when that finds the snapshot stale;
+    students who are not enrolled cost one indexed lookup.
+    """
+    if student_id in course_roster(course_id):
+        return True
+
+    enrolled = db.session.execute(select(exists().where(
+        Enrollment.course_id == course_id,
+        Enrollment.student_id == student_id,
+        Enrollment.is_active == True
+    ))).scalar()
+    if enrolled:
+        load_roster(course_id)
+    return enrolled
+
+def invalidate_roster(course_id=None):
+    """Invalidate one course's roster, or every roster, when the transaction commits"""
+    if course_id is None:
+        cache.invalidate('people', 0)
+    else:
+        cache.invalidate('roster', course_id)
+
+@event.listens_for(Enrollment, 'after_insert')
+@event.listens_for(Enrollment, 'after_update')
+@event.listens_for(Enrollment, 'after_delete')
+def _invalidate_enrollment(mapper, connection, target):
+    invalidate_roster(target.course_id)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(Student, 'after_update')
+def _invalidate_people(mapper, connection, target):
+    # Names and roll numbers appear in every roster the student is on
+    state = db.inspect(target)
+    if any(state.attrs[key].history.has_changes() for key in ROSTER_FIELDS if key in state.attrs):
+        invalidate_roster()
+
+@event.listens_for(User, 'after_delete')
+@event.listens_for(Student, 'after_delete')
+def _invalidate_deleted_people(mapper, connection, target):
+    invalidate_roster()
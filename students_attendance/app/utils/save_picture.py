@@ -1,30 +1,154 @@
-# app/utils/save_picture.py
+import io
 import os
-import secrets
-from PIL import Image
-from flask import current_app
+import glob
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+from flask import current_app, url_for
+
+PROFILE_PICS_DIR = 'static/images/profile_pics'
+
+# Square sizes generated for every upload, in pixels
+PICTURE_SIZES = (64, 150, 300)
+PICTURE_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+
+# Shown while the variants of an upload are being written
+PLACEHOLDER_COLOR = (204, 204, 204)
+_placeholders = {}
+
+_executor = None
+_pending = None
+_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+class ProfilePictureError(Exception):
+    """Upload rejected; the message is shown to the user"""
+
+def _get_executor():
+    """Lazily create the shared worker pool and its pending-task limit"""
+    global _executor, _pending
+    with _lock:
+        if _executor is None:
+            workers = current_app.config.get('PROFILE_PICTURE_WORKERS', 2)
+            max_pending = current_app.config.get('PROFILE_PICTURE_MAX_PENDING', 16)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='profile-pics')
+            _pending = threading.BoundedSemaphore(max_pending)
+    return _executor, _pending
+
+def get_pictures_path():
+    return os.path.join(current_app.root_path, PROFILE_PICS_DIR)
+
+def get_pending_path():
+    return current_app.config['PROFILE_PICTURE_PENDING_PATH']
+
+def variant_filename(name, size, fmt):
+    return f'{name}_{size}.{fmt}'
+
+def original_filename(name, pil_format):
+    ext = 'jpg' if pil_format == 'JPEG' else pil_format.lower()
+    return f'{name}_original.{ext}'
+
+def find_original(pending_path, name):
+    """Path of the stored upload for name while its variants are pending, or None"""
+    matches = glob.glob(os.path.join(pending_path, glob.escape(name) + '_original.*'))
+    return matches[0] if matches else None
+
+def placeholder_picture(size, fmt):
+    """Plain square image in a variant's size and format, as (bytes, mimetype)"""
+    pil_format = PICTURE_FORMATS[fmt]
+    if (size, fmt) not in _placeholders:
+        buffer = io.BytesIO()
+        Image.new('RGB', (size, size), PLACEHOLDER_COLOR).save(buffer, format=pil_format)
+        _placeholders[size, fmt] = buffer.getvalue()
+    return _placeholders[size, fmt], Image.MIME[pil_format]
+
+def process_profile_picture(data, name, pictures_path):
+    """Decode an upload once and write every size/format variant.
+
+    Only the pixels are saved, so EXIF data such as GPS positions never
+    reaches a served file.
+    """
+    with Image.open(data) as img:
+        # Let the JPEG decoder downscale large camera images while decoding
+        largest = max(PICTURE_SIZES)
+        img.draft('RGB', (largest * 2, largest * 2))
+        img = ImageOps.exif_transpose(img).convert('RGB')
+
+        for size in sorted(PICTURE_SIZES, reverse=True):
+            img = ImageOps.fit(img, (size, size), Image.LANCZOS) if img.size != (size, size) else img
+            for fmt, pil_format in PICTURE_FORMATS.items():
+                path = os.path.join(pictures_path, variant_filename(name, size, fmt))
+                if os.path.exists(path):
+                    continue
+                tmp_path = path + '.tmp'
+                img.save(tmp_path, format=pil_format, quality=85)
+                os.replace(tmp_path, path)
+
+def _process_and_release(pending, data, name, pictures_path, original_path):
+    try:
+        process_profile_picture(data, name, pictures_path)
+    except Exception:
+        logger.exception('Failed to process profile picture %s', name)
+    finally:
+        # Never keep the upload: it is full size and still carries its EXIF data
+        try:
+            os.remove(original_path)
+        except OSError:
+            pass
+        pending.release()
 
 def save_profile_picture(form_picture):
-    """Save profile picture with a random name and resize it"""
-    # Generate a random name for the picture
-    random_hex = secrets.token_hex(8)
-    _, file_extension = os.path.splitext(form_picture.filename)
-    picture_filename = random_hex + file_extension
-    
-    # Define the path where the picture will be saved
-    pictures_path = os.path.join(current_app.root_path, 'static/images/profile_pics')
-    
-    # Create directory if it doesn't exist
+    """Queue a profile picture for resizing and return its content-hashed name.
+
+    The request only checks that the upload is an image, without decoding
+    it, and stores it outside static/ until a bounded worker pool has
+    written the variants; a placeholder is served meanwhile, and the upload
+    is deleted once processing ends, whether or not it succeeded. Raises
+    ProfilePictureError for files that are not images and when the pool is
+    saturated, rather than decoding in the request.
+    """
+    data = form_picture.read()
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            pil_format = img.format
+            img.verify()
+    except Exception:
+        raise ProfilePictureError('The uploaded file is not a valid image.')
+    if pil_format not in ('JPEG', 'PNG', 'GIF', 'WEBP'):
+        raise ProfilePictureError('Profile pictures must be JPEG, PNG, GIF or WebP images.')
+
+    executor, pending = _get_executor()
+    if not pending.acquire(blocking=False):
+        raise ProfilePictureError('Too many pictures are being processed right now. Please try again shortly.')
+
+    name = hashlib.sha256(data).hexdigest()[:20]
+    pictures_path = get_pictures_path()
+    pending_path = get_pending_path()
     os.makedirs(pictures_path, exist_ok=True)
-    
-    picture_path = os.path.join(pictures_path, picture_filename)
-    
-    # Resize the image to save space and maintain quality
-    output_size = (150, 150)
-    img = Image.open(form_picture)
-    img.thumbnail(output_size)
-    
-    # Save the picture
-    img.save(picture_path)
-    
-    return picture_filename
+    os.makedirs(pending_path, exist_ok=True)
+
+    try:
+        original_path = os.path.join(pending_path, original_filename(name, pil_format))
+        with open(original_path, 'wb') as f:
+            f.write(data)
+        executor.submit(_process_and_release, pending, io.BytesIO(data), name, pictures_path, original_path)
+    except Exception:
+        pending.release()
+        raise
+
+    return name
+
+def profile_picture_url(filename, size=150, fmt='jpg'):
+    """URL of a profile picture variant, or None if the user has no picture"""
+    if not filename:
+        return None
+
+    # Pictures saved before variants existed keep their original extension
+    if os.path.splitext(filename)[1]:
+        return url_for('static', filename=f'images/profile_pics/{filename}')
+
+    size = min(PICTURE_SIZES, key=lambda s: (s < size, abs(s - size)))
+    return url_for('main.profile_picture', filename=variant_filename(filename, size, fmt))
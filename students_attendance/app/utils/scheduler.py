@@ -0,0 +1,189 @@
+import time
+import logging
+import threading
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import update, insert, select, exists, and_, or_
+from app import db
+from app.models.attendance import Attendance, AttendanceSession
+from app.models.course import Enrollment
+from app.utils.cache import cache, invalidate_attendance
+
+logger = logging.getLogger(__name__)
+
+# Keep IN (...) lists below SQLite's host parameter limit
+CHUNK_SIZE = 500
+
+def close_expired_sessions(now=None, grace_minutes=15, lookback_days=7):
+    """Deactivate sessions that ended more than grace_minutes ago.
+
+    Every ended session is closed, so no old code keeps accepting
+    check-ins. Absences are only filled in for sessions from the last
+    lookback_days days; the first run on an existing database closes the
+    sessions ever left open without inventing absences for all of them.
+    Due ids are read first and closed in chunks, each followed by an
+    'absent' attendance for every enrolled student who never checked in.
+    Plain UPDATE and INSERT work on every backend. Returns
+    (sessions_closed, absences_recorded). Commits.
+    """
+    now = now or datetime.now()
+    cutoff = now - timedelta(minutes=grace_minutes)
+
+    ended = or_(
+        AttendanceSession.date < cutoff.date(),
+        and_(AttendanceSession.date == cutoff.date(), AttendanceSession.end_time <= cutoff.time())
+    )
+    due = db.session.execute(
+        select(AttendanceSession.id, AttendanceSession.date).where(
+            AttendanceSession.is_active == True,
+            ended
+        )
+    ).all()
+    earliest = cutoff.date() - timedelta(days=lookback_days)
+
+    closed = 0
+    absences = 0
+    for i in range(0, len(due), CHUNK_SIZE):
+        chunk = [session_id for session_id, _ in due[i:i + CHUNK_SIZE]]
+        closed += db.session.execute(
+            update(AttendanceSession).where(
+                AttendanceSession.id.in_(chunk),
+                AttendanceSession.is_active == True
+            ).values(
+                is_active=False,
+                updated_at=datetime.utcnow()
+            ).execution_options(synchronize_session=False)
+        ).rowcount
+        recent = [session_id for session_id, day in due[i:i + CHUNK_SIZE] if day >= earliest]
+        if recent:
+            absences += finalize_absences(recent)
+
+    db.session.commit()
+    return closed, absences
+
+def _session_start_utc(day, start_time):
+    # Session times are local wall-clock times; attendance timestamps are naive UTC
+    return datetime.combine(day, start_time).astimezone(timezone.utc).replace(tzinfo=None)
+
+def finalize_absences(session_ids):
+    """Insert 'absent' records for enrolled students with no attendance. Does not commit.
+
+    The absences are stamped with the start of their session, the earliest
+    a real mark can be made, not the time they were written. A mark a device
+    took during class and syncs after the session closed therefore still
+    wins the last-write-wins check in sync_marks.
+    """
+    already_marked = exists().where(
+        Attendance.session_id == AttendanceSession.id,
+        Attendance.student_id == Enrollment.student_id
+    )
+
+    missing = db.session.execute(
+        select(
+            AttendanceSession.id,
+            Enrollment.student_id,
+            AttendanceSession.date,
+            AttendanceSession.start_time
+        ).join(
+            Enrollment, Enrollment.course_id == AttendanceSession.course_id
+        ).where(
+            AttendanceSession.id.in_(session_ids),
+            Enrollment.is_active == True,
+            ~already_marked
+        )
+    ).all()
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            'session_id': session_id,
+            'student_id': student_id,
+            'status': 'absent',
+            'timestamp': _session_start_utc(day, start_time),
+            'updated_at': now
+        }
+        for session_id, student_id, day, start_time in missing
+    ]
+    if rows:
+        db.session.execute(insert(Attendance), rows)
+    invalidate_attendance(session_ids, {row['student_id'] for row in rows})
+    return len(rows)
+
+class Scheduler:
+    """Runs periodic jobs on one daemon thread inside a web worker.
+
+    Jobs must be idempotent: every worker process runs its own scheduler,
+    and the same work is also available as CLI commands for cron.
+    """
+
+    def __init__(self):
+        self.jobs = []
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stopping = threading.Event()
+
+    def add_job(self, name, interval, func):
+        """Call func(app) every interval seconds inside an app context"""
+        self.jobs = [job for job in self.jobs if job['name'] != name]
+        self.jobs.append({'name': name, 'interval': interval, 'func': func, 'next_run': 0.0})
+
+    def start(self, app):
+        with self.lock:
+            if self.thread is not None or not self.jobs:
+                return
+            self.thread = threading.Thread(target=self._run, args=(app,), name='scheduler', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+
+    def _run(self, app):
+        while not self.stopping.is_set():
+            now = time.monotonic()
+            for job in self.jobs:
+                if job['next_run'] > now:
+                    continue
+                job['next_run'] = now + job['interval']
+                try:
+                    with app.app_context():
+                        job['func'](app)
+                except Exception:
+                    logger.exception('Scheduled job %s failed', job['name'])
+
+            next_run = min(job['next_run'] for job in self.jobs)
+            self.stopping.wait(max(0.1, next_run - time.monotonic()))
+
+scheduler = Scheduler()
+
+def _close_sessions_job(app):
+    closed, absences = close_expired_sessions(
+        grace_minutes=app.config['SESSION_CLOSE_GRACE_MINUTES'],
+        lookback_days=app.config['SESSION_CLOSE_LOOKBACK_DAYS']
+    )
+    if closed:
+        logger.info('Closed %d attendance sessions, recorded %d absences', closed, absences)
+
+def _timetable_sessions_job(app):
+    from app.utils.timetable import create_sessions_from_timetable, activate_todays_sessions
+
+    created = create_sessions_from_timetable(date.today())
+    activated = activate_todays_sessions(grace_minutes=app.config['SESSION_CLOSE_GRACE_MINUTES'])
+    if created or activated:
+        logger.info('Created %d and opened %d sessions from the timetable', created, activated)
+
+def _purge_cache_job(app):
+    cache.backend.purge()
+
+def init_scheduler(app):
+    """Start the in-process scheduler with the first request, not in CLI commands"""
+    if not app.config['SCHEDULER_ENABLED']:
+        return
+
+    scheduler.add_job('close-sessions', app.config['SESSION_CLOSE_INTERVAL'], _close_sessions_job)
+    scheduler.add_job('timetable-sessions', app.config['TIMETABLE_SESSION_INTERVAL'], _timetable_sessions_job)
+    if hasattr(cache.backend, 'purge'):
+        # Expired entries are only dropped from the shared cache file by this job
+        scheduler.add_job('cache-purge', 3600, _purge_cache_job)
+
+    @app.before_request
+    def start_scheduler():
+        scheduler.start(app)
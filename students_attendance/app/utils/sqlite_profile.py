@@ -0,0 +1,51 @@
+import os
+from sqlalchemy import event
+
+# Applied to every new SQLite connection when the profile is enabled
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,            # milliseconds
+    'mmap_size': 256 * 1024 * 1024,  # bytes
+    'cache_size': -64000,            # negative means KiB, so ~64 MB per connection
+    'temp_store': 'MEMORY',
+}
+
+def is_sqlite_file(uri):
+    return uri.startswith('sqlite') and ':memory:' not in uri and uri.rstrip('/') != 'sqlite:'
+
+def configure_sqlite_engine(app):
+    """Set engine options for SQLite; must run before db.init_app"""
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+    if not app.config['SQLITE_PROFILE'] or not is_sqlite_file(uri):
+        return
+
+    pragmas = dict(DEFAULT_PRAGMAS)
+    pragmas.update(app.config.get('SQLITE_PRAGMAS') or {})
+    app.config['SQLITE_PRAGMAS'] = pragmas
+
+    engine_options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+    connect_args = engine_options.setdefault('connect_args', {})
+    # Python's own lock wait, in seconds; kept in line with busy_timeout
+    connect_args.setdefault('timeout', pragmas['busy_timeout'] / 1000)
+    # Connections are handed between gunicorn threads through the pool
+    connect_args.setdefault('check_same_thread', False)
+
+    # One connection per gunicorn thread, plus headroom for background jobs
+    engine_options.setdefault('pool_size', int(os.environ.get('SQLALCHEMY_POOL_SIZE', 10)))
+    engine_options.setdefault('max_overflow', int(os.environ.get('SQLALCHEMY_MAX_OVERFLOW', 10)))
+    engine_options.setdefault('pool_timeout', 30)
+    engine_options.setdefault('pool_recycle', 3600)
+
+def register_sqlite_pragmas(app, engine):
+    """Apply the configured pragmas on every new connection to engine"""
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
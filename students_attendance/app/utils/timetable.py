@@ -0,0 +1,130 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert, update
+from app import db
+from app.models.attendance import AttendanceSession
+from app.models.timetable import TimetableSlot
+from app.utils.qrcode_generator import generate_session_code
+from app.utils.cache import cache
+from app.utils.marking import insert_for_dialect, parameter_chunks
+
+def generate_session_codes(count):
+    """count distinct session codes that are not used by any existing session"""
+    codes = set()
+    while len(codes) < count:
+        candidates = {generate_session_code() for _ in range(count - len(codes))} - codes
+        taken = {
+            code for (code,) in db.session.query(AttendanceSession.session_code).filter(
+                AttendanceSession.session_code.in_(candidates)
+            )
+        }
+        codes |= candidates - taken
+    return list(codes)
+
+def create_sessions_from_timetable(start_date, end_date=None, faculty_id=None):
+    """Create the attendance sessions the timetable schedules between two days.
+
+    Runs as one transaction: one query for the slots, one for sessions that
+    already exist (matched on course, date and start time, so reruns are
+    safe), codes generated in bulk and multi-row INSERTs. The unique index
+    on those columns, with ON CONFLICT DO NOTHING, keeps workers running
+    this at the same time from creating duplicates. Only sessions for today
+    start active; future ones are opened by activate_todays_sessions.
+    Returns the number of sessions created.
+    """
+    end_date = end_date or start_date
+    today = date.today()
+
+    query = TimetableSlot.query.filter(
+        TimetableSlot.is_active == True,
+        TimetableSlot.valid_from <= end_date,
+        TimetableSlot.valid_until >= start_date
+    )
+    if faculty_id is not None:
+        query = query.filter(TimetableSlot.faculty_id == faculty_id)
+    slots = query.all()
+    if not slots:
+        return 0
+
+    existing = set(db.session.query(
+        AttendanceSession.course_id, AttendanceSession.date, AttendanceSession.start_time
+    ).filter(
+        AttendanceSession.course_id.in_({slot.course_id for slot in slots}),
+        AttendanceSession.date >= start_date,
+        AttendanceSession.date <= end_date
+    ))
+
+    slots_by_weekday = {}
+    for slot in slots:
+        slots_by_weekday.setdefault(slot.weekday, []).append(slot)
+
+    rows = []
+    now = datetime.utcnow()
+    day = start_date
+    while day <= end_date:
+        for slot in slots_by_weekday.get(day.weekday(), []):
+            if not slot.valid_from <= day <= slot.valid_until:
+                continue
+            if (slot.course_id, day, slot.start_time) in existing:
+                continue
+            rows.append({
+                'course_id': slot.course_id,
+                'faculty_id': slot.faculty_id,
+                'date': day,
+                'start_time': slot.start_time,
+                'end_time': slot.end_time,
+                'location': slot.location,
+                'is_active': day == today,
+                'is_scheduled': day > today,
+                'created_at': now,
+                'updated_at': now
+            })
+        day += timedelta(days=1)
+
+    for row, code in zip(rows, generate_session_codes(len(rows))):
+        row['session_code'] = code
+
+    dialect_insert = insert_for_dialect()
+    created = 0
+    for chunk in parameter_chunks(rows):
+        if dialect_insert is None:
+            stmt = insert(AttendanceSession).values(chunk)
+        else:
+            stmt = dialect_insert(AttendanceSession).values(chunk).on_conflict_do_nothing(
+                index_elements=['course_id', 'date', 'start_time']
+            )
+        created += db.session.execute(stmt).rowcount
+    if created:
+        cache.invalidate('course', *{row['course_id'] for row in rows})
+        cache.invalidate('sessions', 0)
+        cache.invalidate('attendance', 0)
+    db.session.commit()
+    return created
+
+def activate_todays_sessions(now=None, grace_minutes=15):
+    """Open today's generated sessions that were never opened and have not ended yet.
+
+    Sessions a faculty member opened and closed again are left alone.
+    Commits.
+    """
+    now = now or datetime.now()
+    cutoff = (now - timedelta(minutes=grace_minutes)).time()
+
+    due = db.session.query(AttendanceSession.id, AttendanceSession.course_id).filter(
+        AttendanceSession.date == now.date(),
+        AttendanceSession.is_scheduled == True,
+        AttendanceSession.end_time > cutoff
+    ).all()
+    if not due:
+        return 0
+
+    db.session.execute(
+        update(AttendanceSession).where(
+            AttendanceSession.id.in_([session_id for session_id, _ in due]),
+            AttendanceSession.is_scheduled == True
+        ).values(is_active=True, is_scheduled=False).execution_options(synchronize_session=False)
+    )
+    cache.invalidate('session', *[session_id for session_id, _ in due])
+    cache.invalidate('course', *{course_id for _, course_id in due})
+    cache.invalidate('attendance', 0)
+    db.session.commit()
+    return len(due)
@@ -0,0 +1,145 @@
+"""
+Benchmark concurrent check-ins against SQLite with and without the
+production profile (WAL, synchronous=NORMAL, busy_timeout).
+This script should be run from the project root directory.
+
+    python benchmark_sqlite.py --threads 16 --checkins 50
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+def run_benchmark(profile, threads, checkins, readers):
+    """Run one benchmark in a fresh process so create_app sees the env"""
+    db_path = os.path.join(tempfile.mkdtemp(), 'bench.db')
+    env = dict(
+        os.environ,
+        DATABASE_URL=f'sqlite:///{db_path}',
+        SQLITE_PROFILE='True' if profile else 'False',
+    )
+    result = subprocess.run(
+        [sys.executable, __file__, '--worker',
+         '--threads', str(threads), '--checkins', str(checkins), '--readers', str(readers)],
+        env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(result.stderr)
+        sys.exit(result.returncode)
+    return result.stdout.strip()
+
+def worker(threads, checkins, readers):
+    import threading
+    import time
+    from datetime import date, time as dtime
+    from sqlalchemy.exc import OperationalError
+    from app import create_app, db
+    from app.models.user import User
+    from app.models.faculty import Faculty
+    from app.models.student import Student
+    from app.models.course import Course, Enrollment
+    from app.models.attendance import Attendance, AttendanceSession
+
+    # One pooled connection per thread when the profile is on
+    os.environ.setdefault('SQLALCHEMY_POOL_SIZE', str(threads + readers))
+    app = create_app()
+
+    total_students = threads * checkins
+    with app.app_context():
+        faculty_user = User(email='f@example.com', username='f', role='faculty',
+                            first_name='F', last_name='F', password_hash='x')
+        db.session.add(faculty_user)
+        db.session.flush()
+        faculty = Faculty(user_id=faculty_user.id, employee_id='F1', department='CS',
+                          designation='Professor', joining_date=date.today())
+        db.session.add(faculty)
+        db.session.flush()
+        course = Course(course_code='BENCH', title='Bench', credits=3, faculty_id=faculty.id,
+                        department='CS', semester=1, year=2024)
+        db.session.add(course)
+        db.session.flush()
+        session = AttendanceSession(course_id=course.id, faculty_id=faculty.id, date=date.today(),
+                                    start_time=dtime(9), end_time=dtime(10), session_code='BENCH')
+        db.session.add(session)
+
+        users = [User(email=f's{i}@example.com', username=f's{i}', role='student',
+                      first_name='S', last_name=str(i), password_hash='x')
+                 for i in range(total_students)]
+        db.session.add_all(users)
+        db.session.flush()
+        students = [Student(user_id=u.id, roll_number=f'R{i}', enrollment_year=2024,
+                            department='CS', semester=1) for i, u in enumerate(users)]
+        db.session.add_all(students)
+        db.session.flush()
+        db.session.add_all([Enrollment(student_id=s.id, course_id=course.id) for s in students])
+        db.session.commit()
+        student_ids = [s.id for s in students]
+
+    stats = {'ok': 0, 'locked': 0, 'reads': 0}
+    lock = threading.Lock()
+    done = threading.Event()
+
+    def check_in(ids):
+        with app.app_context():
+            for student_id in ids:
+                try:
+                    session = AttendanceSession.query.filter_by(session_code='BENCH', is_active=True).first()
+                    Enrollment.query.filter_by(student_id=student_id, course_id=session.course_id).first()
+                    db.session.add(Attendance(session_id=session.id, student_id=student_id))
+                    db.session.commit()
+                    with lock:
+                        stats['ok'] += 1
+                except OperationalError:
+                    db.session.rollback()
+                    with lock:
+                        stats['locked'] += 1
+
+    def read_stats():
+        with app.app_context():
+            while not done.is_set():
+                try:
+                    Attendance.query.filter_by(status='present').count()
+                    db.session.rollback()
+                    with lock:
+                        stats['reads'] += 1
+                except OperationalError:
+                    db.session.rollback()
+
+    chunks = [student_ids[i::threads] for i in range(threads)]
+    writer_threads = [threading.Thread(target=check_in, args=(chunk,)) for chunk in chunks]
+    reader_threads = [threading.Thread(target=read_stats) for _ in range(readers)]
+
+    start = time.perf_counter()
+    for t in reader_threads + writer_threads:
+        t.start()
+    for t in writer_threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for t in reader_threads:
+        t.join()
+
+    print(f"{stats['ok']} check-ins, {stats['locked']} 'database is locked' errors, "
+          f"{stats['reads']} stat reads in {elapsed:.2f}s ({stats['ok'] / elapsed:.0f} check-ins/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--checkins', type=int, default=50, help='check-ins per thread')
+    parser.add_argument('--readers', type=int, default=4, help='concurrent report readers')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.threads, args.checkins, args.readers)
+        return
+
+    print('Rollback journal (SQLITE_PROFILE=False):')
+    print('  ' + run_benchmark(False, args.threads, args.checkins, args.readers))
+    print('WAL profile (SQLITE_PROFILE=True):')
+    print('  ' + run_benchmark(True, args.threads, args.checkins, args.readers))
+
+if __name__ == "__main__":
+    main()
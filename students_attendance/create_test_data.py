@@ -5,11 +5,12 @@ This script should be run from the project root directory.
 
 from app import create_app, db
 from app.models.attendance import AttendanceSession, Attendance
-from app.models.course import Course, Enrollment
+from app.models.course import Course
 from app.models.faculty import Faculty
 from app.models.student import Student
 from app.models.user import User
-from datetime import datetime, date, time
+from app.utils.enrollment import enroll_students
+from datetime import date, time
 from werkzeug.security import generate_password_hash
 import random
 
@@ -163,21 +164,27 @@ def create_test_data():
                 'name': 'Introduction to Programming',
                 'description': 'A beginner-friendly course covering the basics of programming.',
                 'credits': 3,
-                'faculty_id': 1
+                'faculty_id': 1,
+                'department': 'Computer Science',
+                'semester': 3
             },
             {
                 'course_code': 'CS201',
                 'name': 'Data Structures and Algorithms',
                 'description': 'Learn about common data structures and algorithm design techniques.',
                 'credits': 4,
-                'faculty_id': 1
+                'faculty_id': 1,
+                'department': 'Computer Science',
+                'semester': 3
             },
             {
                 'course_code': 'MATH101',
                 'name': 'Calculus I',
                 'description': 'Introduction to differential and integral calculus.',
                 'credits': 3,
-                'faculty_id': 2
+                'faculty_id': 2,
+                'department': 'Mathematics',
+                'semester': 5
             }
         ]
         
@@ -188,23 +195,18 @@ def create_test_data():
                 name=c_data['name'],
                 description=c_data['description'],
                 credits=c_data['credits'],
-                faculty_id=c_data['faculty_id']
+                faculty_id=c_data['faculty_id'],
+                department=c_data['department'],
+                semester=c_data['semester']
             )
             db.session.add(course)
             course_list.append(course)
         
         db.session.commit()
         
-        # Enroll students in courses
-        for student in student_list:
-            for course in course_list:
-                enrollment = Enrollment(
-                    student_id=student.id,
-                    course_id=course.id,
-                    enrollment_date=datetime.now().date(),
-                    is_active=True
-                )
-                db.session.add(enrollment)
+        # Enroll each course's department and semester
+        for course in course_list:
+            enroll_students(course.id, department=course.department, semester=course.semester)
         
         db.session.commit()
         
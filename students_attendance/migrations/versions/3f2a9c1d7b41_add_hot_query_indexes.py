@@ -0,0 +1,37 @@
+"""add composite indexes for hot query shapes
+
+Revision ID: 3f2a9c1d7b41
+Revises: 
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b41'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_attendances_student_status', 'attendances', ['student_id', 'status']),
+    ('ix_attendance_sessions_course_date', 'attendance_sessions', ['course_id', 'date']),
+    ('ix_attendance_sessions_faculty_date', 'attendance_sessions', ['faculty_id', 'date']),
+    ('ix_enrollments_course_active', 'enrollments', ['course_id', 'is_active']),
+    ('ix_enrollments_student_active', 'enrollments', ['student_id', 'is_active']),
+]
+
+
+def upgrade():
+    # create_app() runs db.create_all(), so a fresh database may already
+    # have these indexes before the first upgrade
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,65 @@
+"""add attendance archive tables
+
+Revision ID: 8b1e4d2c6a90
+Revises: 3f2a9c1d7b41
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b1e4d2c6a90'
+down_revision = '3f2a9c1d7b41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() runs db.create_all(), so the tables may already exist
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('attendance_sessions_archive'):
+        op.create_table(
+            'attendance_sessions_archive',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('course_id', sa.Integer(), nullable=False),
+            sa.Column('faculty_id', sa.Integer(), nullable=False),
+            sa.Column('date', sa.Date(), nullable=False),
+            sa.Column('start_time', sa.Time(), nullable=False),
+            sa.Column('end_time', sa.Time(), nullable=False),
+            sa.Column('session_code', sa.String(length=50), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+            sa.Column('location', sa.String(length=100), nullable=True),
+            sa.Column('notes', sa.Text(), nullable=True),
+            sa.Column('archived_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_attendance_sessions_archive_course_date', 'attendance_sessions_archive', ['course_id', 'date'])
+        op.create_index('ix_attendance_sessions_archive_date', 'attendance_sessions_archive', ['date'])
+
+    if not inspector.has_table('attendances_archive'):
+        op.create_table(
+            'attendances_archive',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('session_id', sa.Integer(), nullable=False),
+            sa.Column('student_id', sa.Integer(), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('timestamp', sa.DateTime(), nullable=True),
+            sa.Column('marked_by', sa.Integer(), nullable=True),
+            sa.Column('location', sa.String(length=100), nullable=True),
+            sa.Column('ip_address', sa.String(length=50), nullable=True),
+            sa.Column('device_info', sa.String(length=255), nullable=True),
+            sa.Column('comments', sa.Text(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_attendances_archive_session', 'attendances_archive', ['session_id'])
+        op.create_index('ix_attendances_archive_student_status', 'attendances_archive', ['student_id', 'status'])
+
+
+def downgrade():
+    op.drop_table('attendances_archive')
+    op.drop_table('attendance_sessions_archive')
@@ -0,0 +1,38 @@
+"""add attendance updated_at
+
+Revision ID: a7c3e9f1b254
+Revises: f4c1a9d2b836
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c3e9f1b254'
+down_revision = 'f4c1a9d2b836'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() runs db.create_all(), but that never adds columns to existing tables
+    inspector = sa.inspect(op.get_bind())
+
+    columns = {column['name'] for column in inspector.get_columns('attendances')}
+    if 'updated_at' not in columns:
+        with op.batch_alter_table('attendances') as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+        # Existing rows were last written when they were marked
+        op.execute('UPDATE attendances SET updated_at = timestamp')
+
+    indexes = {index['name'] for index in inspector.get_indexes('attendances')}
+    if 'ix_attendances_updated_at' not in indexes:
+        op.create_index('ix_attendances_updated_at', 'attendances', ['updated_at'])
+
+
+def downgrade():
+    op.drop_index('ix_attendances_updated_at', table_name='attendances')
+    with op.batch_alter_table('attendances') as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,57 @@
+"""never reuse attendance ids
+
+Revision ID: b3d5f7a9c182
+Revises: a7c3e9f1b254
+Create Date: 2026-10-19 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d5f7a9c182'
+down_revision = 'a7c3e9f1b254'
+branch_labels = None
+depends_on = None
+
+# Hot table and the archive table that keeps its ids
+TABLES = [
+    ('attendance_sessions', 'attendance_sessions_archive'),
+    ('attendances', 'attendances_archive'),
+]
+
+
+def upgrade():
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    indexes = {index['name'] for index in inspector.get_indexes('attendance_sync_marks')}
+    if 'ix_attendance_sync_marks_session' not in indexes:
+        op.create_index('ix_attendance_sync_marks_session', 'attendance_sync_marks', ['session_id'])
+
+    # Other databases never reuse sequence values. SQLite hands out
+    # max(rowid) + 1 unless the table is AUTOINCREMENT, so ids of archived
+    # rows would come back once the newest rows are archived.
+    if bind.dialect.name != 'sqlite':
+        return
+
+    for table, archive in TABLES:
+        sql = bind.execute(sa.text(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"
+        ), {'name': table}).scalar()
+        if 'AUTOINCREMENT' not in sql.upper():
+            with op.batch_alter_table(table, recreate='always', table_kwargs={'sqlite_autoincrement': True}):
+                pass
+
+        # Start above every id already handed out, including archived ones
+        high_water = bind.execute(sa.text(
+            f'SELECT max(id) FROM (SELECT max(id) AS id FROM {table} UNION ALL SELECT max(id) FROM {archive})'
+        )).scalar() or 0
+        bind.execute(sa.text('DELETE FROM sqlite_sequence WHERE name = :name'), {'name': table})
+        bind.execute(sa.text('INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)'),
+                     {'name': table, 'seq': high_water})
+
+
+def downgrade():
+    op.drop_index('ix_attendance_sync_marks_session', table_name='attendance_sync_marks')
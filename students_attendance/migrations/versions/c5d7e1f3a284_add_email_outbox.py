@@ -0,0 +1,45 @@
+"""add email outbox
+
+Revision ID: c5d7e1f3a284
+Revises: 8b1e4d2c6a90
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d7e1f3a284'
+down_revision = '8b1e4d2c6a90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() runs db.create_all(), so the table may already exist
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('email_outbox'):
+        op.create_table(
+            'email_outbox',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('subject', sa.String(length=255), nullable=False),
+            sa.Column('sender', sa.String(length=120), nullable=True),
+            sa.Column('recipients', sa.Text(), nullable=False),
+            sa.Column('text_body', sa.Text(), nullable=True),
+            sa.Column('html_body', sa.Text(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('next_attempt_at', sa.DateTime(), nullable=False),
+            sa.Column('claimed_by', sa.String(length=32), nullable=True),
+            sa.Column('last_error', sa.Text(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.Column('sent_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_email_outbox_status_next_attempt', 'email_outbox', ['status', 'next_attempt_at'])
+
+
+def downgrade():
+    op.drop_table('email_outbox')
@@ -0,0 +1,38 @@
+"""add attendance digests
+
+Revision ID: d9a4b6c8e173
+Revises: c5d7e1f3a284
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd9a4b6c8e173'
+down_revision = 'c5d7e1f3a284'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() runs db.create_all(), so the table may already exist
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('attendance_digests'):
+        op.create_table(
+            'attendance_digests',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('user_id', sa.Integer(), nullable=False),
+            sa.Column('digest_date', sa.Date(), nullable=False),
+            sa.Column('event_count', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('user_id', 'digest_date', name='unique_attendance_digest')
+        )
+
+
+def downgrade():
+    op.drop_table('attendance_digests')
@@ -0,0 +1,43 @@
+"""add attendance sync marks
+
+Revision ID: e2b8f0a6c519
+Revises: d9a4b6c8e173
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b8f0a6c519'
+down_revision = 'd9a4b6c8e173'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() runs db.create_all(), so the table may already exist
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('attendance_sync_marks'):
+        op.create_table(
+            'attendance_sync_marks',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('client_id', sa.String(length=64), nullable=False),
+            sa.Column('session_id', sa.Integer(), nullable=True),
+            sa.Column('student_id', sa.Integer(), nullable=True),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('client_timestamp', sa.DateTime(), nullable=True),
+            sa.Column('result', sa.String(length=20), nullable=False),
+            sa.Column('reason', sa.String(length=50), nullable=True),
+            sa.Column('submitted_by', sa.Integer(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['submitted_by'], ['users.id']),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('submitted_by', 'client_id', name='unique_sync_client_id')
+        )
+
+
+def downgrade():
+    op.drop_table('attendance_sync_marks')
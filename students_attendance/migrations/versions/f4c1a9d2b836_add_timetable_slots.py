@@ -0,0 +1,107 @@
+"""add timetable slots
+
+Revision ID: f4c1a9d2b836
+Revises: e2b8f0a6c519
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4c1a9d2b836'
+down_revision = 'e2b8f0a6c519'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # create_app() runs db.create_all(), so the table may already exist
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('timetable_slots'):
+        op.create_table(
+            'timetable_slots',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('course_id', sa.Integer(), nullable=False),
+            sa.Column('faculty_id', sa.Integer(), nullable=False),
+            sa.Column('weekday', sa.Integer(), nullable=False),
+            sa.Column('start_time', sa.Time(), nullable=False),
+            sa.Column('end_time', sa.Time(), nullable=False),
+            sa.Column('location', sa.String(length=100), nullable=True),
+            sa.Column('valid_from', sa.Date(), nullable=False),
+            sa.Column('valid_until', sa.Date(), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['course_id'], ['courses.id']),
+            sa.ForeignKeyConstraint(['faculty_id'], ['faculty.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_timetable_slots_weekday_active', 'timetable_slots', ['weekday', 'is_active'])
+
+    # Generated sessions: at most one per course and start, and a flag for ones not opened yet
+    columns = {column['name'] for column in inspector.get_columns('attendance_sessions')}
+    if 'is_scheduled' not in columns:
+        with op.batch_alter_table('attendance_sessions') as batch_op:
+            batch_op.add_column(sa.Column('is_scheduled', sa.Boolean(), nullable=True))
+
+    indexes = {index['name'] for index in inspector.get_indexes('attendance_sessions')}
+    if 'ux_attendance_sessions_course_date_start' not in indexes:
+        merge_duplicate_sessions()
+        op.create_index(
+            'ux_attendance_sessions_course_date_start', 'attendance_sessions',
+            ['course_id', 'date', 'start_time'], unique=True
+        )
+
+
+def merge_duplicate_sessions():
+    """Fold sessions sharing a course, date and start time into the oldest one.
+
+    Marks move to the kept session unless it already has one for that
+    student, in which case the kept session's mark wins. Sync records follow
+    the marks, then the emptied duplicates are deleted.
+    """
+    conn = op.get_bind()
+    duplicates = conn.execute(sa.text(
+        'SELECT s.id, keep.id FROM attendance_sessions s '
+        'JOIN (SELECT MIN(id) AS id, course_id, date, start_time FROM attendance_sessions '
+        'GROUP BY course_id, date, start_time HAVING COUNT(*) > 1) keep '
+        'ON s.course_id = keep.course_id AND s.date = keep.date AND s.start_time = keep.start_time '
+        'WHERE s.id <> keep.id'
+    )).all()
+
+    for duplicate_id, keep_id in duplicates:
+        params = {'duplicate_id': duplicate_id, 'keep_id': keep_id}
+        conn.execute(sa.text(
+            'UPDATE attendances SET session_id = :keep_id WHERE session_id = :duplicate_id '
+            'AND student_id NOT IN (SELECT student_id FROM attendances WHERE session_id = :keep_id)'
+        ), params)
+        conn.execute(sa.text('DELETE FROM attendances WHERE session_id = :duplicate_id'), params)
+        conn.execute(sa.text(
+            'UPDATE attendance_sync_marks SET session_id = :keep_id WHERE session_id = :duplicate_id'
+        ), params)
+        conn.execute(sa.text('DELETE FROM attendance_sessions WHERE id = :duplicate_id'), params)
+
+    if duplicates:
+        logging.getLogger('alembic.env').warning(
+            f'Merged {len(duplicates)} duplicate attendance sessions into the oldest of each slot'
+        )
+
+
+def downgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    indexes = {index['name'] for index in inspector.get_indexes('attendance_sessions')}
+    if 'ux_attendance_sessions_course_date_start' in indexes:
+        op.drop_index('ux_attendance_sessions_course_date_start', table_name='attendance_sessions')
+
+    columns = {column['name'] for column in inspector.get_columns('attendance_sessions')}
+    if 'is_scheduled' in columns:
+        with op.batch_alter_table('attendance_sessions') as batch_op:
+            batch_op.drop_column('is_scheduled')
+
+    if inspector.has_table('timetable_slots'):
+        op.drop_table('timetable_slots')
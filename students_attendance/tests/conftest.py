@@ -0,0 +1,71 @@
+# tests/conftest.py
+from datetime import date
+
+import pytest
+
+from app import create_app, db
+from app.models import Faculty, Course
+from app.utils.query_stats import track_queries
+from factories import add_user
+
+@pytest.fixture
+def app_env(tmp_path, monkeypatch):
+    """Environment for create_app; override it in a module to change the config"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('SCHEDULER_ENABLED', 'False')
+    monkeypatch.setenv('METRICS_ENABLED', 'False')
+    monkeypatch.setenv('MAIL_WORKERS', '0')
+    monkeypatch.setenv('CACHE_TYPE', 'null')
+    monkeypatch.setenv('CACHE_PATH', str(tmp_path / 'cache.sqlite'))
+    # Per-worker memos such as the roster outlive the app; a fresh prefix keeps them apart
+    monkeypatch.setenv('CACHE_KEY_PREFIX', tmp_path.name)
+    # The identity cache is per process and keyed by user id, which every test reuses
+    monkeypatch.setenv('IDENTITY_CACHE_TTL', '0')
+    return monkeypatch
+
+@pytest.fixture
+def app(app_env):
+    """App on an empty SQLite file with background threads and caching off"""
+    app = create_app()
+    app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    # Only the primary: the replica gets its tables from sync_sqlite_replica
+    with app.app_context():
+        db.create_all(bind_key=None)
+        yield app
+        db.session.remove()
+        db.drop_all(bind_key=None)
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def count_queries():
+    """track_queries as a fixture; assert on the stats after the block:
+
+        def test_dashboard(client, count_queries):
+            with count_queries() as stats:
+                client.get('/student/dashboard')
+            assert stats.count <= 5
+    """
+    return track_queries
+
+@pytest.fixture
+def course(app):
+    """A course with its faculty and an admin, no students yet"""
+    add_user('admin', 'admin')
+    faculty_user = add_user('faculty', 'faculty')
+    faculty = Faculty(
+        user_id=faculty_user.id, employee_id='E0001', department='CS',
+        designation='Professor', joining_date=date(2020, 1, 1)
+    )
+    db.session.add(faculty)
+    db.session.flush()
+
+    course = Course(
+        course_code='CS101', title='Introduction', credits=3, faculty_id=faculty.id,
+        department='CS', semester=3, year=2024
+    )
+    db.session.add(course)
+    db.session.commit()
+    return course
@@ -0,0 +1,62 @@
+# tests/factories.py
+from datetime import date, time, timedelta
+
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import User, Student, Enrollment, Attendance, AttendanceSession
+
+PASSWORD = 'password'
+
+def add_user(role, username, **fields):
+    user = User(
+        email=f'{username}@example.com', username=username, role=role,
+        first_name=username.title(), last_name='Test',
+        password_hash=generate_password_hash(PASSWORD), **fields
+    )
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+def add_students(count, department='CS', semester=3, start=0):
+    students = []
+    for i in range(start, start + count):
+        user = add_user('student', f'student{i}')
+        student = Student(
+            user_id=user.id, roll_number=f'R{i:04d}', enrollment_year=2023,
+            department=department, semester=semester, section='A'
+        )
+        db.session.add(student)
+        students.append(student)
+    db.session.flush()
+    return students
+
+def add_sessions(course, days, start=date(2024, 1, 1)):
+    sessions = []
+    for i in range(days):
+        session = AttendanceSession(
+            course_id=course.id, faculty_id=course.faculty_id,
+            date=start + timedelta(days=i),
+            start_time=time(9), end_time=time(10),
+            session_code=f'{course.course_code}-{start + timedelta(days=i)}', is_active=False
+        )
+        db.session.add(session)
+        sessions.append(session)
+    db.session.flush()
+    return sessions
+
+def mark_all(sessions, students, status='present'):
+    db.session.add_all(
+        Attendance(session_id=session.id, student_id=student.id, status=status)
+        for session in sessions for student in students
+    )
+    db.session.flush()
+
+def enroll(course, students):
+    db.session.add_all(Enrollment(student_id=s.id, course_id=course.id) for s in students)
+    db.session.flush()
+
+def login(client, username):
+    response = client.post('/login', data={'email': f'{username}@example.com', 'password': PASSWORD})
+    assert response.status_code == 302
+    return response
@@ -0,0 +1,54 @@
+# tests/test_archive.py
+from datetime import date
+
+from app import db
+from app.models import Course, AttendanceSession, AttendanceSyncMark
+from app.utils.archive import archive_sessions_before
+from factories import add_students, add_sessions, enroll, mark_all
+
+def test_archived_ids_are_not_reused(course):
+    students = add_students(2)
+    sessions = add_sessions(course, 3)
+    mark_all(sessions, students)
+    db.session.commit()
+    archived_id = sessions[-1].id
+
+    assert archive_sessions_before(date(2030, 1, 1)) == (3, 6)
+
+    new, = add_sessions(course, 1, start=date(2025, 1, 1))
+    db.session.commit()
+    assert new.id > archived_id
+
+def test_archiving_drops_sync_records_of_moved_sessions(course):
+    old, = add_sessions(course, 1, start=date(2023, 1, 1))
+    current, = add_sessions(course, 1, start=date(2025, 1, 1))
+    db.session.add_all([
+        AttendanceSyncMark(client_id='a', session_id=old.id, result='applied'),
+        AttendanceSyncMark(client_id='b', session_id=current.id, result='applied'),
+    ])
+    db.session.commit()
+
+    archive_sessions_before(date(2024, 1, 1))
+
+    assert [m.client_id for m in AttendanceSyncMark.query] == ['b']
+    assert AttendanceSession.query.count() == 1
+
+def test_course_stats_load_students_with_their_users(course, count_queries):
+    course_id = course.id
+    students = add_students(2)
+    enroll(course, students)
+    mark_all(add_sessions(course, 2), students)
+    db.session.commit()
+
+    def stats_queries():
+        # Objects the test created would otherwise hide lazy loads
+        db.session.expunge_all()
+        with count_queries() as stats:
+            result = db.session.get(Course, course_id)._compute_attendance_stats(None, None)
+        return stats.count, len(result['student_stats'])
+
+    few = stats_queries()
+    enroll(db.session.get(Course, course_id), add_students(20, start=2))
+    db.session.commit()
+
+    assert stats_queries() == (few[0], 22)
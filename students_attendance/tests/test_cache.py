@@ -0,0 +1,15 @@
+# tests/test_cache.py
+from app.utils.cache import Cache, LRUCache, SQLiteCache, cache, init_cache
+
+def test_lru_workers_share_version_counters(app):
+    app.config['CACHE_TYPE'] = 'lru'
+    init_cache(app)
+    # What another worker process builds from the same config
+    other = Cache()
+    other.configure(LRUCache(), cache.prefix, cache.default_ttl, SQLiteCache(app.config['CACHE_PATH']))
+
+    cache.set(cache.key('stats', versions=[('course', 1)]), 'old')
+    other.bump('course', 1)
+
+    assert cache.get(cache.key('stats', versions=[('course', 1)])) is None
+    assert cache.key('stats', versions=[('course', 1)]) == other.key('stats', versions=[('course', 1)])
@@ -0,0 +1,36 @@
+# tests/test_conditional.py
+from app import db
+from factories import add_students, add_sessions, mark_all, login
+
+URL = '/admin/api/reports/attendance_by_department'
+
+def test_matching_etag_skips_the_report_query(course, client, count_queries):
+    mark_all(add_sessions(course, 1), add_students(2))
+    db.session.commit()
+    login(client, 'admin')
+
+    with client.application.app_context():
+        first = client.get(URL)
+    assert first.status_code == 200 and first.headers['ETag']
+
+    with client.application.app_context(), count_queries() as stats:
+        cached = client.get(URL, headers={'If-None-Match': first.headers['ETag']})
+
+    assert cached.status_code == 304 and cached.headers['ETag'] == first.headers['ETag']
+    assert not any('GROUP BY' in statement for statement in stats.statements)
+
+def test_write_changes_the_etag(course, client):
+    students = add_students(2)
+    db.session.commit()
+    login(client, 'admin')
+
+    with client.application.app_context():
+        before = client.get(URL)
+
+    mark_all(add_sessions(course, 1), students)
+    db.session.commit()
+
+    with client.application.app_context():
+        after = client.get(URL, headers={'If-None-Match': before.headers['ETag']})
+    assert after.status_code == 200 and after.headers['ETag'] != before.headers['ETag']
+    assert after.json[0]['present_records'] == 2
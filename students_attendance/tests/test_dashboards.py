@@ -0,0 +1,53 @@
+# tests/test_dashboards.py
+from datetime import date
+
+import pytest
+
+from app import db
+from factories import add_students, add_sessions, enroll, mark_all, login
+
+@pytest.fixture
+def app_env(app_env):
+    app_env.setenv('CACHE_TYPE', 'lru')
+    return app_env
+
+def page(client, count_queries, url):
+    with client.application.app_context(), count_queries() as stats:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.get_data(as_text=True), list(stats.statements)
+
+def test_admin_fragments_are_kept_when_attendance_is_marked(client, course, count_queries):
+    students = add_students(2)
+    sessions = add_sessions(course, 2)
+    db.session.commit()
+    login(client, 'admin')
+    page(client, count_queries, '/admin/dashboard')
+
+    mark_all(sessions, students)
+    db.session.commit()
+    _, statements = page(client, count_queries, '/admin/dashboard')
+    assert not any('attendance_sessions' in statement for statement in statements)
+
+    add_sessions(course, 1, start=date(2024, 2, 1))
+    db.session.commit()
+    html, statements = page(client, count_queries, '/admin/dashboard')
+    assert any('attendance_sessions' in statement for statement in statements)
+    assert '<h3 class="card-title">3</h3>' in html
+
+def test_student_fragments_skip_their_queries_when_cached(client, course, count_queries):
+    students = add_students(1)
+    enroll(course, students)
+    sessions = add_sessions(course, 2)
+    mark_all(sessions[:1], students)
+    db.session.commit()
+    login(client, 'student0')
+    page(client, count_queries, '/student/dashboard')
+
+    _, statements = page(client, count_queries, '/student/dashboard')
+    assert not any('attendances' in statement for statement in statements)
+
+    mark_all(sessions[1:], students)
+    db.session.commit()
+    html, _ = page(client, count_queries, '/student/dashboard')
+    assert 'Overall Attendance: 100.0%' in html
@@ -0,0 +1,68 @@
+# tests/test_digest.py
+from datetime import date, time
+
+import pytest
+
+from app import db
+from app.models import AttendanceSession
+from app.models.notification import AttendanceDigest
+from app.models.outbox import OutboxEmail
+from app.utils import digest
+from app.utils.digest import send_attendance_digests
+from factories import add_students, add_sessions, mark_all
+
+DAY = date(2024, 1, 1)
+
+@pytest.fixture
+def marked(course):
+    """Two students, each marked in two sessions on DAY and one the day after"""
+    students = add_students(2)
+    morning, next_day = add_sessions(course, 2, start=DAY)
+    afternoon = AttendanceSession(
+        course_id=course.id, faculty_id=course.faculty_id, date=DAY,
+        start_time=time(14), end_time=time(15), session_code='CS101-afternoon', is_active=False
+    )
+    db.session.add(afternoon)
+    db.session.flush()
+    mark_all([morning, afternoon, next_day], students)
+    db.session.commit()
+    return students
+
+def test_one_digest_per_user_per_day(marked):
+    assert send_attendance_digests(DAY) == 2
+
+    emails = OutboxEmail.query.order_by(OutboxEmail.recipients).all()
+    assert [e.recipients for e in emails] == [s.user.email for s in marked]
+    assert {d.event_count for d in AttendanceDigest.query} == {2}
+
+    # A second run the same day sends nothing
+    assert send_attendance_digests(DAY) == 0
+    assert OutboxEmail.query.count() == 2
+
+class FetchedEvents:
+    """attendance_events() result whose rows were read earlier"""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+@pytest.mark.parametrize('on_conflict', [True, False])
+def test_user_claimed_by_an_overlapping_run_is_skipped(marked, monkeypatch, on_conflict):
+    events = digest.attendance_events
+
+    def events_then_other_run(day):
+        rows = events(day).all()
+        # Another run records the first user's digest after this run read the events
+        db.session.add(AttendanceDigest(user_id=marked[0].user_id, digest_date=day, event_count=2))
+        db.session.flush()
+        return FetchedEvents(rows)
+
+    monkeypatch.setattr(digest, 'attendance_events', events_then_other_run)
+    if not on_conflict:
+        monkeypatch.setattr(digest, 'insert_for_dialect', lambda: None)
+
+    assert send_attendance_digests(DAY) == 1
+    assert [e.recipients for e in OutboxEmail.query] == [marked[1].user.email]
+    assert AttendanceDigest.query.count() == 2
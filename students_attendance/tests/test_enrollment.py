@@ -0,0 +1,26 @@
+# tests/test_enrollment.py
+import pandas as pd
+
+from app.models import Enrollment
+from app.utils.enrollment import enroll_students, import_enrollments_csv
+from factories import add_students
+
+def test_import_reports_unknown_courses_and_roll_numbers(course):
+    add_students(2)
+    df = pd.DataFrame({
+        'roll_number': ['R0000', 'R0001', 'R9999', 'R0000'],
+        'course_code': ['CS101', 'CS101', 'CS101', 'XX999'],
+    })
+
+    enrolled, errors = import_enrollments_csv(df)
+
+    assert enrolled == 2
+    assert sorted(errors) == ['Course XX999 does not exist', 'Unknown roll numbers for CS101: R9999']
+
+def test_enroll_students_filters_and_skips_existing(course):
+    add_students(2)
+    add_students(1, department='EE', start=2)
+
+    assert enroll_students(course.id, department='CS', semester=3) == 2
+    assert enroll_students(course.id, department='CS', semester=3) == 0
+    assert Enrollment.query.filter_by(course_id=course.id).count() == 2
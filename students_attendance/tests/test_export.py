@@ -0,0 +1,64 @@
+# tests/test_export.py
+from datetime import date
+
+import pandas as pd
+
+from app import db
+from app.models import Attendance
+from app.utils.archive import archive_sessions_before
+from app.utils.export import export_attendance_facts
+from app.utils.marking import upsert_attendance
+from factories import add_students, add_sessions, enroll, mark_all
+
+def read_export(output_dir):
+    facts = pd.read_parquet(output_dir, engine='pyarrow')
+    return dict(zip(facts['attendance_id'], facts['status']))
+
+def test_incremental_export_picks_up_status_changes(app, course, tmp_path):
+    students = add_students(3)
+    enroll(course, students)
+    sessions = add_sessions(course, 2)
+    mark_all(sessions, students)
+    db.session.commit()
+
+    output_dir = str(tmp_path / 'export')
+    assert export_attendance_facts(output_dir) == 6
+
+    upsert_attendance(sessions[0].id, {students[0].id: 'absent'}, marked_by=None)
+    db.session.commit()
+    export_attendance_facts(output_dir)
+
+    changed = Attendance.query.filter_by(session_id=sessions[0].id, student_id=students[0].id).one()
+    exported = read_export(output_dir)
+    assert len(exported) == 6
+    assert exported[changed.id] == 'absent'
+
+def test_repeated_exports_do_not_duplicate_rows(app, course, tmp_path):
+    students = add_students(2)
+    enroll(course, students)
+    mark_all(add_sessions(course, 2), students)
+    db.session.commit()
+
+    output_dir = str(tmp_path / 'export')
+    for _ in range(3):
+        export_attendance_facts(output_dir)
+
+    assert len(read_export(output_dir)) == 4
+
+def test_rewritten_partitions_keep_archived_rows(app, course, tmp_path):
+    students = add_students(3)
+    enroll(course, students)
+    sessions = add_sessions(course, 2)
+    mark_all(sessions, students)
+    db.session.commit()
+
+    output_dir = str(tmp_path / 'export')
+    export_attendance_facts(output_dir)
+
+    archive_sessions_before(sessions[1].date)
+    new_session, = add_sessions(course, 1, start=date(2024, 3, 1))
+    upsert_attendance(new_session.id, {students[0].id: 'present'}, marked_by=None)
+    db.session.commit()
+    export_attendance_facts(output_dir)
+
+    assert len(read_export(output_dir)) == 7
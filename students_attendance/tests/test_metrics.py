@@ -0,0 +1,59 @@
+# tests/test_metrics.py
+import os
+import json
+import subprocess
+import sys
+
+from app.utils.metrics import Metrics
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+def worker(directory):
+    metrics = Metrics()
+    metrics.configure(str(directory), flush_interval=0)
+    return metrics
+
+def counter_line(metrics, name):
+    return [line for line in metrics.render().splitlines() if line.startswith(name)]
+
+def test_dead_worker_counters_are_kept_and_its_file_removed(tmp_path):
+    pid = dead_pid()
+    snapshot = {
+        'time': 0,
+        'counters': [['http_requests_total', [['endpoint', 'x'], ['status', '200']], 5]],
+        'gauges': [['http_requests_in_flight', [], 3]],
+        'histograms': [],
+    }
+    (tmp_path / f'metrics_{pid}.json').write_text(json.dumps(snapshot))
+
+    metrics = worker(tmp_path)
+    metrics.inc('http_requests_total', endpoint='x', status=200)
+
+    assert counter_line(metrics, 'http_requests_total') == ['http_requests_total{endpoint="x",status="200"} 6']
+    assert counter_line(metrics, 'http_requests_in_flight') == []
+    assert not (tmp_path / f'metrics_{pid}.json').exists()
+    # Collecting again does not count the retired worker twice
+    assert counter_line(metrics, 'http_requests_total') == ['http_requests_total{endpoint="x",status="200"} 6']
+
+def test_reused_pid_does_not_overwrite_earlier_totals(tmp_path):
+    earlier = worker(tmp_path)
+    earlier.inc('attendance_checkins_total', 4, result='success')
+    earlier.flush(force=True)
+
+    # A new process that got the same pid starts from zero
+    later = worker(tmp_path)
+    later.inc('attendance_checkins_total', result='success')
+
+    assert counter_line(later, 'attendance_checkins_total') == ['attendance_checkins_total{result="success"} 5']
+
+def test_retire_at_exit(tmp_path):
+    metrics = worker(tmp_path)
+    metrics.inc('mail_messages_total', 2, result='sent')
+    metrics.flush(force=True)
+    metrics.retire()
+
+    assert not (tmp_path / f'metrics_{os.getpid()}.json').exists()
+    assert counter_line(worker(tmp_path), 'mail_messages_total') == ['mail_messages_total{result="sent"} 2']
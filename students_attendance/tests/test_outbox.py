@@ -0,0 +1,101 @@
+# tests/test_outbox.py
+import smtplib
+import threading
+from datetime import datetime, timedelta
+
+import flask_mail
+import pytest
+
+from app import db, mail
+from app.models.outbox import OutboxEmail
+from app.utils.email import queue_email, drain_outbox, claim_outbox_batch, send_outbox_batch
+
+@pytest.fixture
+def outbox(app, monkeypatch):
+    """Outbox with SMTP replaced by Flask-Mail's recorder; returns the sent messages"""
+    monkeypatch.setattr(app.extensions['mail'], 'suppress', True)
+    app.config.update(MAIL_RETRY_BASE_DELAY=30, MAIL_RETRY_MAX_DELAY=3600, MAIL_MAX_ATTEMPTS=3)
+    with mail.record_messages() as sent:
+        yield sent
+
+@pytest.fixture
+def smtp_rejects(monkeypatch):
+    def send(self, message, envelope_from=None):
+        raise smtplib.SMTPResponseException(451, b'Try again later')
+    monkeypatch.setattr(flask_mail.Connection, 'send', send)
+
+def queue(count=1):
+    emails = [
+        queue_email(f'Message {i}', 'noreply@example.com', [f'user{i}@example.com'], 'Body', None)
+        for i in range(count)
+    ]
+    db.session.commit()
+    return emails
+
+def make_due(email):
+    email.next_attempt_at = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+def test_failed_send_is_retried_with_backoff(app, outbox, smtp_rejects):
+    email, = queue()
+
+    before = datetime.utcnow()
+    assert drain_outbox(app) == 1
+    assert email.status == 'pending' and email.attempts == 1
+    assert '451' in email.last_error
+    assert timedelta(seconds=29) < email.next_attempt_at - before < timedelta(seconds=31)
+
+    # Not due yet
+    assert drain_outbox(app) == 0
+
+    make_due(email)
+    before = datetime.utcnow()
+    assert drain_outbox(app) == 1
+    assert email.attempts == 2
+    assert timedelta(seconds=59) < email.next_attempt_at - before < timedelta(seconds=61)
+
+def test_email_is_dead_after_max_attempts(app, outbox, smtp_rejects):
+    email, = queue()
+
+    for _ in range(3):
+        make_due(email)
+        assert drain_outbox(app) == 1
+
+    assert email.status == 'failed' and email.attempts == 3
+    make_due(email)
+    assert drain_outbox(app) == 0
+
+def test_retried_email_is_sent_once_smtp_recovers(app, outbox, smtp_rejects, monkeypatch):
+    email, = queue()
+    drain_outbox(app)
+
+    monkeypatch.undo()
+    monkeypatch.setattr(app.extensions['mail'], 'suppress', True)
+    make_due(email)
+    assert drain_outbox(app) == 1
+
+    assert email.status == 'sent' and email.attempts == 2 and email.last_error is None
+    assert [m.subject for m in outbox] == ['Message 0']
+
+def test_workers_never_claim_the_same_email(app, outbox):
+    queue(20)
+    claimed = {}
+
+    def work(worker_id):
+        claimed[worker_id] = []
+        with app.app_context():
+            while batch := claim_outbox_batch(app, worker_id, 3):
+                claimed[worker_id] += [email.id for email in batch]
+                send_outbox_batch(app, batch)
+            db.session.remove()
+
+    workers = [threading.Thread(target=work, args=(f'worker{i}',)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    ids = [email_id for batch in claimed.values() for email_id in batch]
+    assert sorted(ids) == list(range(1, 21))
+    assert len(outbox) == 20
+    assert {email.attempts for email in OutboxEmail.query} == {1}
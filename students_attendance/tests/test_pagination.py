@@ -0,0 +1,50 @@
+# tests/test_pagination.py
+from app import db
+from app.models import Student
+from app.utils.cache import init_cache
+from app.utils.pagination import keyset_paginate, encode_cursor
+from factories import add_students
+
+COLUMNS = [(Student.id, False)]
+
+def ids(page):
+    return [student.id for student in page]
+
+def test_pages_forward_and_back(app):
+    add_students(5)
+    db.session.commit()
+
+    first = keyset_paginate(Student.query, COLUMNS, per_page=2)
+    second = keyset_paginate(Student.query, COLUMNS, after=first.next_cursor, per_page=2)
+    back = keyset_paginate(Student.query, COLUMNS, before=second.prev_cursor, per_page=2)
+
+    assert ids(first) == [1, 2] and not first.has_prev
+    assert ids(second) == [3, 4] and second.has_prev and second.has_next
+    assert ids(back) == [1, 2]
+
+def test_invalid_cursors_show_the_first_page(app):
+    add_students(5)
+    db.session.commit()
+
+    for cursor in ['garbage', encode_cursor(['3']), encode_cursor([True]), encode_cursor([1, 2])]:
+        for page in (
+            keyset_paginate(Student.query, COLUMNS, after=cursor, per_page=2),
+            keyset_paginate(Student.query, COLUMNS, before=cursor, per_page=2),
+        ):
+            assert ids(page) == [1, 2]
+            assert page.has_next and not page.has_prev
+
+def test_total_follows_cache_versions(app):
+    app.config['CACHE_TYPE'] = 'lru'
+    init_cache(app)
+    add_students(3)
+    db.session.commit()
+
+    page = keyset_paginate(Student.query, COLUMNS, total_key='students', total_versions=[('catalog', 0)])
+    assert page.total == 3
+
+    add_students(2, start=3)
+    db.session.commit()
+
+    page = keyset_paginate(Student.query, COLUMNS, total_key='students', total_versions=[('catalog', 0)])
+    assert page.total == 5
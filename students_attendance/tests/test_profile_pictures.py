@@ -0,0 +1,93 @@
+# tests/test_profile_pictures.py
+import io
+import os
+import threading
+
+import pytest
+from PIL import Image
+from werkzeug.datastructures import FileStorage
+
+from app.utils import save_picture
+from app.utils.save_picture import save_profile_picture, variant_filename, PICTURE_SIZES, PICTURE_FORMATS
+
+GPS_IFD = 0x8825
+
+class DeferredExecutor:
+    """Runs submitted work only when the test says so"""
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, fn, *args):
+        self.tasks.append((fn, args))
+
+    def run(self):
+        for fn, args in self.tasks:
+            fn(*args)
+
+@pytest.fixture
+def app_env(app_env, tmp_path):
+    app_env.setenv('PROFILE_PICTURE_PENDING_PATH', str(tmp_path / 'pending'))
+    return app_env
+
+@pytest.fixture
+def pictures(app, tmp_path, monkeypatch):
+    pictures_path = tmp_path / 'pictures'
+    executor = DeferredExecutor()
+    monkeypatch.setattr(save_picture, 'get_pictures_path', lambda: str(pictures_path))
+    monkeypatch.setattr(save_picture, '_executor', executor)
+    monkeypatch.setattr(save_picture, '_pending', threading.BoundedSemaphore(1))
+    return executor
+
+def upload(data=None):
+    if data is None:
+        exif = Image.Exif()
+        exif[GPS_IFD] = {1: 'N', 2: (52.0, 13.0, 0.0)}
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), (200, 30, 30)).save(buffer, format='JPEG', exif=exif)
+        data = buffer.getvalue()
+    return FileStorage(io.BytesIO(data), filename='me.jpg')
+
+def test_placeholder_is_served_until_variants_exist(app, client, pictures):
+    picture = upload()
+    with Image.open(io.BytesIO(picture.stream.getvalue())) as img:
+        assert img.getexif().get_ifd(GPS_IFD)
+    name = save_profile_picture(picture)
+    url = f'/profile_pics/{variant_filename(name, 150, "jpg")}'
+
+    pending = client.get(url)
+    assert pending.status_code == 200 and pending.cache_control.no_cache
+    with Image.open(io.BytesIO(pending.data)) as img:
+        assert img.size == (150, 150) and not img.getexif()
+
+    pictures.run()
+
+    assert os.listdir(app.config['PROFILE_PICTURE_PENDING_PATH']) == []
+    for size in PICTURE_SIZES:
+        for fmt in PICTURE_FORMATS:
+            path = os.path.join(save_picture.get_pictures_path(), variant_filename(name, size, fmt))
+            with Image.open(path) as img:
+                assert img.size == (size, size)
+                assert not img.getexif()
+
+    ready = client.get(url)
+    assert ready.cache_control.immutable
+    ready.close()
+
+def test_failed_processing_deletes_the_upload(app, client, pictures, monkeypatch):
+    def fail(*args):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(save_picture, 'process_profile_picture', fail)
+    name = save_profile_picture(upload())
+    pictures.run()
+
+    assert os.listdir(app.config['PROFILE_PICTURE_PENDING_PATH']) == []
+    assert client.get(f'/profile_pics/{variant_filename(name, 150, "jpg")}').status_code == 404
+    # The semaphore slot was given back
+    assert save_picture._pending.acquire(blocking=False)
+
+def test_non_images_are_rejected(app, pictures):
+    with pytest.raises(save_picture.ProfilePictureError):
+        save_profile_picture(upload(b'not an image'))
+    assert pictures.tasks == []
@@ -0,0 +1,59 @@
+# tests/test_query_counts.py
+"""Pages must issue a fixed number of queries however many rows they show.
+
+Each test measures a page, adds more rows of what it lists and measures
+again; a lost eager load shows up as a count that grows with the data.
+"""
+from datetime import date
+
+from app import db
+from app.models import Course
+from factories import add_students, add_sessions, enroll, mark_all, login
+
+def page_queries(client, count_queries, url):
+    # A request reuses the active app context and its session; give it a
+    # fresh one so objects the test loaded cannot hide lazy loads
+    with client.application.app_context(), count_queries() as stats:
+        response = client.get(url)
+    assert response.status_code == 200
+    return stats.count
+
+def test_student_attendance_queries(client, course, count_queries):
+    students = add_students(1)
+    enroll(course, students)
+    mark_all(add_sessions(course, 3), students)
+    db.session.commit()
+    login(client, 'student0')
+
+    before = page_queries(client, count_queries, '/student/attendance')
+
+    other = Course(
+        course_code='CS102', title='Data Structures', credits=3, faculty_id=course.faculty_id,
+        department='CS', semester=3, year=2024
+    )
+    db.session.add(other)
+    db.session.flush()
+    enroll(other, students)
+    mark_all(add_sessions(course, 20, start=date(2024, 2, 1)), students)
+    mark_all(add_sessions(other, 20, start=date(2024, 2, 1)), students)
+    db.session.commit()
+
+    assert page_queries(client, count_queries, '/student/attendance') == before
+    assert before <= 3
+
+def test_admin_dashboard_queries(client, course, count_queries):
+    students = add_students(2)
+    enroll(course, students)
+    mark_all(add_sessions(course, 2), students)
+    db.session.commit()
+    login(client, 'admin')
+
+    before = page_queries(client, count_queries, '/admin/dashboard')
+
+    more = add_students(20, department='EE', start=2)
+    enroll(course, more)
+    mark_all(add_sessions(course, 10, start=date(2024, 2, 1)), students + more)
+    db.session.commit()
+
+    assert page_queries(client, count_queries, '/admin/dashboard') == before
+    assert before <= 10
@@ -0,0 +1,70 @@
+# tests/test_query_plans.py
+from datetime import date
+
+import pytest
+from sqlalchemy import select, func
+
+from app import db
+from app.models import Enrollment, Attendance, AttendanceSession
+
+# Hot query shapes and the indexes that must serve them. The unique
+# (course_id, date, start_time) index covers the course/date lookups as well.
+HOT_QUERIES = {
+    'attendance_by_student_status': (
+        select(func.count(Attendance.id)).where(
+            Attendance.student_id == 1,
+            Attendance.status == 'present'
+        ),
+        {'ix_attendances_student_status'}
+    ),
+    'sessions_by_course_date': (
+        select(AttendanceSession.id).where(
+            AttendanceSession.course_id == 1,
+            AttendanceSession.date >= date(2024, 1, 1),
+            AttendanceSession.date <= date(2024, 6, 30)
+        ).order_by(AttendanceSession.date.desc()),
+        {'ix_attendance_sessions_course_date', 'ux_attendance_sessions_course_date_start'}
+    ),
+    'sessions_by_faculty_date': (
+        select(AttendanceSession.id).where(
+            AttendanceSession.faculty_id == 1
+        ).order_by(AttendanceSession.date.desc()).limit(5),
+        {'ix_attendance_sessions_faculty_date'}
+    ),
+    'enrollments_by_course': (
+        select(func.count(Enrollment.id)).where(
+            Enrollment.course_id == 1,
+            Enrollment.is_active == True
+        ),
+        {'ix_enrollments_course_active'}
+    ),
+    'enrollments_by_student': (
+        select(Enrollment.course_id).where(
+            Enrollment.student_id == 1,
+            Enrollment.is_active == True
+        ),
+        {'ix_enrollments_student_active'}
+    ),
+}
+
+def explain_query_plan(stmt):
+    """SQLite EXPLAIN QUERY PLAN detail lines for a statement"""
+    compiled = stmt.compile(db.engine, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(db.text(f'EXPLAIN QUERY PLAN {compiled}')).all()
+    return [row[-1] for row in rows]
+
+@pytest.mark.parametrize('name', HOT_QUERIES)
+def test_hot_query_uses_index(app, name):
+    stmt, indexes = HOT_QUERIES[name]
+    plan = explain_query_plan(stmt)
+
+    assert not [line for line in plan if line.startswith('SCAN')], plan
+    assert any(index in line for line in plan for index in indexes), plan
+    # The index order serves ORDER BY date
+    assert not [line for line in plan if 'TEMP B-TREE' in line], plan
+
+def test_course_date_range_is_bounded_by_index(app):
+    stmt, _ = HOT_QUERIES['sessions_by_course_date']
+    plan = explain_query_plan(stmt)
+
+    assert any('course_id=? AND date>? AND date<?' in line for line in plan), plan
@@ -0,0 +1,58 @@
+# tests/test_query_stats.py
+import logging
+
+from app import db
+from app.models import Student
+from factories import add_students, enroll, login
+
+def test_counts_queries_in_block(course, count_queries):
+    add_students(3)
+
+    with count_queries() as stats:
+        for student in Student.query.all():
+            student.user.email
+
+    assert stats.count == 4
+    assert len(stats.repeated(2)) == 1
+
+def test_nested_block_counts_in_enclosing_block(course, count_queries):
+    with count_queries() as outer:
+        Student.query.count()
+        with count_queries() as inner:
+            Student.query.count()
+
+    assert inner.count == 1
+    assert outer.count == 2
+
+def test_pages_report_their_queries_in_debug(app, client, course):
+    students = add_students(2)
+    enroll(course, students)
+    db.session.commit()
+    login(client, 'student0')
+    app.debug = True
+
+    with app.app_context():
+        response = client.get('/student/attendance')
+
+    assert response.status_code == 200
+    assert int(response.headers['X-Query-Count']) > 0
+    assert float(response.headers['X-Query-Time-Ms']) >= 0
+    assert 'X-N-Plus-One' not in response.headers
+
+def test_repeated_query_is_logged_as_n_plus_one(app, client, course, caplog):
+    add_students(3)
+    db.session.commit()
+
+    def student_emails():
+        return ','.join(student.user.email for student in Student.query.all())
+
+    app.add_url_rule('/student-emails', view_func=student_emails)
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = 2
+    app.debug = True
+
+    with app.app_context(), caplog.at_level(logging.WARNING, logger='app.utils.query_stats'):
+        response = client.get('/student-emails')
+
+    assert response.headers['X-N-Plus-One'] == '1'
+    warning, = caplog.records
+    assert warning.getMessage().startswith('Possible N+1 in student_emails: statement executed 3 times')
@@ -0,0 +1,63 @@
+# tests/test_replica.py
+import pytest
+
+from app import db
+from app.utils.cache import cache
+from app.utils.replica import REPLICA_BIND, read_replica, sync_sqlite_replica
+from factories import add_students, add_sessions, enroll, mark_all, login
+
+URL = '/admin/api/reports/attendance_by_department'
+
+@pytest.fixture
+def app_env(app_env, tmp_path):
+    app_env.setenv('REPLICA_DATABASE_URL', f"sqlite:///{tmp_path / 'replica.db'}")
+    app_env.setenv('REPLICA_CHECK_INTERVAL', '0')
+    app_env.setenv('CACHE_TYPE', 'lru')
+    return app_env
+
+def sync_replica():
+    sync_sqlite_replica(db.engine, db.engines[REPLICA_BIND])
+
+def test_replica_reads_are_cached_under_their_own_keys(app):
+    sync_replica()
+    primary_key = cache.key('stats', 1, versions=[('course', 1)])
+    with read_replica():
+        replica_key = cache.key('stats', 1, versions=[('course', 1)])
+        sync_replica()
+        assert cache.key('stats', 1, versions=[('course', 1)]) != replica_key
+
+    assert replica_key != primary_key
+
+def test_stats_read_from_a_lagging_replica_are_refreshed_by_the_next_sync(course):
+    students = add_students(2)
+    enroll(course, students)
+    sessions = add_sessions(course, 1)
+    db.session.commit()
+    sync_replica()
+
+    # The marks bump the course version before the replica has them
+    mark_all(sessions, students)
+    db.session.commit()
+    assert course.get_attendance_stats()['average_attendance_percentage'] == 0
+
+    sync_replica()
+    assert course.get_attendance_stats()['average_attendance_percentage'] == 100
+
+def test_report_etag_changes_when_the_replica_catches_up(course, client):
+    students = add_students(2)
+    sessions = add_sessions(course, 1)
+    db.session.commit()
+    sync_replica()
+    login(client, 'admin')
+
+    mark_all(sessions, students)
+    db.session.commit()
+    with client.application.app_context():
+        lagging = client.get(URL)
+    assert lagging.json == []
+
+    sync_replica()
+    with client.application.app_context():
+        current = client.get(URL, headers={'If-None-Match': lagging.headers['ETag']})
+    assert current.status_code == 200
+    assert current.json[0]['present_records'] == 2
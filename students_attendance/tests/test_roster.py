@@ -0,0 +1,32 @@
+# tests/test_roster.py
+from app import db
+from app.models import Enrollment
+from app.utils.roster import is_enrolled, roster_entries
+from factories import add_students, enroll
+
+def test_miss_is_confirmed_without_reloading_the_roster(course, count_queries):
+    students = add_students(30)
+    enroll(course, students[:20])
+    enrolled_id, other_id = students[0].id, students[25].id
+    db.session.commit()
+    roster_entries(course.id)
+
+    with count_queries() as stats:
+        assert is_enrolled(course.id, enrolled_id)
+        assert not is_enrolled(course.id, other_id)
+
+    assert stats.count == 1
+    assert 'EXISTS' in next(iter(stats.statements))
+
+def test_student_enrolled_elsewhere_is_found_and_roster_reloaded(course):
+    students = add_students(2)
+    enroll(course, students[:1])
+    db.session.commit()
+    roster_entries(course.id)
+
+    # Written behind the cache's back, as another worker's commit would look here
+    db.session.execute(Enrollment.__table__.insert().values(student_id=students[1].id, course_id=course.id, is_active=True))
+    db.session.commit()
+
+    assert is_enrolled(course.id, students[1].id)
+    assert [entry.id for entry in roster_entries(course.id)] == [s.id for s in students]
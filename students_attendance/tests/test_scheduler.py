@@ -0,0 +1,37 @@
+# tests/test_scheduler.py
+from datetime import date, datetime, timedelta
+
+from app import db
+from app.models import Attendance, AttendanceSession
+from app.utils.scheduler import close_expired_sessions
+from factories import add_students, add_sessions, enroll, mark_all
+
+def test_close_expired_sessions_records_absences(app, course):
+    students = add_students(3)
+    enroll(course, students)
+    today = date.today()
+    old, recent = add_sessions(course, 1, start=today - timedelta(days=30)) + add_sessions(course, 1, start=today - timedelta(days=1))
+    old.is_active = recent.is_active = True
+    mark_all([recent], students[:1])
+    db.session.commit()
+
+    assert close_expired_sessions(datetime.now(), lookback_days=7) == (2, 2)
+
+    db.session.expire_all()
+    assert not recent.is_active
+    assert {a.student_id: a.status for a in Attendance.query.filter_by(session_id=recent.id)} == {
+        students[0].id: 'present', students[1].id: 'absent', students[2].id: 'absent'
+    }
+    # Sessions before the lookback window are closed without back-filled absences
+    assert not old.is_active
+    assert Attendance.query.filter_by(session_id=old.id).count() == 0
+
+    assert close_expired_sessions(datetime.now(), lookback_days=7) == (0, 0)
+
+def test_sessions_not_ended_stay_open(app, course):
+    session, = add_sessions(course, 1, start=date.today() + timedelta(days=1))
+    session.is_active = True
+    db.session.commit()
+
+    assert close_expired_sessions(datetime.now()) == (0, 0)
+    assert AttendanceSession.query.get(session.id).is_active
@@ -0,0 +1,98 @@
+# tests/test_sync.py
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+
+from app import db
+from app.models import Attendance, AttendanceSyncMark, User
+from app.utils import marking
+from app.utils.marking import sync_marks
+from app.utils.scheduler import close_expired_sessions
+from factories import add_students, add_sessions, enroll
+
+def during(session, minutes=30):
+    """ISO timestamp of a moment in the session, as a device would send it"""
+    local = datetime.combine(session.date, session.start_time) + timedelta(minutes=minutes)
+    return local.astimezone(timezone.utc).isoformat()
+
+def mark(client_id, session, student, status='present', **fields):
+    return dict({
+        'client_id': client_id, 'session_id': session.id, 'student_id': student.id,
+        'status': status, 'client_timestamp': during(session)
+    }, **fields)
+
+@pytest.fixture
+def synced(course):
+    """Two enrolled students and a session; returns (session, students, faculty user id)"""
+    students = add_students(2)
+    enroll(course, students)
+    session, = add_sessions(course, 1)
+    db.session.commit()
+    return session, students, course.faculty.user_id
+
+def statuses(session):
+    return {a.student_id: a.status for a in Attendance.query.filter_by(session_id=session.id)}
+
+def test_resubmitted_batch_is_a_no_op(synced, count_queries):
+    session, students, user_id = synced
+    faculty_id = session.faculty_id
+    batch = [mark('m1', session, students[0]), mark('m2', session, students[1], 'late')]
+    assert [r['result'] for r in sync_marks(batch, faculty_id, user_id)] == ['applied', 'applied']
+    db.session.commit()
+
+    # The device did not get the response and sends the batch again, edited
+    resent = [mark('m1', session, students[0], 'absent'), mark('m2', session, students[1], 'late')]
+    with count_queries() as stats:
+        results = sync_marks(resent, faculty_id, user_id)
+        db.session.commit()
+
+    assert [(r['result'], r.get('duplicate')) for r in results] == [('applied', True), ('applied', True)]
+    assert not any(s.lstrip().upper().startswith(('INSERT', 'UPDATE')) for s in stats.statements)
+    assert statuses(session) == {students[0].id: 'present', students[1].id: 'late'}
+    assert AttendanceSyncMark.query.count() == 2
+
+def test_users_can_reuse_client_ids(synced):
+    session, students, user_id = synced
+    other_user_id = User.query.filter_by(username='admin').one().id
+
+    sync_marks([mark('m1', session, students[0])], session.faculty_id, user_id)
+    results = sync_marks([mark('m1', session, students[1], 'late')], session.faculty_id, other_user_id)
+    db.session.commit()
+
+    assert results == [{'client_id': 'm1', 'result': 'applied', 'reason': None}]
+    assert statuses(session) == {students[0].id: 'present', students[1].id: 'late'}
+    assert AttendanceSyncMark.query.filter_by(client_id='m1').count() == 2
+
+def test_marks_sync_without_on_conflict_support(synced, monkeypatch):
+    session, students, user_id = synced
+    monkeypatch.setattr(marking, 'insert_for_dialect', lambda: None)
+
+    sync_marks([mark('m1', session, students[0])], session.faculty_id, user_id)
+    db.session.commit()
+    results = sync_marks([
+        mark('m2', session, students[0], 'absent', client_timestamp=during(session, 40)),
+        mark('m3', session, students[1], 'late'),
+        mark('m1', session, students[1])
+    ], session.faculty_id, user_id)
+    db.session.commit()
+
+    assert [r['result'] for r in results] == ['applied', 'applied', 'applied']
+    assert results[2].get('duplicate')
+    assert statuses(session) == {students[0].id: 'absent', students[1].id: 'late'}
+    assert AttendanceSyncMark.query.count() == 3
+
+def test_mark_made_in_class_beats_the_auto_close_absence(course):
+    students = add_students(2)
+    enroll(course, students)
+    session, = add_sessions(course, 1, start=date.today() - timedelta(days=1))
+    session.is_active = True
+    db.session.commit()
+
+    assert close_expired_sessions(datetime.now()) == (1, 2)
+
+    results = sync_marks([mark('m1', session, students[0])], course.faculty_id, marked_by=None)
+    db.session.commit()
+
+    assert results[0]['result'] == 'applied'
+    statuses = {a.student_id: a.status for a in Attendance.query.filter_by(session_id=session.id)}
+    assert statuses == {students[0].id: 'present', students[1].id: 'absent'}
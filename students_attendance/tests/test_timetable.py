@@ -0,0 +1,70 @@
+# tests/test_timetable.py
+from datetime import date, datetime, time, timedelta
+
+from app import db
+from app.models import AttendanceSession
+from app.models.timetable import TimetableSlot
+from app.utils import timetable
+from app.utils.timetable import create_sessions_from_timetable, activate_todays_sessions
+
+MONDAY = date(2030, 1, 7)
+
+def add_slot(course, weekday=0, valid_from=MONDAY, valid_until=MONDAY + timedelta(days=13)):
+    slot = TimetableSlot(
+        course_id=course.id, faculty_id=course.faculty_id, weekday=weekday,
+        start_time=time(9), end_time=time(10), valid_from=valid_from, valid_until=valid_until
+    )
+    db.session.add(slot)
+    db.session.commit()
+    return slot
+
+def test_sessions_are_created_once_per_slot_and_day(course):
+    add_slot(course, weekday=0)
+    add_slot(course, weekday=2)
+
+    assert create_sessions_from_timetable(MONDAY, MONDAY + timedelta(days=13)) == 4
+    assert create_sessions_from_timetable(MONDAY, MONDAY + timedelta(days=13)) == 0
+
+    sessions = AttendanceSession.query.order_by(AttendanceSession.date).all()
+    assert [s.date.weekday() for s in sessions] == [0, 2, 0, 2]
+    assert all(s.is_scheduled and not s.is_active for s in sessions)
+
+def test_session_created_by_another_worker_is_skipped(course, monkeypatch):
+    add_slot(course)
+    generate = timetable.generate_session_codes
+
+    def generate_after_another_worker(count):
+        # Another worker inserts the Monday session after the existing-sessions check
+        db.session.add(AttendanceSession(
+            course_id=course.id, faculty_id=course.faculty_id, date=MONDAY,
+            start_time=time(9), end_time=time(10), session_code='OTHER', is_scheduled=True
+        ))
+        db.session.flush()
+        return generate(count)
+
+    monkeypatch.setattr(timetable, 'generate_session_codes', generate_after_another_worker)
+
+    assert create_sessions_from_timetable(MONDAY, MONDAY + timedelta(days=13)) == 1
+    assert AttendanceSession.query.count() == 2
+
+def test_sessions_closed_early_are_not_reopened(course):
+    today = date.today()
+    session = AttendanceSession(
+        course_id=course.id, faculty_id=course.faculty_id, date=today,
+        start_time=time(9), end_time=time(10), session_code='TODAY', is_scheduled=True,
+        is_active=False
+    )
+    db.session.add(session)
+    db.session.commit()
+    class_time = datetime.combine(today, time(9, 5))
+
+    assert activate_todays_sessions(class_time) == 1
+    assert session.is_active and not session.is_scheduled
+
+    # The faculty member closes it before the end of class
+    session.is_active = False
+    db.session.commit()
+
+    assert activate_todays_sessions(class_time) == 0
+    db.session.refresh(session)
+    assert not session.is_active